@@ -0,0 +1,172 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-06-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('users',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('telegram_id', sa.BigInteger(), nullable=False),
+    sa.Column('username', sa.String(length=100), nullable=True),
+    sa.Column('first_name', sa.String(length=100), nullable=True),
+    sa.Column('last_name', sa.String(length=100), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('timezone', sa.String(length=50), nullable=True),
+    sa.Column('settings', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_telegram_id'), 'users', ['telegram_id'], unique=True)
+    op.create_table('audit_log',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('action', sa.String(length=100), nullable=False),
+    sa.Column('entity_type', sa.String(length=50), nullable=True),
+    sa.Column('entity_id', sa.UUID(), nullable=True),
+    sa.Column('details', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audit_log_user_id'), 'audit_log', ['user_id'], unique=False)
+    op.create_table('cameras',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('device_id', sa.String(length=100), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('last_heartbeat', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('settings', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_cameras_device_id'), 'cameras', ['device_id'], unique=True)
+    op.create_index(op.f('ix_cameras_user_id'), 'cameras', ['user_id'], unique=False)
+    op.create_table('conversations',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('context', sa.JSON(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_conversations_is_active'), 'conversations', ['is_active'], unique=False)
+    op.create_index(op.f('ix_conversations_user_id'), 'conversations', ['user_id'], unique=False)
+    op.create_table('alert_rules',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('camera_id', sa.UUID(), nullable=True),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('enabled', sa.Boolean(), nullable=True),
+    sa.Column('trigger_type', sa.String(length=50), nullable=False),
+    sa.Column('trigger_config', sa.JSON(), nullable=False),
+    sa.Column('conditions', sa.JSON(), nullable=True),
+    sa.Column('severity', sa.String(length=20), nullable=True),
+    sa.Column('cooldown_seconds', sa.Integer(), nullable=True),
+    sa.Column('last_triggered_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['camera_id'], ['cameras.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_alert_rules_enabled'), 'alert_rules', ['enabled'], unique=False)
+    op.create_index(op.f('ix_alert_rules_user_id'), 'alert_rules', ['user_id'], unique=False)
+    op.create_table('messages',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('conversation_id', sa.UUID(), nullable=False),
+    sa.Column('direction', sa.String(length=10), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('message_type', sa.String(length=20), nullable=True),
+    sa.Column('external_id', sa.String(length=100), nullable=True),
+    sa.Column('intent', sa.String(length=50), nullable=True),
+    sa.Column('metadata', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_messages_conversation_id'), 'messages', ['conversation_id'], unique=False)
+    op.create_index(op.f('ix_messages_external_id'), 'messages', ['external_id'], unique=False)
+    op.create_table('scenes',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('camera_id', sa.UUID(), nullable=False),
+    sa.Column('captured_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('received_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('objects', sa.JSON(), nullable=True),
+    sa.Column('motion', sa.Boolean(), nullable=True),
+    sa.Column('motion_score', sa.Float(), nullable=True),
+    sa.Column('snapshot_url', sa.String(length=500), nullable=True),
+    sa.Column('enhanced', sa.Boolean(), nullable=True),
+    sa.Column('enhancement_data', sa.JSON(), nullable=True),
+    sa.Column('frame_hash', sa.String(length=64), nullable=True),
+    sa.ForeignKeyConstraint(['camera_id'], ['cameras.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_scenes_camera_id'), 'scenes', ['camera_id'], unique=False)
+    op.create_index(op.f('ix_scenes_motion'), 'scenes', ['motion'], unique=False)
+    op.create_table('events',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('camera_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('scene_id', sa.UUID(), nullable=True),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('severity', sa.String(length=20), nullable=True),
+    sa.Column('title', sa.String(length=200), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('metadata', sa.JSON(), nullable=True),
+    sa.Column('acknowledged', sa.Boolean(), nullable=True),
+    sa.Column('acknowledged_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('response', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['camera_id'], ['cameras.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['scene_id'], ['scenes.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_events_acknowledged'), 'events', ['acknowledged'], unique=False)
+    op.create_index(op.f('ix_events_user_id'), 'events', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_events_acknowledged'), table_name='events')
+    op.drop_index(op.f('ix_events_user_id'), table_name='events')
+    op.drop_table('events')
+    op.drop_index(op.f('ix_scenes_camera_id'), table_name='scenes')
+    op.drop_index(op.f('ix_scenes_motion'), table_name='scenes')
+    op.drop_table('scenes')
+    op.drop_index(op.f('ix_messages_conversation_id'), table_name='messages')
+    op.drop_index(op.f('ix_messages_external_id'), table_name='messages')
+    op.drop_table('messages')
+    op.drop_index(op.f('ix_alert_rules_enabled'), table_name='alert_rules')
+    op.drop_index(op.f('ix_alert_rules_user_id'), table_name='alert_rules')
+    op.drop_table('alert_rules')
+    op.drop_index(op.f('ix_conversations_is_active'), table_name='conversations')
+    op.drop_index(op.f('ix_conversations_user_id'), table_name='conversations')
+    op.drop_table('conversations')
+    op.drop_index(op.f('ix_cameras_device_id'), table_name='cameras')
+    op.drop_index(op.f('ix_cameras_user_id'), table_name='cameras')
+    op.drop_table('cameras')
+    op.drop_index(op.f('ix_audit_log_user_id'), table_name='audit_log')
+    op.drop_table('audit_log')
+    op.drop_index(op.f('ix_users_telegram_id'), table_name='users')
+    op.drop_table('users')
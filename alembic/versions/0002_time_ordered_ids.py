@@ -0,0 +1,52 @@
+"""Time-ordered (UUIDv7) primary keys for high-insert tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-06-10 00:00:00.000000
+
+The application already generates UUIDv7 keys (app.utils.ids.uuid7); this adds a
+matching server-side default so rows inserted by other writers (SQL scripts,
+backfills) also append to the right edge of the primary key index. Existing
+rows keep their random ids; run ``REINDEX TABLE CONCURRENTLY <table>`` during a
+quiet period to compact indexes that were bloated by uuid4 inserts.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("scenes", "messages", "events", "audit_log")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 48-bit millisecond timestamp, then 74 random bits (from gen_random_uuid, PG13+),
+    # with the version (7) and variant (10) bits set per RFC 9562.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+        DECLARE
+            uuid_bytes bytea;
+        BEGIN
+            uuid_bytes := substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                || substring(uuid_send(gen_random_uuid()) FROM 7);
+            uuid_bytes := set_byte(uuid_bytes, 6, (b'0111' || get_byte(uuid_bytes, 6)::bit(4))::bit(8)::int);
+            uuid_bytes := set_byte(uuid_bytes, 8, (b'10' || get_byte(uuid_bytes, 8)::bit(6))::bit(8)::int);
+            RETURN encode(uuid_bytes, 'hex')::uuid;
+        END
+        $$ LANGUAGE plpgsql VOLATILE
+    """)
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT uuid_generate_v7()")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT")
+    op.execute("DROP FUNCTION IF EXISTS uuid_generate_v7()")
@@ -0,0 +1,106 @@
+"""Event history indexes and per-user unacknowledged counter
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-06-17 00:00:00.000000
+
+Replaces the single-column ``user_id`` / ``acknowledged`` indexes on ``events``
+with composite indexes ordered like the history query (newest first, keyed on
+``(created_at, id)``), so a page is an index range scan instead of a sort over the
+user's whole history. ``users.unacknowledged_events`` is kept current by a row
+trigger, so badge counts are a primary-key lookup instead of ``COUNT(*)``.
+
+On a large live table, create the indexes with ``CREATE INDEX CONCURRENTLY``
+ahead of running this migration; the ``IF NOT EXISTS`` guards make that safe.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination needs a total order, and the partial index predicate has
+    # to match ``acknowledged = false`` exactly, so neither column may be NULL.
+    op.execute("UPDATE events SET created_at = now() WHERE created_at IS NULL")
+    op.execute("UPDATE events SET acknowledged = false WHERE acknowledged IS NULL")
+    op.alter_column("events", "created_at", existing_type=sa.DateTime(timezone=True), nullable=False)
+    op.alter_column(
+        "events", "acknowledged",
+        existing_type=sa.Boolean(), nullable=False, server_default=sa.false(),
+    )
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_events_user_created "
+        "ON events (user_id, created_at DESC, id DESC) INCLUDE (camera_id, severity, acknowledged)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_events_user_camera_created "
+        "ON events (user_id, camera_id, created_at DESC, id DESC)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_events_user_unacknowledged "
+        "ON events (user_id, created_at DESC, id DESC) WHERE acknowledged = false"
+    )
+    op.drop_index("ix_events_acknowledged", table_name="events")
+    op.drop_index("ix_events_user_id", table_name="events")
+
+    op.add_column(
+        "users",
+        sa.Column("unacknowledged_events", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION events_unacknowledged_counter() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.acknowledged = NEW.acknowledged AND OLD.user_id = NEW.user_id THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') AND NOT OLD.acknowledged THEN
+                UPDATE users SET unacknowledged_events = unacknowledged_events - 1 WHERE id = OLD.user_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NOT NEW.acknowledged THEN
+                UPDATE users SET unacknowledged_events = unacknowledged_events + 1 WHERE id = NEW.user_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER events_unacknowledged_counter
+        AFTER INSERT OR DELETE OR UPDATE OF acknowledged, user_id ON events
+        FOR EACH ROW EXECUTE FUNCTION events_unacknowledged_counter()
+    """)
+    op.execute("""
+        UPDATE users SET unacknowledged_events = counts.n
+        FROM (
+            SELECT user_id, count(*) AS n FROM events WHERE acknowledged = false GROUP BY user_id
+        ) AS counts
+        WHERE users.id = counts.user_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS events_unacknowledged_counter ON events")
+    op.execute("DROP FUNCTION IF EXISTS events_unacknowledged_counter()")
+    op.drop_column("users", "unacknowledged_events")
+
+    op.create_index(op.f("ix_events_user_id"), "events", ["user_id"], unique=False)
+    op.create_index(op.f("ix_events_acknowledged"), "events", ["acknowledged"], unique=False)
+    op.drop_index("ix_events_user_unacknowledged", table_name="events")
+    op.drop_index("ix_events_user_camera_created", table_name="events")
+    op.drop_index("ix_events_user_created", table_name="events")
+
+    op.alter_column(
+        "events", "acknowledged",
+        existing_type=sa.Boolean(), nullable=True, server_default=None,
+    )
+    op.alter_column("events", "created_at", existing_type=sa.DateTime(timezone=True), nullable=True)
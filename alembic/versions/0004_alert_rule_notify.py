@@ -0,0 +1,52 @@
+"""Notify listeners when alert rules change
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-06-24 00:00:00.000000
+
+Each worker keeps alert rules in memory (app.services.rule_store) and LISTENs on
+``alert_rules_changed``; the payload is the owning user's id, so only that user's
+rules are reloaded. Updates that only touch ``last_triggered_at`` - which the
+workers themselves write in batches - are deliberately not announced.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION alert_rules_notify() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM pg_notify('alert_rules_changed', OLD.user_id::text);
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.user_id <> OLD.user_id) THEN
+                PERFORM pg_notify('alert_rules_changed', NEW.user_id::text);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER alert_rules_notify
+        AFTER INSERT OR DELETE OR UPDATE OF
+            user_id, camera_id, name, enabled, trigger_type, trigger_config,
+            conditions, severity, cooldown_seconds
+        ON alert_rules
+        FOR EACH ROW EXECUTE FUNCTION alert_rules_notify()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS alert_rules_notify ON alert_rules")
+    op.execute("DROP FUNCTION IF EXISTS alert_rules_notify()")
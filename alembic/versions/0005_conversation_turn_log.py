@@ -0,0 +1,69 @@
+"""Append-only conversation turns with a JSONB snapshot
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-07-01 00:00:00.000000
+
+Conversation history is stored as one ``messages`` row per turn, plus a bounded
+snapshot in ``conversations.context`` that is merged in place
+(``context || patch``) every few turns (app.services.conversations). Loading
+a conversation reads the snapshot and the messages after it. For that:
+
+* ``context`` becomes ``jsonb``, so it can be merged with ``||``, and is never NULL.
+* ``messages`` gets ``(conversation_id, id)``. Ids are UUIDv7, so the tail
+  after the snapshot is an index range scan. This replaces the single-column
+  ``conversation_id`` index.
+* the active conversation of a user is found with a partial index.
+* ``conversations`` is given ``fillfactor = 90``. Snapshot updates touch no
+  indexed column, so the free space lets them be HOT updates on the same page.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("UPDATE conversations SET context = '{}' WHERE context IS NULL")
+    op.alter_column(
+        "conversations", "context",
+        existing_type=sa.JSON(),
+        type_=postgresql.JSONB(),
+        postgresql_using="context::jsonb",
+        nullable=False,
+        server_default="{}",
+    )
+    op.execute("ALTER TABLE conversations SET (fillfactor = 90)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_conversations_user_active "
+        "ON conversations (user_id, last_message_at DESC) WHERE is_active"
+    )
+
+    op.execute("CREATE INDEX IF NOT EXISTS ix_messages_conversation_tail ON messages (conversation_id, id)")
+    op.drop_index("ix_messages_conversation_id", table_name="messages")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f("ix_messages_conversation_id"), "messages", ["conversation_id"], unique=False)
+    op.drop_index("ix_messages_conversation_tail", table_name="messages")
+
+    op.drop_index("ix_conversations_user_active", table_name="conversations")
+    op.execute("ALTER TABLE conversations RESET (fillfactor)")
+    op.alter_column(
+        "conversations", "context",
+        existing_type=postgresql.JSONB(),
+        type_=sa.JSON(),
+        postgresql_using="context::json",
+        nullable=True,
+        server_default=None,
+    )
@@ -0,0 +1,40 @@
+"""Drop the INCLUDE columns from ix_events_user_created
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-07-08 00:00:00.000000
+
+0003 created ``ix_events_user_created`` with ``INCLUDE (camera_id, severity,
+acknowledged)`` for index-only history scans. The history query selects whole
+event rows (title, description, metadata, ...), so it always visits the heap
+and the included columns only made the index wider. The index is rebuilt on
+its key columns alone.
+
+On a large live table, build ``ix_events_user_created_new`` with ``CREATE INDEX
+CONCURRENTLY`` first, then drop the old index and rename the new one.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_events_user_created")
+    op.execute("CREATE INDEX ix_events_user_created ON events (user_id, created_at DESC, id DESC)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_events_user_created")
+    op.execute(
+        "CREATE INDEX ix_events_user_created "
+        "ON events (user_id, created_at DESC, id DESC) INCLUDE (camera_id, severity, acknowledged)"
+    )
@@ -1,28 +1,48 @@
 from typing import Protocol, Any
-from app.models.scene import SceneDescriptor
+from app.models.scene import CompactScene
 from app.models.message import IncomingMessage, OutgoingMessage
+from app.services.sightings import Sighting
+from app.services.timeline import Interval
 
 
 class MessageTransport(Protocol):
-    async def receive(self, raw_payload: dict) -> IncomingMessage: ...
+    async def receive(self, raw_payload: Any) -> IncomingMessage: ...
 
     async def send(self, user_id: str, message: OutgoingMessage) -> bool: ...
 
 
 class PerceptionAgent(Protocol):
-    async def get_latest_scene(self, camera_id: str) -> SceneDescriptor: ...
+    async def get_latest_scene(self, camera_id: str) -> CompactScene: ...
 
-    async def get_scene_history(self, camera_id: str, since: Any) -> list[SceneDescriptor]: ...
+    async def get_scene_history(self, camera_id: str, since: Any) -> list[CompactScene]: ...
 
     async def request_snapshot(self, camera_id: str) -> str | None: ...
 
+    async def record_scene(self, scene: CompactScene) -> None: ...
+
+    async def record_snapshot(self, camera_id: str, url: str) -> None: ...
+
+    async def last_seen(self, camera_id: str, object_type: str) -> Sighting | None: ...
+
+    async def activity(self, camera_id: str, since: Any, until: Any) -> dict[str, list[Interval]]: ...
+
+    async def export_camera_state(self, camera_id: str) -> dict | None: ...
+
+    async def import_camera_state(self, camera_id: str, state: dict) -> None: ...
+
 
 class ConversationAgent(Protocol):
     async def process(self, message: IncomingMessage, context: dict) -> OutgoingMessage: ...
 
 
 class EventAgent(Protocol):
-    async def evaluate(self, scene: SceneDescriptor, context: dict) -> dict | None: ...
+    async def evaluate(self, scene: CompactScene, context: dict) -> dict | None: ...
+
+    def interest(self, scene: CompactScene, context: dict) -> float: ...
+
+    def export_camera_state(self, camera_id: str) -> dict: ...
+
+    def import_camera_state(self, camera_id: str, state: dict) -> None: ...
 
 
 class GatekeeperAgent(Protocol):
@@ -1,16 +1,24 @@
-from typing import Literal
+import json
 from datetime import datetime
-import hashlib
-from telegram import Update, Bot
 from app.agents.base import MessageTransport
-from app.models.message import IncomingMessage, OutgoingMessage, InlineKeyboardButton
+from app.models.message import IncomingMessage, OutgoingMessage
 from app.config import settings
-from app.api.mock import mock_message_queue
-from app.services.telegram import TelegramBotClient
+from app.api.mock import mock_outbox
+from app.services.metrics import STAGE_LATENCY, STAGE_ERRORS, observe_latency
+from app.services.telegram_updates import DecodedUpdate, decode_update
+from app.services.tracing import traced
+from app.utils.ids import time_ordered_int
+
+_RECEIVE_LATENCY = STAGE_LATENCY.labels("transport_receive")
+_RECEIVE_ERRORS = STAGE_ERRORS.labels("transport_receive")
+_SEND_LATENCY = STAGE_LATENCY.labels("transport_send")
+_SEND_ERRORS = STAGE_ERRORS.labels("transport_send")
 
 
 class MockTransport(MessageTransport):
     """Mock transport for development/testing - REST-based interface"""
+    @observe_latency(_RECEIVE_LATENCY, _RECEIVE_ERRORS)
+    @traced("mock.receive")
     async def receive(self, raw_payload: dict) -> IncomingMessage:
         telegram_id = raw_payload.get("telegram_id", 123456789)
         username = raw_payload.get("username")
@@ -19,12 +27,8 @@ class MockTransport(MessageTransport):
         media_file_id = raw_payload.get("media_file_id")
         callback_data = raw_payload.get("callback_data")
 
-        message_id = int(hashlib.md5(
-            f"{telegram_id}_{datetime.now().isoformat()}_{content}".encode()
-        ).hexdigest()[:8], 16)
-
         return IncomingMessage(
-            message_id=message_id,
+            message_id=time_ordered_int(),
             sender_telegram_id=telegram_id,
             sender_username=username,
             timestamp=datetime.utcnow(),
@@ -34,9 +38,11 @@ class MockTransport(MessageTransport):
             callback_data=callback_data,
         )
 
+    @observe_latency(_SEND_LATENCY, _SEND_ERRORS)
+    @traced("mock.send")
     async def send(self, user_id: str, message: OutgoingMessage) -> bool:
         mock_outgoing = {
-            "message_id": int(hashlib.md5(f"{user_id}_{datetime.now().isoformat()}".encode()).hexdigest()[:8], 16),
+            "message_id": time_ordered_int(),
             "telegram_id": user_id,
             "message_type": message.type,
             "text": message.text,
@@ -49,20 +55,40 @@ class MockTransport(MessageTransport):
             "parse_mode": message.parse_mode,
             "created_at": datetime.utcnow().isoformat(),
         }
-        mock_message_queue.append(mock_outgoing)
+        mock_outbox.append(mock_outgoing)
         return True
 
 
 class TelegramTransport(MessageTransport):
     """Real Telegram Bot API integration using python-telegram-bot"""
     def __init__(self):
-        self.client = TelegramBotClient(token=settings.telegram_bot_token)
+        # python-telegram-bot is only needed for the real transport, so keep it
+        # out of the import graph in mock mode.
+        from app.services.telegram import TelegramBotClient
 
-    async def receive(self, raw_payload: dict) -> IncomingMessage:
+        self.client = TelegramBotClient(
+            token=settings.telegram_bot_token,
+            base_url=settings.telegram_api_base_url,
+        )
+
+    @observe_latency(_RECEIVE_LATENCY, _RECEIVE_ERRORS)
+    @traced("telegram.receive")
+    async def receive(self, raw_payload: DecodedUpdate | bytes | dict) -> IncomingMessage:
         """
-        Parse Telegram Update object into IncomingMessage.
+        Parse a Telegram Update (webhook body, parsed dict or DecodedUpdate) into IncomingMessage.
         Handles: text messages, photos, callback queries, locations.
         """
+        update = raw_payload if isinstance(raw_payload, DecodedUpdate) else decode_update(raw_payload)
+        if update.message is not None:
+            return update.message
+        return self._from_update_object(update.raw)
+
+    def _from_update_object(self, raw_payload: bytes | str | dict) -> IncomingMessage:
+        """The python-telegram-bot path, for updates the typed decoder does not handle."""
+        from telegram import Update
+
+        if not isinstance(raw_payload, dict):
+            raw_payload = json.loads(raw_payload)
         # Parse Telegram Update from webhook payload
         update = Update.de_json(raw_payload, self.client.bot)
 
@@ -124,6 +150,7 @@ class TelegramTransport(MessageTransport):
             callback_data=callback_data,
         )
 
+    @observe_latency(_SEND_LATENCY, _SEND_ERRORS)
     async def send(self, user_id: str, message: OutgoingMessage) -> bool:
         """
         Send message via Telegram Bot API.
@@ -134,6 +161,7 @@ class TelegramTransport(MessageTransport):
             await self.client.send(chat_id=chat_id, message=message)
             return True
         except Exception as e:
+            _SEND_ERRORS.inc()
             print(f"Failed to send Telegram message: {e}")
             return False
 
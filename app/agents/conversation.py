@@ -1,9 +1,24 @@
-from datetime import datetime
+import logging
+import re
+import time
+from datetime import datetime, timedelta
 from app.agents.base import ConversationAgent, PerceptionAgent
-from app.models.message import IncomingMessage, OutgoingMessage, QuickReplyButton
-from app.models.scene import SceneDescriptor, UserIntent
+from app.models.message import IncomingMessage, OutgoingMessage
+from app.models.scene import CompactScene, UserIntent
+from app.services.images import variant_url
 from app.services.gemini import generate_response, classify_intent
 from app.models.event import DEFAULT_RULES
+from app.services.metrics import LLM_GUARD, STAGE_LATENCY, STAGE_ERRORS, observe_latency
+from app.services.sightings import mentioned_object_types, normalize_object_type, utc_timestamp
+from app.services.timeline import MOTION, format_intervals, summarize_activity
+from app.services.tracing import traced
+
+_INTENT_LATENCY = STAGE_LATENCY.labels("intent_classification")
+_CONVERSATION_LATENCY = STAGE_LATENCY.labels("conversation")
+_CONVERSATION_ERRORS = STAGE_ERRORS.labels("conversation")
+_FALLBACKS = LLM_GUARD.labels("conversation", "fallback")
+
+logger = logging.getLogger(__name__)
 
 
 SYSTEM_PROMPT = """You are Homey, a friendly and concise home monitoring assistant.
@@ -63,13 +78,84 @@ RESPONSE_TEMPLATES = {
 • "Turn off alerts" - Disable notifications""",
 }
 
+# Short questions about one object ("Is my cat there?", "Any packages?") are
+# answered from the last-seen index, without asking the LLM for the intent.
+_OBJECT_QUESTION = re.compile(
+    r"^\W*(is|are|was|were|any|anyone|anybody|someone|somebody|have you seen|did you see|seen|where)\b",
+    re.IGNORECASE,
+)
+
+
+def object_query_target(text: str) -> str | None:
+    """The object type ``text`` asks about, if it is a short question about exactly one."""
+    if len(text) > 80 or not _OBJECT_QUESTION.match(text):
+        return None
+    mentioned = mentioned_object_types(text)
+    return mentioned[0] if len(mentioned) == 1 else None
+
+
+_WHEN_QUESTION = re.compile(r"^\W*when\b", re.IGNORECASE)
+_MOTION_WORDS = re.compile(r"\b(motion|movement|moving|activity)\b", re.IGNORECASE)
+
+
+def activity_query_target(text: str) -> tuple[str, str] | None:
+    """
+    ``(channel, period)`` for a short "when was there ...?" question about motion
+    or one object type; period is "today", "yesterday" or "day" (last 24 hours).
+    """
+    if len(text) > 80 or not _WHEN_QUESTION.match(text):
+        return None
+    lowered = text.lower()
+    period = "today" if "today" in lowered else "yesterday" if "yesterday" in lowered else "day"
+    if _MOTION_WORDS.search(text):
+        return MOTION, period
+    mentioned = mentioned_object_types(text)
+    return (mentioned[0], period) if len(mentioned) == 1 else None
+
+
+def _period_range(period: str, now: datetime) -> tuple[datetime, datetime]:
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "today":
+        return midnight, now
+    if period == "yesterday":
+        return midnight - timedelta(days=1), midnight - timedelta(microseconds=1)
+    return now - timedelta(days=1), now
+
+
+def _with_article(object_type: str) -> str:
+    return f"an {object_type}" if object_type[0] in "aeiou" else f"a {object_type}"
+
+
+def _ago(seconds: float) -> str:
+    if seconds < 60:
+        return "just now"
+    for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            count = int(seconds // size)
+            return f"{count} {unit}{'s' if count > 1 else ''} ago"
+
 
 class ConversationAgentImpl(ConversationAgent):
     def __init__(self, perception: PerceptionAgent):
         self.perception = perception
 
+    @observe_latency(_CONVERSATION_LATENCY, _CONVERSATION_ERRORS)
+    @traced("conversation.process")
     async def process(self, message: IncomingMessage, context: dict) -> OutgoingMessage:
-        intent = await classify_intent(message.content or "")
+        target = object_query_target(message.content or "")
+        if target is not None:
+            return await self._answer_object_query(target, context)
+        activity_target = activity_query_target(message.content or "")
+        if activity_target is not None:
+            return await self._answer_activity_query(*activity_target, context)
+
+        started = time.perf_counter()
+        try:
+            intent = await classify_intent(message.content or "")
+        except Exception as e:
+            logger.warning("Intent classification failed (%s); answering from templates", type(e).__name__)
+            return await self._fallback_reply(context)
+        _INTENT_LATENCY.observe(time.perf_counter() - started)
         
         if intent == UserIntent.STATUS_CHECK:
             return await self._handle_status_check(context)
@@ -86,28 +172,62 @@ class ConversationAgentImpl(ConversationAgent):
         else:
             scene = context.get("latest_scene")
             prompt = SYSTEM_PROMPT.format(
-                current_time=datetime.now().isoformat(),
+                # To the minute, so identical questions asked together coalesce into one LLM call.
+                current_time=datetime.now().strftime("%Y-%m-%d %H:%M"),
                 user_status=context.get("user_status", "home"),
                 user_name=context.get("user_name", "User"),
                 camera_name=scene.camera_id if scene else "N/A",
                 scene_timestamp=scene.timestamp.isoformat() if scene else "N/A",
                 objects_list=", ".join([o.type for o in scene.objects]) if scene and scene.objects else "None",
                 motion_status="Motion detected" if scene and scene.motion else "No motion",
-                recent_events=context.get("recent_events_summary", "None"),
+                recent_events=context.get("recent_events_summary") or await self._recent_events_summary(context),
             )
             
             history = context.get("conversation_history", [])
             history.append({"role": "user", "parts": [message.content or ""]})
             
-            response_text = await generate_response(prompt, history)
+            try:
+                response_text = await generate_response(prompt, history)
+            except Exception as e:
+                logger.warning("LLM reply failed (%s); answering from templates", type(e).__name__)
+                history.pop()
+                return await self._fallback_reply(context)
             
             history.append({"role": "model", "parts": [response_text]})
             context["conversation_history"] = history
             
             return OutgoingMessage(type="text", text=response_text)
 
+    async def _fallback_reply(self, context: dict) -> OutgoingMessage:
+        """A deterministic status answer for when the LLM is slow or unavailable."""
+        _FALLBACKS.inc()
+        templates = RESPONSE_TEMPLATES["STATUS_CHECK"]
+        scene: CompactScene | None = context.get("latest_scene")
+        if scene is not None and scene.objects:
+            types = dict.fromkeys(normalize_object_type(o.type) or o.type.lower() for o in scene.objects)
+            names = [_with_article(t) for t in types]
+            object_list = names[0] if len(names) == 1 else f"{', '.join(names[:-1])} and {names[-1]}"
+            text = templates["objects_present"].format(
+                object_list=object_list[0].upper() + object_list[1:],
+                verb="is" if len(names) == 1 else "are",
+                motion_status="Motion detected." if scene.motion else "No motion.",
+            )
+        elif scene is not None and scene.motion:
+            text = templates["motion_only"].format(time_ago=_ago(time.time() - utc_timestamp(scene.timestamp)))
+        else:
+            camera_id = context.get("camera_id")
+            now = datetime.utcnow()
+            activity = await self.perception.activity(camera_id, now - timedelta(days=1), now) if camera_id else {}
+            motion = activity.get(MOTION)
+            if motion:
+                last_motion = motion[-1][1] - timedelta(minutes=1)
+                text = templates["no_activity"].format(last_motion_time=f"{last_motion:%H:%M} UTC")
+            else:
+                text = "All quiet at home. No motion detected in the last 24 hours."
+        return OutgoingMessage(type="text", text=f"I can't give a full answer right now. {text}")
+
     async def _handle_status_check(self, context: dict) -> OutgoingMessage:
-        scene: SceneDescriptor = context.get("latest_scene")
+        scene: CompactScene = context.get("latest_scene")
         
         if not scene or not scene.objects and not scene.motion:
             return OutgoingMessage(
@@ -129,24 +249,57 @@ class ConversationAgentImpl(ConversationAgent):
         )
 
     async def _handle_object_query(self, message: IncomingMessage, context: dict) -> OutgoingMessage:
-        scene: SceneDescriptor = context.get("latest_scene")
-        content_lower = (message.content or "").lower()
-        
-        if not scene:
-            return OutgoingMessage(type="text", text="No scene data available right now.")
-        
-        for obj in scene.objects:
-            if obj.type.lower() in content_lower:
+        mentioned = mentioned_object_types(message.content or "")
+        if not mentioned:
+            return OutgoingMessage(type="text", text='I\'m not sure what to look for. Try "Is my cat there?"')
+        return await self._answer_object_query(mentioned[0], context)
+
+    async def _answer_object_query(self, object_type: str, context: dict) -> OutgoingMessage:
+        templates = RESPONSE_TEMPLATES["OBJECT_QUERY"]
+        scene: CompactScene | None = context.get("latest_scene")
+        if scene is not None:
+            matches = [o.confidence for o in scene.objects if normalize_object_type(o.type) == object_type]
+            if matches:
                 return OutgoingMessage(
                     type="text",
-                    text=f"Yes, {obj.type} is visible. Confidence: {int(obj.confidence * 100)}%.",
+                    text=templates["found"].format(
+                        object_type=_with_article(object_type), confidence=int(max(matches) * 100),
+                    ),
                 )
-        
+
+        camera_id = context.get("camera_id")
+        sighting = await self.perception.last_seen(camera_id, object_type) if camera_id else None
+        if sighting is None:
+            return OutgoingMessage(type="text", text=templates["never_seen"].format(object_type=_with_article(object_type)))
         return OutgoingMessage(
             type="text",
-            text=f"I don't see that right now. The area appears empty.",
+            text=templates["not_found"].format(
+                object_type=_with_article(object_type),
+                last_seen=_ago(time.time() - sighting.last_seen),
+            ),
         )
 
+    async def _answer_activity_query(self, channel: str, period: str, context: dict) -> OutgoingMessage:
+        camera_id = context.get("camera_id")
+        since, until = _period_range(period, datetime.utcnow())
+        activity = await self.perception.activity(camera_id, since, until) if camera_id else {}
+        intervals = activity.get(channel)
+        when = "in the last 24 hours" if period == "day" else period
+        if channel == MOTION:
+            text = f"Motion {when}: {format_intervals(intervals)} (UTC)." if intervals else f"No motion {when}."
+        elif intervals:
+            text = f"{_with_article(channel).capitalize()} was seen {when}: {format_intervals(intervals)} (UTC)."
+        else:
+            text = f"I haven't seen {_with_article(channel)} {when}."
+        return OutgoingMessage(type="text", text=text)
+
+    async def _recent_events_summary(self, context: dict) -> str:
+        camera_id = context.get("camera_id")
+        if not camera_id:
+            return "None"
+        now = datetime.utcnow()
+        return summarize_activity(await self.perception.activity(camera_id, now - timedelta(days=1), now))
+
     async def _handle_snapshot_request(self, context: dict) -> OutgoingMessage:
         camera_id = context.get("camera_id")
         if not camera_id:
@@ -154,5 +307,10 @@ class ConversationAgentImpl(ConversationAgent):
         
         snapshot_url = await self.perception.request_snapshot(camera_id)
         if snapshot_url:
-            return OutgoingMessage(type="image", image_url=snapshot_url, text="Here's a snapshot from your home.")
+            # Telegram fetches the 1280px variant instead of the full-size upload.
+            return OutgoingMessage(
+                type="photo",
+                photo_url=variant_url(snapshot_url, "telegram"),
+                text="Here's a snapshot from your home.",
+            )
         return OutgoingMessage(type="text", text="Unable to capture snapshot right now.")
@@ -1,27 +1,55 @@
 from datetime import datetime, timedelta
 from app.agents.base import EventAgent
-from app.models.scene import SceneDescriptor
+from app.models.scene import CompactScene, object_type_id
 from app.models.event import AlertTrigger, AlertCondition, AlertRule as AlertRuleModel, DEFAULT_RULES
+from app.services.metrics import RULE_EVALUATIONS
+from app.services.rule_store import RuleStore
+
+_RULES_MATCHED = RULE_EVALUATIONS.labels("matched")
+_RULES_NOT_MATCHED = RULE_EVALUATIONS.labels("not_matched")
+_RULES_COOLDOWN = RULE_EVALUATIONS.labels("cooldown")
+_RULES_DISABLED = RULE_EVALUATIONS.labels("disabled")
 
 
 class EventAgentImpl(EventAgent):
-    def __init__(self, rules: list[dict] | None = None):
-        self.rules = rules or DEFAULT_RULES
-        self.cooldowns: dict[str, datetime] = {}
+    """
+    Evaluates alert rules against a scene. With a ``rule_store``, a resolved user
+    (``context["user_id"]``) gets their own rules from the in-memory store; users
+    without stored rules, and unresolved uploads, use ``DEFAULT_RULES``.
+    """
 
-    async def evaluate(self, scene: SceneDescriptor, context: dict) -> dict | None:
-        for rule_config in self.rules:
-            rule = AlertRuleModel(**rule_config)
-            
+    def __init__(self, rules: list[dict] | None = None, rule_store: RuleStore | None = None):
+        # Validated once here, not on every scene.
+        self.rules = [AlertRuleModel(**rule) for rule in rules or DEFAULT_RULES]
+        self.rule_store = rule_store
+        # (camera_id, rule_id) → end of cooldown. Scoped per camera so the state can
+        # move with the camera when it is handed to another worker.
+        self.cooldowns: dict[tuple[str, str], datetime] = {}
+
+    def _rules_for(self, context: dict) -> list[AlertRuleModel] | tuple[AlertRuleModel, ...]:
+        user_id = context.get("user_id")
+        if self.rule_store is None or user_id is None:
+            return self.rules
+        stored = self.rule_store.rules_for(user_id, context.get("camera_uuid"))
+        return self.rules if stored is None else stored
+
+    async def evaluate(self, scene: CompactScene, context: dict) -> dict | None:
+        rules = self._rules_for(context)
+        # Only rules from the store have a row whose last_triggered_at can be updated.
+        stored = rules is not self.rules
+        for rule in rules:
             if not rule.enabled:
+                _RULES_DISABLED.inc()
                 continue
             
-            if self._check_cooldown(rule):
+            if self._check_cooldown(scene.camera_id, rule):
+                _RULES_COOLDOWN.inc()
                 continue
             
             if self._evaluate_trigger(rule.trigger, scene):
                 if self._evaluate_conditions(rule.conditions, context):
-                    self._update_cooldown(rule.id, rule.cooldown_seconds)
+                    self._update_cooldown(scene.camera_id, rule.id, rule.cooldown_seconds, stored)
+                    _RULES_MATCHED.inc()
                     
                     return {
                         "rule_id": rule.id,
@@ -30,35 +58,84 @@ class EventAgentImpl(EventAgent):
                         "scene": scene,
                         "context": context,
                     }
+            
+            _RULES_NOT_MATCHED.inc()
         
         return None
 
-    def _check_cooldown(self, rule: AlertRuleModel) -> bool:
-        if rule.id not in self.cooldowns:
+    def interest(self, scene: CompactScene, context: dict) -> float:
+        """
+        How much the rules that could fire right now care about this camera:
+        0.0 if none are armed, 1.0 if an armed rule watches for motion or an
+        object that is in view, 0.5 otherwise.
+        """
+        armed = [
+            rule for rule in self._rules_for(context)
+            if rule.enabled and self._evaluate_conditions(rule.conditions, context)
+        ]
+        if not armed:
+            return 0.0
+        in_view = {obj.type_id for obj in scene.objects}
+        for rule in armed:
+            trigger = rule.trigger
+            if trigger.type == "motion" and scene.motion:
+                return 1.0
+            if trigger.type == "object_detected" and (
+                object_type_id(trigger.object_type) in in_view if trigger.object_type else in_view
+            ):
+                return 1.0
+        return 0.5
+
+    def export_camera_state(self, camera_id: str) -> dict:
+        """Remove and return this camera's active cooldowns (for a handoff)."""
+        now = datetime.utcnow()
+        state = {}
+        for key in [k for k in self.cooldowns if k[0] == camera_id]:
+            until = self.cooldowns.pop(key)
+            if until > now:
+                state[key[1]] = until.isoformat()
+        return state
+
+    def import_camera_state(self, camera_id: str, state: dict) -> None:
+        for rule_id, until in state.items():
+            key = (camera_id, rule_id)
+            until = datetime.fromisoformat(until)
+            if key not in self.cooldowns or self.cooldowns[key] < until:
+                self.cooldowns[key] = until
+
+    def _check_cooldown(self, camera_id: str, rule: AlertRuleModel) -> bool:
+        # Per camera only: a user-wide rule firing on one camera must not silence the others.
+        until = self.cooldowns.get((camera_id, rule.id))
+        if until is None:
             return False
         
-        return datetime.utcnow() < self.cooldowns[rule.id]
+        return datetime.utcnow() < until
 
-    def _update_cooldown(self, rule_id: str, cooldown_seconds: int):
-        self.cooldowns[rule_id] = datetime.utcnow() + timedelta(seconds=cooldown_seconds)
+    def _update_cooldown(self, camera_id: str, rule_id: str, cooldown_seconds: int, stored: bool = False):
+        now = datetime.utcnow()
+        self.cooldowns[(camera_id, rule_id)] = now + timedelta(seconds=cooldown_seconds)
+        if stored and self.rule_store is not None:
+            self.rule_store.record_trigger(rule_id, now)
 
-    def _evaluate_trigger(self, trigger: AlertTrigger, scene: SceneDescriptor) -> bool:
+    def _evaluate_trigger(self, trigger: AlertTrigger, scene: CompactScene) -> bool:
         if trigger.type == "motion":
             return scene.motion
         elif trigger.type == "object_detected":
             if not trigger.object_type:
                 return len(scene.objects) > 0
             
+            type_id = object_type_id(trigger.object_type)
             for obj in scene.objects:
-                if obj.type == trigger.object_type and obj.confidence >= trigger.confidence_threshold:
+                if obj.type_id == type_id and obj.confidence >= trigger.confidence_threshold:
                     return True
             return False
         elif trigger.type == "object_absent":
             if not trigger.object_type:
                 return len(scene.objects) == 0
             
+            type_id = object_type_id(trigger.object_type)
             for obj in scene.objects:
-                if obj.type == trigger.object_type:
+                if obj.type_id == type_id:
                     return False
             return True
         elif trigger.type == "no_motion":
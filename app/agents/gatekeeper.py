@@ -1,6 +1,11 @@
 import re
 from app.agents.base import GatekeeperAgent
 from app.models.message import OutgoingMessage
+from app.services.metrics import STAGE_LATENCY, STAGE_ERRORS, observe_latency
+from app.services.tracing import traced
+
+_GATEKEEPER_LATENCY = STAGE_LATENCY.labels("gatekeeper")
+_GATEKEEPER_ERRORS = STAGE_ERRORS.labels("gatekeeper")
 
 
 class GatekeeperAgentImpl(GatekeeperAgent):
@@ -16,6 +21,8 @@ class GatekeeperAgentImpl(GatekeeperAgent):
         r"the (friend|family|wife|husband|child|son|daughter|mom|dad)",
     ]
 
+    @observe_latency(_GATEKEEPER_LATENCY, _GATEKEEPER_ERRORS)
+    @traced("gatekeeper.validate_response")
     async def validate_response(self, response: OutgoingMessage, context: dict) -> OutgoingMessage:
         if response.text:
             response.text = self._redact_response(response.text)
@@ -1,11 +1,14 @@
 import random
 from datetime import datetime, timedelta
 from app.agents.base import PerceptionAgent
-from app.models.scene import SceneDescriptor, DetectedObject
+from app.config import settings
+from app.models.scene import CompactScene, Detection, SceneDescriptor
+from app.services.sightings import Sighting, SightingIndex, SightingRecorder
+from app.services.timeline import ActivityTimeline, Interval
 
 
 class MockPerceptionAgent(PerceptionAgent):
-    def __init__(self):
+    def __init__(self, sighting_recorder: SightingRecorder | None = None):
         self.scenarios = [
             {"objects": [], "motion": False},
             {"objects": [{"type": "cat", "confidence": 0.92}], "motion": True},
@@ -13,15 +16,22 @@ class MockPerceptionAgent(PerceptionAgent):
             {"objects": [{"type": "dog", "confidence": 0.78}], "motion": True},
             {"objects": [{"type": "person", "confidence": 0.72}, {"type": "cat", "confidence": 0.88}], "motion": True},
         ]
-        self.scene_history: dict[str, list[SceneDescriptor]] = {}
+        self.scene_history: dict[str, list[CompactScene]] = {}
+        self.uploaded: set[str] = set()  # Cameras with real uploads stop getting random scenes
+        self.snapshots: dict[str, str] = {}  # camera_id → URL of its latest stored image
+        self.sightings = SightingIndex(min_confidence=settings.vision_ignore_below, recorder=sighting_recorder)
+        self.timeline = ActivityTimeline(min_confidence=settings.vision_ignore_below)
+
+    async def get_latest_scene(self, camera_id: str) -> CompactScene:
+        if camera_id in self.uploaded:
+            return self.scene_history[camera_id][-1]
 
-    async def get_latest_scene(self, camera_id: str) -> SceneDescriptor:
         scenario = random.choice(self.scenarios)
         
-        scene = SceneDescriptor(
+        scene = CompactScene(
             camera_id=camera_id,
             timestamp=datetime.utcnow(),
-            objects=[DetectedObject(**o) for o in scenario["objects"]],
+            objects=[Detection(**o) for o in scenario["objects"]],
             motion=scenario["motion"],
             motion_score=random.random() if scenario["motion"] else None,
         )
@@ -29,12 +39,68 @@ class MockPerceptionAgent(PerceptionAgent):
         history = self.scene_history.get(camera_id, [])
         history.append(scene)
         self.scene_history[camera_id] = history[-100:]
+        await self.sightings.restore(camera_id)
+        self.sightings.observe(scene)
+        self.timeline.observe(scene)
         
         return scene
 
-    async def get_scene_history(self, camera_id: str, since: datetime) -> list[SceneDescriptor]:
+    async def record_scene(self, scene: CompactScene) -> None:
+        history = self.scene_history.get(scene.camera_id, [])
+        history.append(scene)
+        self.scene_history[scene.camera_id] = history[-100:]
+        self.uploaded.add(scene.camera_id)
+        await self.sightings.restore(scene.camera_id)
+        self.sightings.observe(scene)
+        self.timeline.observe(scene)
+        if scene.snapshot_url:
+            self.snapshots[scene.camera_id] = scene.snapshot_url
+
+    async def last_seen(self, camera_id: str, object_type: str) -> Sighting | None:
+        await self.sightings.restore(camera_id)
+        return self.sightings.get(camera_id, object_type)
+
+    async def activity(self, camera_id: str, since: datetime, until: datetime) -> dict[str, list[Interval]]:
+        return self.timeline.activity(camera_id, since, until)
+
+    async def record_snapshot(self, camera_id: str, url: str) -> None:
+        self.snapshots[camera_id] = url
+
+    async def export_camera_state(self, camera_id: str) -> dict | None:
+        """Remove and return this camera's history and snapshot, for handing it to another worker."""
+        history = self.scene_history.pop(camera_id, None)
+        uploaded = camera_id in self.uploaded
+        self.uploaded.discard(camera_id)
+        snapshot = self.snapshots.pop(camera_id, None)
+        sightings = self.sightings.export_camera(camera_id)
+        timeline = self.timeline.export_camera(camera_id)
+        if not history and not snapshot and not sightings and not timeline:
+            return None
+        return {
+            "scenes": [s.to_descriptor().model_dump(mode="json") for s in history or []],
+            "uploaded": uploaded,
+            "snapshot": snapshot,
+            "sightings": sightings,
+            "timeline": timeline,
+        }
+
+    async def import_camera_state(self, camera_id: str, state: dict) -> None:
+        # Handed-off scenes are older than anything recorded here since the takeover.
+        imported = [CompactScene.from_descriptor(SceneDescriptor.model_validate(s)) for s in state.get("scenes", [])]
+        self.scene_history[camera_id] = (imported + self.scene_history.get(camera_id, []))[-100:]
+        if state.get("uploaded"):
+            self.uploaded.add(camera_id)
+        if state.get("snapshot"):
+            self.snapshots.setdefault(camera_id, state["snapshot"])
+        if state.get("sightings"):
+            self.sightings.import_camera(camera_id, state["sightings"])
+        if state.get("timeline"):
+            self.timeline.import_camera(camera_id, state["timeline"])
+
+    async def get_scene_history(self, camera_id: str, since: datetime) -> list[CompactScene]:
         history = self.scene_history.get(camera_id, [])
         return [s for s in history if s.timestamp >= since]
 
     async def request_snapshot(self, camera_id: str) -> str | None:
-        return f"https://example.com/snapshots/{camera_id}/{datetime.utcnow().timestamp()}.jpg"
+        """URL of the camera's latest stored image; None until it has uploaded one."""
+        return self.snapshots.get(camera_id)
@@ -0,0 +1,232 @@
+from typing import Any
+from app.agents.base import MessageTransport, PerceptionAgent, ConversationAgent, EventAgent, GatekeeperAgent
+from app.models.message import IncomingMessage, OutgoingMessage
+from app.models.scene import CompactScene
+from app.services.conversations import ConversationStore
+from app.services.identity import IdentityCache
+from app.services.log_writer import LogWriter
+from app.services.metrics import QUEUE_DEPTH, STAGE_LATENCY, STAGE_ERRORS, UPLOAD_INTERVAL, observe_latency
+from app.services.rate_control import UploadRateController
+from app.services.tracing import traced
+from app.services.vision import SceneEnhancer
+
+_INGEST_LATENCY = STAGE_LATENCY.labels("scene_ingest")
+_INGEST_ERRORS = STAGE_ERRORS.labels("scene_ingest")
+
+
+class MessagePipeline:
+    """
+    Runs one inbound update through the agents:
+    transport → conversation → gatekeeper → transport.
+
+    With ``identities`` the sender is resolved to a registered user (cached);
+    with a ``log_writer`` each handled turn is also queued for ``audit_log``,
+    and the insert happens in the background, off the request path. With
+    ``conversations``, a resolved user's recent turns are loaded into the
+    context and both sides of the exchange are appended to their history.
+    """
+
+    def __init__(
+        self,
+        transport: MessageTransport,
+        perception: PerceptionAgent,
+        conversation: ConversationAgent,
+        gatekeeper: GatekeeperAgent,
+        camera_id: str = "default",
+        identities: IdentityCache | None = None,
+        log_writer: LogWriter | None = None,
+        conversations: ConversationStore | None = None,
+    ):
+        self.transport = transport
+        self.perception = perception
+        self.conversation = conversation
+        self.gatekeeper = gatekeeper
+        self.camera_id = camera_id
+        self.identities = identities
+        self.log_writer = log_writer
+        self.conversations = conversations
+
+    async def handle(self, raw_payload: Any) -> OutgoingMessage:
+        message = await self.transport.receive(raw_payload)
+        context = await self.build_context(message)
+
+        response = await self.conversation.process(message, context)
+        response = await self.gatekeeper.validate_response(response, context)
+
+        await self.transport.send(str(message.sender_telegram_id), response)
+        user_id = context.get("user_id")
+        if self.conversations is not None and user_id is not None:
+            await self.conversations.append(
+                user_id, "user", message.content or "", message_type=message.type, external_id=str(message.message_id),
+            )
+            await self.conversations.append(user_id, "model", response.text or "", message_type=response.type)
+        if self.log_writer is not None:
+            await self.log_writer.audit(
+                "message.handled",
+                entity_type="telegram_message",
+                details={
+                    "telegram_id": message.sender_telegram_id,
+                    "message_id": message.message_id,
+                    "type": message.type,
+                    "response_type": response.type,
+                },
+            )
+        return response
+
+    async def build_context(self, message: IncomingMessage) -> dict:
+        context = {
+            "camera_id": self.camera_id,
+            "user_name": message.sender_username or "User",
+            "latest_scene": await self.perception.get_latest_scene(self.camera_id),
+        }
+        if self.identities is not None:
+            user = await self.identities.user(message.sender_telegram_id)
+            if user is not None:
+                context["user_id"] = str(user.id)
+                context["user_status"] = user.status
+                if self.conversations is not None:
+                    context["conversation_history"] = await self.conversations.history(context["user_id"])
+        return context
+
+
+class SceneIngestPipeline:
+    """
+    Records an uploaded scene and evaluates alert rules against it. With an
+    ``enhancer``, the uploaded frame may also be queued for the vision model;
+    that happens in the background and never delays the upload. With a
+    ``rate`` controller, each scene also updates the camera's recommended
+    upload interval, using the number of ingests in flight as the load.
+    """
+
+    def __init__(
+        self,
+        perception: PerceptionAgent,
+        events: EventAgent,
+        enhancer: SceneEnhancer | None = None,
+        rate: UploadRateController | None = None,
+    ):
+        self.perception = perception
+        self.events = events
+        self.enhancer = enhancer
+        self.rate = rate
+        self.in_flight = 0
+
+    @observe_latency(_INGEST_LATENCY, _INGEST_ERRORS)
+    @traced("scene.ingest")
+    async def handle(self, scene: CompactScene, context: dict | None = None, frame: bytes | None = None) -> dict | None:
+        context = context or {"camera_id": scene.camera_id}
+        self.in_flight += 1
+        try:
+            await self.perception.record_scene(scene)
+            if frame is not None and self.enhancer is not None:
+                self.enhancer.submit(scene, frame)
+            alert = await self.events.evaluate(scene, context)
+            if self.rate is not None:
+                self.rate.observe(scene, self.events.interest(scene, context), alert is not None, self.in_flight)
+            return alert
+        finally:
+            self.in_flight -= 1
+
+    def upload_interval(self, camera_id: str) -> float | None:
+        """Seconds ``camera_id`` may wait before its next routine upload; None without a controller."""
+        if self.rate is None:
+            return None
+        # Observed here, where the interval goes back to the phone, not on every computation.
+        interval = self.rate.interval(camera_id, self.in_flight)
+        UPLOAD_INTERVAL.observe(interval)
+        return interval
+
+    async def export_camera(self, camera_id: str) -> dict | None:
+        """Remove and return everything held in memory for ``camera_id`` (partition handoff)."""
+        perception = await self.perception.export_camera_state(camera_id)
+        cooldowns = self.events.export_camera_state(camera_id)
+        if self.rate is not None:
+            self.rate.forget(camera_id)
+        if not perception and not cooldowns:
+            return None
+        return {"perception": perception, "cooldowns": cooldowns}
+
+    async def import_camera(self, camera_id: str, state: dict) -> None:
+        if state.get("perception"):
+            await self.perception.import_camera_state(camera_id, state["perception"])
+        self.events.import_camera_state(camera_id, state.get("cooldowns") or {})
+
+
+_perception: PerceptionAgent | None = None
+_pipeline: MessagePipeline | None = None
+_ingest: SceneIngestPipeline | None = None
+
+
+def get_perception() -> PerceptionAgent:
+    global _perception
+    if _perception is None:
+        from app.agents.perception import MockPerceptionAgent
+        from app.config import settings
+        from app.services.sightings import get_sighting_recorder
+
+        _perception = MockPerceptionAgent(
+            sighting_recorder=get_sighting_recorder() if settings.sightings_persist_enabled else None,
+        )
+    return _perception
+
+
+def get_pipeline() -> MessagePipeline:
+    """Build the agent pipeline for the configured transport on first use."""
+    global _pipeline
+    if _pipeline is None:
+        from app.agents.communication import get_transport
+        from app.agents.conversation import ConversationAgentImpl
+        from app.agents.gatekeeper import GatekeeperAgentImpl
+        from app.config import settings
+        from app.services.conversations import get_conversation_store
+        from app.services.identity import get_identity_cache
+        from app.services.log_writer import get_log_writer
+
+        perception = get_perception()
+        _pipeline = MessagePipeline(
+            transport=get_transport(),
+            perception=perception,
+            conversation=ConversationAgentImpl(perception),
+            gatekeeper=GatekeeperAgentImpl(),
+            identities=get_identity_cache() if settings.resolve_identities else None,
+            log_writer=get_log_writer() if settings.audit_log_enabled else None,
+            # Histories belong to registered users, so they come with identity resolution.
+            conversations=(
+                get_conversation_store()
+                if settings.conversation_history_enabled and settings.resolve_identities
+                else None
+            ),
+        )
+    return _pipeline
+
+
+def get_ingest() -> SceneIngestPipeline:
+    global _ingest
+    if _ingest is None:
+        from app.agents.event import EventAgentImpl
+        from app.config import settings
+        from app.services.rule_store import get_rule_store
+        from app.services.vision import get_enhancer
+
+        # Per-user rules need the resolved user, so they come with identity resolution.
+        rule_store = get_rule_store() if settings.resolve_identities else None
+        enhancer = get_enhancer() if settings.vision_enhancement_enabled else None
+        rate = UploadRateController(
+            min_interval=settings.upload_interval_min_seconds,
+            max_interval=settings.upload_interval_max_seconds,
+            overload_interval=settings.upload_interval_overload_seconds,
+            half_life=settings.upload_activity_half_life_seconds,
+            alert_hold=settings.upload_alert_hold_seconds,
+            capacity=settings.ingest_capacity,
+        )
+        _ingest = SceneIngestPipeline(get_perception(), EventAgentImpl(rule_store=rule_store), enhancer, rate)
+        QUEUE_DEPTH.labels("scene_ingest").set_function(lambda: _ingest.in_flight if _ingest else 0)
+    return _ingest
+
+
+def reset() -> None:
+    """Drop the shared agents so they are rebuilt from current settings (tests, load harness)."""
+    global _perception, _pipeline, _ingest
+    _perception = None
+    _pipeline = None
+    _ingest = None
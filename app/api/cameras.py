@@ -0,0 +1,163 @@
+from typing import AsyncIterable, Literal, Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from app.agents.pipeline import get_ingest, get_perception
+from app.config import settings
+from app.models.scene import CompactScene, SceneUpload
+from app.services.heartbeats import get_heartbeats
+from app.services.identity import get_identity_cache
+from app.services.metrics import SCENE_ROUTING
+from app.services.partitioning import FORWARDED_HEADER, get_partitioner
+from app.services.snapshots import SnapshotStore, SnapshotTooLarge, get_snapshot_store, is_digest
+from app.worker import enqueue
+
+_ROUTED_LOCAL = SCENE_ROUTING.labels("local")
+
+router = APIRouter()
+
+
+# Declared response models let FastAPI serialize straight to JSON bytes with
+# pydantic-core instead of going through jsonable_encoder and json.dumps.
+class AlertSummary(BaseModel):
+    rule_id: str
+    rule_name: str
+    severity: str
+
+
+class SceneAccepted(BaseModel):
+    status: Literal["accepted"] = "accepted"
+    camera_id: str
+    upload_interval_seconds: Optional[float] = None
+    alert: Optional[AlertSummary] = None
+
+
+class HeartbeatAck(BaseModel):
+    status: Literal["ok"] = "ok"
+    camera_id: str
+    upload_interval_seconds: Optional[float] = None
+
+
+async def _route(camera_id: str, request: Request, body: dict | bytes) -> JSONResponse | None:
+    """Forward to the worker that owns ``camera_id``; None means handle it here."""
+    if settings.partitioning_enabled:
+        partitioner = get_partitioner()
+        owner_url = partitioner.owner_url(camera_id)
+        # Forwarded uploads are always handled where they land, so a disagreement
+        # about membership during a rebalance cannot bounce a request around.
+        if owner_url and FORWARDED_HEADER not in request.headers:
+            forwarded = await partitioner.forward(
+                owner_url, request.url.path, body, request.headers.get("content-type", "application/octet-stream"),
+            )
+            if forwarded is not None:
+                status_code, content = forwarded
+                return JSONResponse(status_code=status_code, content=content)
+        await partitioner.claim(camera_id)
+    _ROUTED_LOCAL.inc()
+    return None
+
+
+async def _context(camera_id: str) -> dict:
+    context = {"camera_id": camera_id}
+    if settings.resolve_identities:
+        camera = await get_identity_cache().camera(camera_id)
+        if camera is None or not camera.is_active:
+            raise HTTPException(status_code=404, detail="Unknown camera")
+        context["user_id"] = str(camera.user_id)
+        context["camera_uuid"] = str(camera.id)
+        # Any upload shows the phone is alive.
+        get_heartbeats().beat(context["camera_uuid"])
+    return context
+
+
+@router.post("/{camera_id}/scenes", response_model=SceneAccepted)
+async def upload_scene(camera_id: str, upload: SceneUpload, request: Request):
+    """Phone → server scene descriptor upload."""
+    forwarded = await _route(camera_id, request, upload.model_dump(mode="json"))
+    if forwarded is not None:
+        return forwarded
+    context = await _context(camera_id)
+
+    scene = CompactScene.from_upload(camera_id, upload)
+    if upload.frame:
+        store = get_snapshot_store()
+        stored = await store.put(upload.frame)
+        scene.frame_hash = stored.hash
+        scene.snapshot_url = store.url(stored.hash)
+    ingest = get_ingest()
+    alert = await ingest.handle(scene, context, frame=upload.frame)
+
+    return SceneAccepted(
+        camera_id=camera_id,
+        upload_interval_seconds=ingest.upload_interval(camera_id),
+        alert=AlertSummary(
+            rule_id=alert["rule_id"],
+            rule_name=alert["rule_name"],
+            severity=alert["severity"],
+        ) if alert else None,
+    )
+
+
+@router.post("/{camera_id}/heartbeat", response_model=HeartbeatAck)
+async def heartbeat(camera_id: str, request: Request):
+    """Phone → server keep-alive while nothing is uploaded; returns the current upload interval."""
+    forwarded = await _route(camera_id, request, {})
+    if forwarded is not None:
+        return forwarded
+    await _context(camera_id)
+    return HeartbeatAck(camera_id=camera_id, upload_interval_seconds=get_ingest().upload_interval(camera_id))
+
+
+async def _read_snapshot(request: Request, max_bytes: int) -> bytes:
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Snapshot exceeds {max_bytes} bytes")
+    return bytes(data)
+
+
+async def _store_snapshot(store: SnapshotStore, body: AsyncIterable[bytes] | bytes) -> tuple[str, int, bool]:
+    try:
+        stored = await (store.put(body) if isinstance(body, bytes) else store.put_stream(body))
+    except SnapshotTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if stored.created:
+        # Snapshots are likely to be sent to someone; render variants ahead of time.
+        await enqueue("snapshots.render_variants", stored.hash, dedup_key=stored.hash)
+    return stored.hash, stored.size, stored.created
+
+
+@router.post("/{camera_id}/snapshots")
+async def upload_snapshot(camera_id: str, request: Request):
+    """
+    Phone → server snapshot upload. The body is the JPEG itself and is streamed
+    into the snapshot store. A JSON ``{"hash": ...}`` body instead refers to an
+    image that is already stored; workers use it to forward an upload to the
+    camera's owner without sending the image again. That needs a shared store:
+    with local storage the upload is routed first and the owner sent the image.
+    """
+    await _context(camera_id)
+    store = get_snapshot_store()
+    if request.headers.get("content-type", "").startswith("application/json"):
+        digest = (await request.json()).get("hash", "")
+        if not is_digest(digest) or not await store.exists(digest):
+            raise HTTPException(status_code=404, detail="Snapshot not found")
+        size = created = None
+        forwarded = await _route(camera_id, request, {"hash": digest})
+    elif store.shared or not settings.partitioning_enabled:
+        digest, size, created = await _store_snapshot(store, request.stream())
+        forwarded = await _route(camera_id, request, {"hash": digest})
+    else:
+        # The owner cannot read this worker's disk, so it is sent the image itself.
+        data = await _read_snapshot(request, store.max_bytes)
+        forwarded = await _route(camera_id, request, data)
+        if forwarded is None:
+            digest, size, created = await _store_snapshot(store, data)
+    if forwarded is not None:
+        return forwarded
+    url = store.url(digest)
+    await get_perception().record_snapshot(camera_id, url)
+    return {"status": "accepted", "camera_id": camera_id, "hash": digest, "url": url, "size": size, "created": created}
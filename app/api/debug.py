@@ -0,0 +1,36 @@
+import asyncio
+import secrets
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.config import settings
+from app.services import profiler
+
+router = APIRouter()
+
+
+def _check_token(token: str | None) -> None:
+    # Debug endpoints do not exist unless a token is configured.
+    if not settings.debug_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not secrets.compare_digest(token, settings.debug_token):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(5.0, gt=0, le=60),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    x_debug_token: str | None = Header(default=None),
+):
+    """
+    Sample all thread stacks for ``seconds`` and return them in folded-stack
+    format, ready for flamegraph.pl / speedscope.
+    """
+    _check_token(x_debug_token)
+
+    try:
+        stacks = await asyncio.to_thread(profiler.sample, seconds, interval_ms / 1000)
+    except profiler.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return PlainTextResponse(profiler.to_folded(stacks))
@@ -0,0 +1,76 @@
+import uuid
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.event import Event
+from app.services import event_store
+from app.services.storage import get_db
+
+router = APIRouter()
+
+
+class EventPage(BaseModel):
+    events: list[Event]
+    next_cursor: Optional[str] = None
+
+
+class Acknowledgement(BaseModel):
+    user_id: uuid.UUID
+    response: Optional[Literal["viewed", "ignored", "escalated"]] = None
+
+
+def _to_schema(row) -> Event:
+    return Event(
+        id=str(row.id),
+        camera_id=str(row.camera_id),
+        user_id=str(row.user_id),
+        scene_id=str(row.scene_id) if row.scene_id else None,
+        event_type=row.event_type,
+        severity=row.severity or "medium",
+        title=row.title,
+        description=row.description,
+        metadata=row.metadata_ or {},
+        acknowledged=row.acknowledged,
+        acknowledged_at=row.acknowledged_at,
+        response=row.response,
+        created_at=row.created_at,
+    )
+
+
+@router.get("", response_model=EventPage)
+async def list_events(
+    user_id: uuid.UUID,
+    camera_id: Optional[uuid.UUID] = None,
+    severity: Optional[Literal["low", "medium", "high"]] = None,
+    acknowledged: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+):
+    """Newest-first event history; pass ``next_cursor`` back as ``?cursor=`` for the next page."""
+    try:
+        rows, next_cursor = await event_store.list_events(
+            db, user_id,
+            camera_id=camera_id, severity=severity, acknowledged=acknowledged,
+            cursor=cursor, limit=limit,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return EventPage(events=[_to_schema(row) for row in rows], next_cursor=next_cursor)
+
+
+@router.get("/unacknowledged_count")
+async def unacknowledged_count(user_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    count = await event_store.unacknowledged_count(db, user_id)
+    if count is None:
+        raise HTTPException(status_code=404, detail="Unknown user")
+    return {"user_id": str(user_id), "unacknowledged": count}
+
+
+@router.post("/{event_id}/acknowledge")
+async def acknowledge_event(event_id: uuid.UUID, body: Acknowledgement, db: AsyncSession = Depends(get_db)):
+    if not await event_store.acknowledge(db, body.user_id, event_id, body.response):
+        raise HTTPException(status_code=404, detail="No unacknowledged event with that id")
+    return {"status": "acknowledged", "event_id": str(event_id)}
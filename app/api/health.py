@@ -1,9 +1,30 @@
+import asyncio
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from app.config import settings
+from app.services import storage, redis_client
 
 router = APIRouter()
 
 
+async def _probe(probe, pool_stats) -> tuple[bool, dict]:
+    """Run a round-trip probe under the health timeout, attaching pool counters."""
+    try:
+        result = await asyncio.wait_for(probe(), timeout=settings.health_probe_timeout_seconds)
+        healthy, body = True, {"status": "healthy", **result}
+    except asyncio.TimeoutError:
+        healthy, body = False, {"status": "unhealthy", "error": "timeout"}
+    except Exception as e:
+        # Only the exception type: messages can embed the DSN.
+        healthy, body = False, {"status": "unhealthy", "error": type(e).__name__}
+    body["pool"] = pool_stats()
+    return healthy, body
+
+
+def _respond(healthy: bool, body: dict) -> JSONResponse:
+    return JSONResponse(status_code=200 if healthy else 503, content=body)
+
+
 @router.get("/")
 async def health_check():
     return {"status": "healthy", "environment": settings.app_env}
@@ -11,9 +32,36 @@ async def health_check():
 
 @router.get("/db")
 async def db_check():
-    return {"status": "healthy", "database": settings.database_url}
+    healthy, body = await _probe(storage.probe_database, storage.pool_stats)
+    return _respond(healthy, body)
 
 
 @router.get("/redis")
 async def redis_check():
-    return {"status": "healthy", "redis": settings.redis_url}
+    healthy, body = await _probe(redis_client.probe_redis, redis_client.pool_stats)
+    return _respond(healthy, body)
+
+
+@router.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe for the load balancer.
+
+    Fails fast (without touching the network) when a connection pool is already
+    exhausted, since any probe would just queue behind saturated traffic.
+    """
+    pools = {"database": storage.pool_stats(), "redis": redis_client.pool_stats()}
+    exhausted = [name for name, stats in pools.items() if stats.get("exhausted")]
+    if exhausted:
+        return _respond(False, {"status": "unavailable", "reason": "pool_exhausted", "pools": exhausted})
+
+    (db_ok, db), (redis_ok, redis) = await asyncio.gather(
+        _probe(storage.probe_database, storage.pool_stats),
+        _probe(redis_client.probe_redis, redis_client.pool_stats),
+    )
+    healthy = db_ok and redis_ok
+    return _respond(healthy, {
+        "status": "ready" if healthy else "unavailable",
+        "database": db,
+        "redis": redis,
+    })
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from app.services.metrics import REGISTRY, CONTENT_TYPE
+
+router = APIRouter()
+
+
+@router.get("")
+async def metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException
+import json
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
+from app.config import settings
+from app.services.metrics import QUEUE_DEPTH
+from app.services.outbox import MessageOutbox
 
 router = APIRouter()
 
@@ -21,12 +26,13 @@ class MockOutgoingMessage(BaseModel):
     buttons: Optional[list[dict]] = None
 
 
-mock_message_queue: list[MockOutgoingMessage] = []
+mock_outbox = MessageOutbox(capacity=settings.mock_outbox_capacity)
+QUEUE_DEPTH.labels("mock_outbox").set_function(lambda: len(mock_outbox))
 
 
 @router.post("/send")
 async def mock_send_message(message: MockIncomingMessage):
-    message_id = f"msg_{len(mock_message_queue)}"
+    message_id = f"msg_{mock_outbox.last_seq}"
     
     return {
         "status": "processed",
@@ -35,12 +41,59 @@ async def mock_send_message(message: MockIncomingMessage):
     }
 
 
+def _page(messages: list[dict], after: int) -> dict:
+    return {
+        "messages": messages,
+        # Pass back as ?after= to continue; unchanged when the page is empty.
+        "next_cursor": messages[-1]["seq"] if messages else after,
+        "latest_seq": mock_outbox.last_seq,
+    }
+
+
 @router.get("/messages")
-async def get_mock_messages():
-    return {"messages": mock_message_queue}
+async def get_mock_messages(
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    user_id: Optional[str] = None,
+):
+    return _page(mock_outbox.read(after, limit, user_id), after)
+
+
+@router.get("/messages/poll")
+async def poll_mock_messages(
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    user_id: Optional[str] = None,
+    timeout: float = Query(25.0, ge=0, le=60),
+):
+    """Long-poll: returns as soon as a message newer than ``after`` exists, or empty after ``timeout``."""
+    return _page(await mock_outbox.wait(after, limit, user_id, timeout), after)
+
+
+@router.get("/messages/stream")
+async def stream_mock_messages(
+    after: int = Query(0, ge=0),
+    user_id: Optional[str] = None,
+    last_event_id: Optional[int] = Header(default=None),
+):
+    """Server-sent events, one per outgoing message; reconnects resume from Last-Event-ID."""
+    cursor = last_event_id if last_event_id is not None else after
+
+    async def events():
+        nonlocal cursor
+        while True:
+            messages = await mock_outbox.wait(cursor, 100, user_id, timeout=15.0)
+            if not messages:
+                yield ": keep-alive\n\n"
+                continue
+            for message in messages:
+                yield f"id: {message['seq']}\ndata: {json.dumps(message)}\n\n"
+            cursor = messages[-1]["seq"]
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 
 @router.delete("/messages")
 async def clear_mock_messages():
-    mock_message_queue.clear()
-    return {"status": "cleared", "count": 0}
+    count = mock_outbox.clear()
+    return {"status": "cleared", "count": count}
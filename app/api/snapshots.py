@@ -0,0 +1,69 @@
+import logging
+import mmap
+from pathlib import Path
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import RedirectResponse, Response
+from starlette.types import Receive, Scope, Send
+from app.services.images import get_image_processor
+from app.services.snapshots import CHUNK_SIZE, CONTENT_TYPE, IMMUTABLE, get_snapshot_store, is_digest
+from app.utils.imaging import VARIANTS
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class MmapFileResponse(Response):
+    """
+    Sends a file as slices of a read-only memory map, so the body goes from the
+    page cache to the socket without being copied into Python bytes first.
+    """
+
+    def __init__(self, path: Path, headers: dict[str, str] | None = None, media_type: str = CONTENT_TYPE):
+        self.path = path
+        self.status_code = 200
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-length"] = str(path.stat().st_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        with open(self.path, "rb") as file:
+            # The map keeps its own handle. It is not closed explicitly because the
+            # transport may still hold slices of it; it is unmapped once they are released.
+            view = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] != "HEAD":
+            for offset in range(0, len(view), CHUNK_SIZE):
+                await send({"type": "http.response.body", "body": view[offset:offset + CHUNK_SIZE], "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+@router.api_route("/{digest}", methods=["GET", "HEAD"])
+async def get_snapshot(digest: str, request: Request, variant: str | None = None):
+    """The stored image, or with ``?variant=`` a resized copy (rendered on first request)."""
+    if not is_digest(digest) or (variant is not None and variant not in VARIANTS):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    # The hash is the content, so the ETag never changes.
+    etag = f'"{digest}.{variant}"' if variant else f'"{digest}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"etag": etag, "cache-control": IMMUTABLE})
+
+    store = get_snapshot_store()
+    headers = {"etag": etag, "cache-control": IMMUTABLE}
+    if variant:
+        try:
+            ready = await get_image_processor().ensure_variants(digest)
+        except Exception as e:
+            logger.warning("Rendering variants of %s failed (%s); serving the original", digest, type(e).__name__)
+            ready = False
+        if not ready:
+            # Not cacheable as the variant: a later request should get the real one.
+            variant, headers = None, {"etag": f'"{digest}"', "cache-control": "no-cache"}
+
+    location = await store.locate(digest, variant)
+    if location is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    if isinstance(location, Path):
+        return MmapFileResponse(location, headers=headers)
+    return RedirectResponse(location, status_code=307)
@@ -1,5 +1,11 @@
+import logging
 from fastapi import APIRouter, Request, HTTPException
 from app.config import settings
+from app.agents.pipeline import get_pipeline
+from app.services.telegram_updates import decode_update
+from app.services.tracing import span
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -18,21 +24,26 @@ async def telegram_webhook(request: Request):
     if settings.transport == "mock":
         return {"status": "mock mode - use /api/v1/mock/send instead"}
 
-    payload = await request.json()
-
-    # TODO: Validate webhook secret if configured
-    # if settings.telegram_webhook_secret:
-    #     # Verify X-Telegram-Bot-Api-Secret-Token header
-    #     secret_header = request.headers.get("X-Telegram-Bot-Api-Secret-Token")
-    #     if secret_header != settings.telegram_webhook_secret:
-    #         raise HTTPException(status_code=403, detail="Invalid webhook secret")
-
-    # TODO: Process the Telegram update
-    # This is where we'd integrate with the Communication Agent:
-    # 1. Parse Update using TelegramTransport.receive(payload)
-    # 2. Pass to Conversation Agent
-    # 3. Get response from agents
-    # 4. Send back via TelegramTransport.send()
+    if settings.telegram_webhook_secret:
+        secret_header = request.headers.get("X-Telegram-Bot-Api-Secret-Token")
+        if secret_header != settings.telegram_webhook_secret:
+            raise HTTPException(status_code=403, detail="Invalid webhook secret")
+
+    # Decoded once, from the raw body; the transport reuses the result.
+    try:
+        update = decode_update(await request.body())
+    except ValueError as e:
+        logger.warning(f"Ignoring malformed Telegram update: {e}")
+        return {"status": "ignored", "update_id": None}
+    update_id = update.update_id
+
+    with span("telegram.update", update_id=update_id or 0):
+        try:
+            await get_pipeline().handle(update)
+        except ValueError as e:
+            # Unsupported or malformed updates are acknowledged so Telegram
+            # does not keep redelivering them.
+            logger.warning(f"Ignoring Telegram update {update_id}: {e}")
+            return {"status": "ignored", "update_id": update_id}
 
-    update_id = payload.get("update_id")
     return {"status": "received", "update_id": update_id}
@@ -1,17 +1,65 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.config import settings
-from app.api import health, webhooks, mock
+from app.api import health, webhooks, mock, metrics, debug, cameras, events, snapshots
+from app.services.storage import dispose_engines
+from app.services.redis_client import close_redis
+from app.services.log_writer import close_log_writer
+from app.services.identity import close_identity_cache
+from app.services.rule_store import close_rule_store
+from app.services.heartbeats import close_heartbeats
+from app.services.sightings import close_sighting_recorder
+from app.services.partitioning import close_partitioner, get_partitioner
+from app.services.vision import close_enhancer
+from app.services.images import close_image_processor
+from app.services.gemini import close_llm
+from app.services.tracing import flush_traces
+from app.worker.dispatch import close_dispatcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy clients (DB engines, Gemini, Telegram) are created lazily on first
+    # use; shutdown only has to release whatever was actually opened.
+    if settings.partitioning_enabled:
+        # Join the ring before serving so peers can route this worker's cameras to it.
+        await get_partitioner().start()
+    yield
+    # Hand owned cameras to the remaining workers before anything else closes.
+    await close_partitioner()
+    # Batched frames become vision tasks, so they go before the dispatcher drains.
+    await close_enhancer()
+    # In-process tasks may still write logs or use the engine.
+    await close_dispatcher()
+    await close_image_processor()
+    close_llm()
+    # Flush queued log rows while the engine is still available.
+    await close_log_writer()
+    await close_identity_cache()
+    await close_rule_store()
+    await close_heartbeats()
+    await close_sighting_recorder()
+    await dispose_engines()
+    await close_redis()
+    await flush_traces()
+
 
 app = FastAPI(
     title=settings.app_name,
     description="WhatsApp-first conversational surveillance system",
     version="0.1.0",
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
 app.include_router(health.router, prefix="/health", tags=["health"])
 app.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
 app.include_router(mock.router, prefix="/api/v1/mock", tags=["mock"])
+app.include_router(cameras.router, prefix="/api/v1/cameras", tags=["cameras"])
+app.include_router(events.router, prefix="/api/v1/events", tags=["events"])
+app.include_router(snapshots.router, prefix="/api/v1/snapshots", tags=["snapshots"])
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+app.include_router(debug.router, prefix="/debug", tags=["debug"], include_in_schema=False)
 
 
 @app.get("/")
@@ -1,7 +1,7 @@
 from app.models.user import User, Camera, Scene, Event as DBEvent, AlertRule, Conversation, Message, AuditLog
-from app.models.scene import DetectedObject, SceneDescriptor, UserIntent
+from app.models.scene import CompactScene, Detection, DetectedObject, SceneDescriptor, SceneUpload, UserIntent
 from app.models.event import AlertTrigger, AlertCondition, AlertRule as AlertRuleModel, Event, DEFAULT_RULES
-from app.models.message import IncomingMessage, OutgoingMessage, QuickReplyButton
+from app.models.message import IncomingMessage, OutgoingMessage, InlineKeyboardButton
 
 __all__ = [
     "User",
@@ -12,8 +12,11 @@ __all__ = [
     "Conversation",
     "Message",
     "AuditLog",
+    "CompactScene",
+    "Detection",
     "DetectedObject",
     "SceneDescriptor",
+    "SceneUpload",
     "UserIntent",
     "AlertTrigger",
     "AlertCondition",
@@ -22,5 +25,5 @@ __all__ = [
     "DEFAULT_RULES",
     "IncomingMessage",
     "OutgoingMessage",
-    "QuickReplyButton",
+    "InlineKeyboardButton",
 ]
@@ -1,6 +1,7 @@
+import sys
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Iterable, Optional
+from pydantic import Base64Bytes, BaseModel, Field
 from typing import Literal
 
 
@@ -10,6 +11,13 @@ class DetectedObject(BaseModel):
     bbox: Optional[list[int]] = None  # [x1, y1, x2, y2]
 
 
+class SceneEnhancement(BaseModel):
+    """What the vision model saw in the frame, next to the on-device detections."""
+    description: str
+    objects: list[DetectedObject] = Field(default_factory=list)
+    reason: str  # Why the frame was escalated: "new_object" or "ambiguous"
+
+
 class SceneDescriptor(BaseModel):
     camera_id: str
     timestamp: datetime
@@ -17,7 +25,145 @@ class SceneDescriptor(BaseModel):
     motion: bool = False
     motion_score: Optional[float] = None
     snapshot_url: Optional[str] = None
+    frame_hash: Optional[str] = None  # sha256 of the uploaded frame
     enhanced: bool = False
+    enhancement: Optional[SceneEnhancement] = None
+
+
+class SceneUpload(BaseModel):
+    """Scene descriptor as uploaded by a camera phone; the camera comes from the URL."""
+    timestamp: datetime
+    objects: list[DetectedObject] = Field(default_factory=list)
+    motion: bool = False
+    motion_score: Optional[float] = None
+    frame: Optional[Base64Bytes] = None  # Small JPEG; only sent to the vision model if escalated
+
+
+# Compact scenes for the ingest and rule paths. Pydantic models are for the API
+# boundaries; a scene that is recorded, evaluated and kept in history is a
+# CompactScene. Object types are interned to small integer ids, so rules compare
+# ints, and each type name is stored once per process. Types come from phones and
+# the vision model, so the table is capped: past MAX_OBJECT_TYPES distinct names,
+# or for names longer than MAX_OBJECT_TYPE_LENGTH, a detection becomes "unknown".
+
+MAX_OBJECT_TYPES = 1024
+MAX_OBJECT_TYPE_LENGTH = 64
+UNKNOWN_OBJECT_TYPE = "unknown"
+
+_TYPE_IDS: dict[str, int] = {UNKNOWN_OBJECT_TYPE: 0}
+_TYPE_NAMES: list[str] = [UNKNOWN_OBJECT_TYPE]
+
+
+def intern_object_type(name: str) -> int:
+    type_id = _TYPE_IDS.get(name)
+    if type_id is None:
+        if len(_TYPE_NAMES) >= MAX_OBJECT_TYPES or len(name) > MAX_OBJECT_TYPE_LENGTH:
+            return 0
+        type_id = _TYPE_IDS[name] = len(_TYPE_NAMES)
+        _TYPE_NAMES.append(sys.intern(name))
+    return type_id
+
+
+def object_type_id(name: str) -> int | None:
+    """The id of ``name`` if any detection has used it; None means nothing can match it."""
+    return _TYPE_IDS.get(name)
+
+
+class Detection:
+    __slots__ = ("type_id", "confidence", "bbox")
+
+    def __init__(self, type: str, confidence: float, bbox: Optional[list[int]] = None):
+        self.type_id = intern_object_type(type)
+        self.confidence = confidence
+        self.bbox = bbox
+
+    @property
+    def type(self) -> str:
+        return _TYPE_NAMES[self.type_id]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Detection):
+            return NotImplemented
+        return (self.type_id, self.confidence, self.bbox) == (other.type_id, other.confidence, other.bbox)
+
+    def __repr__(self) -> str:
+        return f"Detection(type={self.type!r}, confidence={self.confidence!r})"
+
+
+class CompactScene:
+    """A :class:`SceneDescriptor` with slots and interned object types; same fields, same names."""
+
+    __slots__ = (
+        "camera_id", "timestamp", "objects", "motion", "motion_score",
+        "snapshot_url", "frame_hash", "enhanced", "enhancement",
+    )
+
+    def __init__(
+        self,
+        camera_id: str,
+        timestamp: datetime,
+        objects: Iterable[Detection] = (),
+        motion: bool = False,
+        motion_score: Optional[float] = None,
+        snapshot_url: Optional[str] = None,
+        frame_hash: Optional[str] = None,
+        enhanced: bool = False,
+        enhancement: Optional[SceneEnhancement] = None,
+    ):
+        self.camera_id = camera_id
+        self.timestamp = timestamp
+        self.objects = tuple(objects)
+        self.motion = motion
+        self.motion_score = motion_score
+        self.snapshot_url = snapshot_url
+        self.frame_hash = frame_hash
+        self.enhanced = enhanced
+        self.enhancement = enhancement
+
+    @classmethod
+    def from_upload(cls, camera_id: str, upload: SceneUpload) -> "CompactScene":
+        return cls(
+            camera_id,
+            upload.timestamp,
+            [Detection(o.type, o.confidence, o.bbox) for o in upload.objects],
+            upload.motion,
+            upload.motion_score,
+        )
+
+    @classmethod
+    def from_descriptor(cls, scene: SceneDescriptor) -> "CompactScene":
+        return cls(
+            scene.camera_id,
+            scene.timestamp,
+            [Detection(o.type, o.confidence, o.bbox) for o in scene.objects],
+            scene.motion,
+            scene.motion_score,
+            scene.snapshot_url,
+            scene.frame_hash,
+            scene.enhanced,
+            scene.enhancement,
+        )
+
+    def to_descriptor(self) -> SceneDescriptor:
+        return SceneDescriptor(
+            camera_id=self.camera_id,
+            timestamp=self.timestamp,
+            objects=[DetectedObject(type=o.type, confidence=o.confidence, bbox=o.bbox) for o in self.objects],
+            motion=self.motion,
+            motion_score=self.motion_score,
+            snapshot_url=self.snapshot_url,
+            frame_hash=self.frame_hash,
+            enhanced=self.enhanced,
+            enhancement=self.enhancement,
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompactScene):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"CompactScene(camera_id={self.camera_id!r}, timestamp={self.timestamp!r}, objects={list(self.objects)!r})"
 
 
 class UserIntent(str):
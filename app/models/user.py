@@ -1,11 +1,12 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, String, Boolean, DateTime, JSON, Integer, Float, ForeignKey, Text, BigInteger
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, DateTime, JSON, Integer, Float, ForeignKey, Text, BigInteger, Index, false
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 import uuid
 
 from app.services.storage import Base
+from app.utils.ids import uuid7
 
 
 class User(Base):
@@ -19,6 +20,7 @@ class User(Base):
     status = Column(String(20), default="home")  # 'home', 'away', 'dnd'
     timezone = Column(String(50), default="UTC")
     settings = Column(JSON, default={})
+    unacknowledged_events = Column(Integer, nullable=False, default=0, server_default="0")  # Maintained by a trigger on events
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -50,7 +52,7 @@ class Camera(Base):
 class Scene(Base):
     __tablename__ = "scenes"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     camera_id = Column(UUID(as_uuid=True), ForeignKey("cameras.id", ondelete="CASCADE"), nullable=False, index=True)
     captured_at = Column(DateTime(timezone=True), nullable=False)
     received_at = Column(DateTime(timezone=True), default=datetime.utcnow)
@@ -69,24 +71,37 @@ class Scene(Base):
 class Event(Base):
     __tablename__ = "events"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     camera_id = Column(UUID(as_uuid=True), ForeignKey("cameras.id", ondelete="CASCADE"), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     scene_id = Column(UUID(as_uuid=True), ForeignKey("scenes.id", ondelete="SET NULL"))
     event_type = Column(String(50), nullable=False)
     severity = Column(String(20), default="medium")  # 'low', 'medium', 'high'
     title = Column(String(200))
     description = Column(Text)
-    metadata = Column(JSON, default={})
-    acknowledged = Column(Boolean, default=False, index=True)
+    metadata_ = Column("metadata", JSON, default={})
+    acknowledged = Column(Boolean, nullable=False, default=False, server_default=false())
     acknowledged_at = Column(DateTime(timezone=True))
     response = Column(String(50))  # 'viewed', 'ignored', 'escalated'
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
 
     camera = relationship("Camera", back_populates="events")
     user = relationship("User", back_populates="events")
     scene = relationship("Scene", back_populates="events")
 
+    # History is always read newest first, per user, with (created_at, id) as the
+    # keyset cursor; see app.services.event_store.
+    __table_args__ = (
+        # No INCLUDE columns: the history query reads whole rows, so it visits the heap anyway.
+        Index("ix_events_user_created", "user_id", created_at.desc(), id.desc()),
+        Index("ix_events_user_camera_created", "user_id", "camera_id", created_at.desc(), id.desc()),
+        Index(
+            "ix_events_user_unacknowledged",
+            "user_id", created_at.desc(), id.desc(),
+            postgresql_where=acknowledged == false(),
+        ),
+    )
+
 
 class AlertRule(Base):
     __tablename__ = "alert_rules"
@@ -115,33 +130,43 @@ class Conversation(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     started_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     last_message_at = Column(DateTime(timezone=True), default=datetime.utcnow)
-    context = Column(JSON, default={})
+    # Bounded snapshot of recent turns; the full history is the messages rows.
+    # See app.services.conversations.
+    context = Column(JSONB, nullable=False, default=dict, server_default="{}")
     is_active = Column(Boolean, default=True, index=True)
 
     user = relationship("User", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_conversations_user_active", "user_id", last_message_at.desc(), postgresql_where=is_active),
+        {"postgresql_with": {"fillfactor": 90}},
+    )
+
 
 class Message(Base):
     __tablename__ = "messages"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    conversation_id = Column(UUID(as_uuid=True), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    conversation_id = Column(UUID(as_uuid=True), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     direction = Column(String(10), nullable=False)  # 'inbound', 'outbound'
     content = Column(Text, nullable=False)
     message_type = Column(String(20), default="text")  # 'text', 'image', 'interactive'
     external_id = Column(String(100), index=True)
     intent = Column(String(50))
-    metadata = Column(JSON, default={})
+    metadata_ = Column("metadata", JSON, default={})
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
 
     conversation = relationship("Conversation", back_populates="messages")
 
+    # The turns after a conversation's snapshot are read in id (= time) order.
+    __table_args__ = (Index("ix_messages_conversation_tail", "conversation_id", id),)
+
 
 class AuditLog(Base):
     __tablename__ = "audit_log"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), index=True)
     action = Column(String(100), nullable=False)
     entity_type = Column(String(50))
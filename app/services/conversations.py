@@ -0,0 +1,264 @@
+"""
+Conversation history as an append-only turn log plus a bounded snapshot.
+
+Every turn is one new ``messages`` row, queued on the log writer. Existing rows
+are never rewritten. Every ``checkpoint_every`` turns, ``conversations.context``
+is patched in place (``context || patch``, JSONB) with the last ``keep_turns``
+turns and the id of the newest turn they include. So each message costs one
+small insert, plus a fixed-size update every few turns, however long the chat
+gets. Loading a conversation reads the snapshot and the turns after it. Message
+ids are UUIDv7, so "after" is an index range scan on ``(conversation_id, id)``.
+
+Loaded state is cached per user for ``cache_ttl`` seconds, so a chat that is in
+progress does not touch the database on its read path. A cached state can be
+stale when the user's turns go through more than one worker, so a checkpoint
+only lands if the snapshot is still the one the state was built on and the log
+holds no turns the state has not seen. Otherwise the state is dropped and
+reloaded on the next turn. Turns still queued in another worker's log writer are
+not visible to that check.
+"""
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Sequence
+
+from app.config import settings
+from app.services.log_writer import LogWriter
+from app.utils.cache import MISSING, TTLCache
+from app.utils.ids import uuid7
+from app.utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+Turn = dict  # {"role": "user" | "model", "parts": [text]}, the shape Gemini's chat history takes
+
+_ROLES = {"inbound": "user", "outbound": "model"}
+
+
+@dataclass(frozen=True, slots=True)
+class Loaded:
+    conversation_id: str
+    snapshot: dict
+    tail: list[Turn]  # the newest turns logged after the snapshot, oldest first
+    turns_after: int = 0  # every turn logged after the snapshot, not only those in the tail
+    newest_id: str | None = None  # the newest turn read, or the snapshot's last_message_id
+
+
+async def load_conversation(user_id: str, tail_limit: int = 10) -> Loaded:
+    """
+    The user's active conversation (created if there is none), its snapshot, and
+    up to ``tail_limit`` of the newest turns logged after that snapshot.
+    """
+    from sqlalchemy import text
+
+    from app.services.storage import get_session_factory
+
+    async with get_session_factory()() as session:
+        row = (await session.execute(
+            text(
+                "SELECT id, context FROM conversations WHERE user_id = :user_id AND is_active "
+                "ORDER BY last_message_at DESC LIMIT 1"
+            ),
+            {"user_id": uuid.UUID(user_id)},
+        )).first()
+        if row is None:
+            conversation_id = uuid7()
+            await session.execute(
+                text(
+                    "INSERT INTO conversations (id, user_id, started_at, last_message_at, context, is_active) "
+                    "VALUES (:id, :user_id, :now, :now, '{}'::jsonb, true)"
+                ),
+                {"id": conversation_id, "user_id": uuid.UUID(user_id), "now": datetime.now(timezone.utc)},
+            )
+            await session.commit()
+            return Loaded(str(conversation_id), {}, [])
+
+        conversation_id, snapshot = row[0], row[1] or {}
+        after = snapshot.get("last_message_id")
+        rows = (await session.execute(
+            text(
+                # The window count is taken before LIMIT, so it covers every turn after the snapshot.
+                "SELECT id, direction, content, count(*) OVER () FROM messages WHERE conversation_id = :id"
+                + (" AND id > :after" if after else "")
+                + " ORDER BY id DESC LIMIT :limit"
+            ),
+            {"id": conversation_id, "limit": tail_limit, **({"after": uuid.UUID(after)} if after else {})},
+        )).all()
+    tail = [{"role": _ROLES[direction], "parts": [content]} for _, direction, content, _ in reversed(rows)]
+    return Loaded(
+        str(conversation_id),
+        snapshot,
+        tail,
+        turns_after=rows[0][3] if rows else 0,
+        newest_id=str(rows[0][0]) if rows else after,
+    )
+
+
+async def write_checkpoint(
+    conversation_id: str,
+    patch: dict,
+    based_on: str | None = None,
+    seen: str | None = None,
+    appended: Sequence[str] = (),
+) -> bool:
+    """
+    Merge ``patch`` into the top level of ``conversations.context``. Other keys are
+    kept. Nothing is written, and False returned, if the snapshot's
+    ``last_message_id`` is no longer ``based_on`` or the log holds a turn newer than
+    ``seen`` that is not one of ``appended``.
+    """
+    from sqlalchemy import text
+
+    from app.services.storage import get_session_factory
+
+    async with get_session_factory()() as session:
+        result = await session.execute(
+            text(
+                "UPDATE conversations SET context = COALESCE(context, '{}'::jsonb) || CAST(:patch AS jsonb), "
+                "last_message_at = :now WHERE id = :id "
+                "AND context->>'last_message_id' IS NOT DISTINCT FROM CAST(:based_on AS text) "
+                "AND NOT EXISTS (SELECT 1 FROM messages WHERE conversation_id = :id"
+                + (" AND id > :seen" if seen else "")
+                + " AND id <> ALL(CAST(:appended AS uuid[])))"
+            ),
+            {
+                "id": uuid.UUID(conversation_id),
+                "patch": json.dumps(patch),
+                "now": datetime.now(timezone.utc),
+                "based_on": based_on,
+                "appended": [uuid.UUID(message_id) for message_id in appended],
+                **({"seen": uuid.UUID(seen)} if seen else {}),
+            },
+        )
+        await session.commit()
+    return result.rowcount == 1
+
+
+class ConversationState:
+    __slots__ = (
+        "conversation_id", "history", "last_message_id", "since_checkpoint", "based_on", "seen", "appended",
+    )
+
+    def __init__(self, conversation_id: str, history: list[Turn], last_message_id: str | None = None):
+        self.conversation_id = conversation_id
+        self.history = history
+        self.last_message_id = last_message_id
+        # Turns logged since the snapshot was last written
+        self.since_checkpoint = 0
+        # The snapshot's last_message_id, the newest turn read from the log, and the
+        # turns this worker logged after it: what a checkpoint checks the database against.
+        self.based_on = last_message_id
+        self.seen = last_message_id
+        self.appended: list[str] = []
+
+
+class ConversationStore:
+    def __init__(
+        self,
+        log_writer: LogWriter,
+        load: Callable[..., Awaitable[Loaded]] = load_conversation,
+        checkpoint: Callable[..., Awaitable[bool]] = write_checkpoint,
+        keep_turns: int = 10,
+        checkpoint_every: int = 20,
+        cache_size: int = 10_000,
+        cache_ttl: float = 300.0,
+    ):
+        self.log_writer = log_writer
+        self._load = load
+        self._checkpoint = checkpoint
+        self.keep_turns = keep_turns
+        self.checkpoint_every = checkpoint_every
+        self._states = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._flight = SingleFlight()
+
+    async def state(self, user_id: str) -> ConversationState:
+        state = self._states.get(user_id)
+        if state is MISSING:
+            state = await self._flight.do(user_id, lambda: self._load_state(user_id))
+        return state
+
+    async def history(self, user_id: str) -> list[Turn]:
+        """The most recent turns, oldest first. The list is a copy the caller may modify."""
+        return list((await self.state(user_id)).history)
+
+    async def append(
+        self,
+        user_id: str,
+        role: str,
+        content: str,
+        message_type: str = "text",
+        intent: str | None = None,
+        external_id: str | None = None,
+    ) -> None:
+        """Log one turn (``role`` is "user" or "model") and checkpoint the snapshot when one is due."""
+        state = await self.state(user_id)
+        message_id = uuid7()
+        await self.log_writer.log_message(
+            id=message_id,
+            conversation_id=uuid.UUID(state.conversation_id),
+            direction="inbound" if role == "user" else "outbound",
+            content=content,
+            message_type=message_type,
+            intent=intent,
+            external_id=external_id,
+            created_at=datetime.now(timezone.utc),
+        )
+        state.history.append({"role": role, "parts": [content]})
+        del state.history[:-self.keep_turns]
+        state.last_message_id = str(message_id)
+        state.appended.append(state.last_message_id)
+        state.since_checkpoint += 1
+        self._states.set(user_id, state)
+        if state.since_checkpoint >= self.checkpoint_every:
+            await self.checkpoint(user_id, state)
+
+    async def checkpoint(self, user_id: str, state: ConversationState) -> None:
+        patch = {"history": list(state.history), "last_message_id": state.last_message_id}
+        try:
+            written = await self._checkpoint(
+                state.conversation_id, patch, based_on=state.based_on, seen=state.seen, appended=list(state.appended),
+            )
+        except Exception as e:
+            # The turns are still in the log, so a missed checkpoint only makes the next load read a longer tail.
+            logger.warning("Conversation checkpoint failed (%s); retrying on the next turn", type(e).__name__)
+            return
+        if not written:
+            # Another worker has logged turns or checkpointed since this state was loaded.
+            logger.info("Conversation %s changed elsewhere; reloading it", state.conversation_id)
+            self.forget(user_id)
+            return
+        state.since_checkpoint = 0
+        state.based_on = state.seen = state.last_message_id
+        state.appended.clear()
+
+    async def _load_state(self, user_id: str) -> ConversationState:
+        loaded = await self._load(user_id, tail_limit=self.keep_turns)
+        history = (list(loaded.snapshot.get("history", [])) + loaded.tail)[-self.keep_turns:]
+        state = ConversationState(loaded.conversation_id, history, loaded.newest_id)
+        state.based_on = loaded.snapshot.get("last_message_id")
+        state.since_checkpoint = loaded.turns_after
+        self._states.set(user_id, state)
+        return state
+
+    def forget(self, user_id: str) -> None:
+        self._states.pop(user_id)
+        self._flight.forget(user_id)
+
+
+_store: ConversationStore | None = None
+
+
+def get_conversation_store() -> ConversationStore:
+    global _store
+    if _store is None:
+        from app.services.log_writer import get_log_writer
+
+        _store = ConversationStore(
+            get_log_writer(),
+            keep_turns=settings.conversation_history_turns,
+            checkpoint_every=settings.conversation_checkpoint_every,
+            cache_ttl=settings.conversation_cache_ttl_seconds,
+        )
+    return _store
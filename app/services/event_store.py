@@ -0,0 +1,96 @@
+"""
+Event history queries.
+
+Pages are addressed by a keyset cursor - the ``(created_at, id)`` of the last event
+on the previous page - rather than an OFFSET, so fetching page 500 costs the same
+index range scan as page 1. The ordering matches the composite indexes on
+``events`` (see alembic revision 0003).
+"""
+import base64
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Select, false, select, true, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import Event, User
+
+
+def encode_cursor(created_at: datetime, event_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{event_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Inverse of :func:`encode_cursor`; raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, event_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(event_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def history_query(
+    user_id: uuid.UUID,
+    *,
+    camera_id: uuid.UUID | None = None,
+    severity: str | None = None,
+    acknowledged: bool | None = None,
+    before: tuple[datetime, uuid.UUID] | None = None,
+    limit: int = 50,
+) -> Select:
+    """Newest-first events for ``user_id``, strictly older than the ``before`` cursor."""
+    query = select(Event).where(Event.user_id == user_id)
+    if camera_id is not None:
+        query = query.where(Event.camera_id == camera_id)
+    if severity is not None:
+        query = query.where(Event.severity == severity)
+    if acknowledged is not None:
+        # A literal rather than a bind parameter, so ``acknowledged = false`` matches
+        # the partial index predicate even under a generic plan.
+        query = query.where(Event.acknowledged == (true() if acknowledged else false()))
+    if before is not None:
+        # Row comparison, so Postgres turns the cursor into an index range bound.
+        query = query.where(tuple_(Event.created_at, Event.id) < tuple_(*before))
+    return query.order_by(Event.created_at.desc(), Event.id.desc()).limit(limit)
+
+
+async def list_events(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    *,
+    cursor: str | None = None,
+    limit: int = 50,
+    **filters,
+) -> tuple[list[Event], str | None]:
+    """One page of history and the cursor for the next one (None on the last page)."""
+    before = decode_cursor(cursor) if cursor else None
+    # One extra row tells us whether another page exists without a COUNT.
+    result = await session.scalars(history_query(user_id, before=before, limit=limit + 1, **filters))
+    events = list(result)
+    if len(events) <= limit:
+        return events, None
+    events = events[:limit]
+    return events, encode_cursor(events[-1].created_at, events[-1].id)
+
+
+async def unacknowledged_count(session: AsyncSession, user_id: uuid.UUID) -> int | None:
+    """Badge count, read from the trigger-maintained counter; None for an unknown user."""
+    return await session.scalar(select(User.unacknowledged_events).where(User.id == user_id))
+
+
+async def acknowledge(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    event_id: uuid.UUID,
+    response: str | None = None,
+) -> bool:
+    """Mark one event acknowledged; False if it does not exist or was already acknowledged."""
+    result = await session.execute(
+        update(Event)
+        .where(Event.id == event_id, Event.user_id == user_id, Event.acknowledged == false())
+        .values(acknowledged=True, acknowledged_at=datetime.utcnow(), response=response)
+    )
+    await session.commit()
+    return result.rowcount == 1
@@ -1,30 +1,191 @@
-import google.generativeai as genai
-from typing import Any
+import asyncio
+import functools
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
 from app.config import settings
+from app.models.scene import UserIntent
+from app.services.llm_guard import get_guard
+from app.services.metrics import LLM_REQUESTS, LLM_LATENCY, LLM_TOKENS
+from app.services.tracing import span
+from app.utils.cache import MISSING, TTLCache
+from app.utils.singleflight import SingleFlight
 
-if settings.gemini_api_key:
-    genai.configure(api_key=settings.gemini_api_key)
-    model = genai.GenerativeModel(settings.gemini_model)
-else:
-    model = None
+_model = None
+
+
+class _CallMetrics:
+    """Pre-bound metric children for one LLM operation."""
+
+    def __init__(self, operation: str):
+        self.ok = LLM_REQUESTS.labels(operation, "ok")
+        self.error = LLM_REQUESTS.labels(operation, "error")
+        self.latency = LLM_LATENCY.labels(operation)
+        self.prompt_tokens = LLM_TOKENS.labels(operation, "prompt")
+        self.completion_tokens = LLM_TOKENS.labels(operation, "completion")
+        self.joined = LLM_REQUESTS.labels(operation, "joined")
+        self.cached = LLM_REQUESTS.labels(operation, "cached")
+
+    def record(self, started: float, response: Any = None) -> None:
+        self.latency.observe(time.perf_counter() - started)
+        if response is None:
+            self.error.inc()
+            return
+        self.ok.inc()
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            self.prompt_tokens.inc(getattr(usage, "prompt_token_count", 0) or 0)
+            self.completion_tokens.inc(getattr(usage, "candidates_token_count", 0) or 0)
+
+
+_GENERATE_METRICS = _CallMetrics("generate_response")
+_CLASSIFY_METRICS = _CallMetrics("classify_intent")
+_DESCRIBE_METRICS = _CallMetrics("describe_frames")
+
+# Intent names in the classification prompt → UserIntent values
+_INTENTS = {
+    "STATUS_CHECK": UserIntent.STATUS_CHECK,
+    "OBJECT_QUERY": UserIntent.OBJECT_QUERY,
+    "SNAPSHOT_REQUEST": UserIntent.SNAPSHOT_REQUEST,
+    "ALERT_ACK": UserIntent.ALERT_ACKNOWLEDGE,
+    "ESCALATION_CONFIRM": UserIntent.ESCALATION_CONFIRM,
+    "SETTINGS": UserIntent.SETTINGS,
+    "HELP": UserIntent.HELP,
+    "GREETING": UserIntent.GREETING,
+}
+
+
+def get_model():
+    """Configure the Gemini SDK and build the model on first use.
+
+    google.generativeai pulls in grpc and protobuf, which dominates cold start,
+    so it is only imported once a request actually needs the LLM.
+    """
+    global _model
+    if _model is None and settings.gemini_api_key:
+        import google.generativeai as genai
+
+        if settings.gemini_api_endpoint:
+            genai.configure(
+                api_key=settings.gemini_api_key,
+                transport="rest",
+                client_options={"api_endpoint": settings.gemini_api_endpoint},
+            )
+        else:
+            genai.configure(api_key=settings.gemini_api_key)
+        _model = genai.GenerativeModel(settings.gemini_model)
+    return _model
+
+
+# The SDK blocks, so calls run in threads. They get their own bounded pool:
+# a hedged or timed-out attempt cannot be interrupted and keeps its thread until
+# the SDK's request timeout, and in the default executor those would starve
+# snapshot reads and S3 calls.
+_executor: ThreadPoolExecutor | None = None
+
+
+def _request_options() -> dict[str, float]:
+    # Past the guard's deadline nobody is waiting for the reply any more.
+    return {"timeout": settings.llm_deadline_seconds}
+
+
+async def _in_thread(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(settings.llm_max_threads, thread_name_prefix="llm")
+    return await asyncio.get_running_loop().run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+def close_llm() -> None:
+    """Stop the LLM thread pool; calls still running finish in the background."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+# Identical concurrent requests (several people asking "what's happening?" at
+# once, a retried update) share one call; results are kept for a few seconds.
+_flight = SingleFlight()
+_results: TTLCache | None = None
+
+
+def _request_key(operation: str, prompt: str, history: list[dict[str, Any]] | None = None) -> str:
+    payload = json.dumps([operation, settings.gemini_model, prompt, history or []], default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _result_cache() -> TTLCache:
+    global _results
+    if _results is None:
+        _results = TTLCache(settings.llm_result_cache_size, ttl=settings.llm_result_cache_ttl_seconds)
+    return _results
+
+
+async def _shared(key: str, metrics: _CallMetrics, call: Callable[[], Awaitable[Any]]) -> Any:
+    if not settings.llm_coalescing_enabled:
+        return await call()
+    cached = _result_cache().get(key)
+    if cached is not MISSING:
+        metrics.cached.inc()
+        return cached
+    if key in _flight:
+        metrics.joined.inc()
+    return await _flight.do(key, lambda: _call_and_cache(key, call))
+
+
+async def _call_and_cache(key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+    result = await call()
+    if settings.llm_result_cache_ttl_seconds > 0:
+        _result_cache().set(key, result)
+    return result
+
+
+def reset_llm_cache() -> None:
+    """Forget cached results (tests, or after changing the model)."""
+    if _results is not None:
+        _results.clear()
 
 
 async def generate_response(prompt: str, history: list[dict[str, Any]] | None = None) -> str:
+    model = get_model()
     if not model:
         raise ValueError("Gemini API key not configured")
-    
+
+    # A copy: callers append to their history when the reply arrives, while a
+    # coalesced call may still be using it.
+    history = list(history or [])
+    key = _request_key("generate_response", prompt, history)
+    guard = get_guard("generate_response")
+    return await _shared(key, _GENERATE_METRICS, lambda: guard.call(lambda: _generate(model, prompt, history)))
+
+
+def _send(model: Any, prompt: str, history: list[dict[str, Any]]) -> Any:
     if history:
-        chat = model.start_chat(history=history)
-        response = chat.send_message(prompt)
-    else:
-        response = model.generate_content(prompt)
+        return model.start_chat(history=history).send_message(prompt, request_options=_request_options())
+    return model.generate_content(prompt, request_options=_request_options())
+
+
+async def _generate(model: Any, prompt: str, history: list[dict[str, Any]]) -> str:
+    started = time.perf_counter()
+    try:
+        with span("gemini.generate_response", history_length=len(history)):
+            # The SDK call blocks; keep it off the event loop.
+            response = await _in_thread(_send, model, prompt, history)
+    except Exception:
+        _GENERATE_METRICS.record(started)
+        raise
+    _GENERATE_METRICS.record(started, response)
     
     return response.text
 
 
 async def classify_intent(message: str) -> str:
+    model = get_model()
     if not model:
-        return "unknown"
+        return UserIntent.UNKNOWN
     
     prompt = f"""Classify the user's intent from their message.
 
@@ -42,6 +203,68 @@ Possible intents:
 User message: "{message}"
 
 Respond with ONLY the intent name, nothing else."""
-    
-    response = model.generate_content(prompt)
-    return response.text.strip().upper()
+
+    key = _request_key("classify_intent", prompt)
+    guard = get_guard("classify_intent")
+    return await _shared(key, _CLASSIFY_METRICS, lambda: guard.call(lambda: _classify(model, prompt)))
+
+
+async def _classify(model: Any, prompt: str) -> str:
+    started = time.perf_counter()
+    try:
+        with span("gemini.classify_intent"):
+            response = await _in_thread(model.generate_content, prompt, request_options=_request_options())
+    except Exception:
+        _CLASSIFY_METRICS.record(started)
+        raise
+    _CLASSIFY_METRICS.record(started, response)
+    return _INTENTS.get(response.text.strip().strip(".").upper(), UserIntent.UNKNOWN)
+
+
+async def describe_frames(frames: list[bytes], detections: list[list[dict]]) -> list[dict]:
+    """Describe several JPEG frames in one multimodal request.
+
+    ``detections[i]`` are the on-device detections for ``frames[i]``. Returns one
+    ``{"description": str, "objects": [{"type", "confidence"}]}`` per frame, in order.
+    """
+    model = get_model()
+    if not model:
+        raise ValueError("Gemini API key not configured")
+
+    hints = "\n".join(
+        f"- Frame {i + 1}: " + (", ".join(f"{d['type']} ({d['confidence']:.2f})" for d in found) or "nothing")
+        for i, found in enumerate(detections)
+    )
+    prompt = f"""You are checking frames from home security cameras.
+The on-device detector reported:
+{hints}
+
+For each of the {len(frames)} frames below, in order, list the people, animals,
+packages and vehicles you can see, with your confidence, and describe the frame
+in one short sentence.
+
+Respond with ONLY a JSON array of {len(frames)} objects like
+{{"description": "...", "objects": [{{"type": "person", "confidence": 0.9}}]}}"""
+
+    parts: list[Any] = [prompt]
+    parts.extend({"mime_type": "image/jpeg", "data": frame} for frame in frames)
+
+    started = time.perf_counter()
+    try:
+        with span("gemini.describe_frames", frames=len(frames)):
+            # The SDK call blocks; keep it off the event loop.
+            response = await _in_thread(
+                model.generate_content,
+                parts,
+                generation_config={"response_mime_type": "application/json"},
+                request_options=_request_options(),
+            )
+    except Exception:
+        _DESCRIBE_METRICS.record(started)
+        raise
+    _DESCRIBE_METRICS.record(started, response)
+
+    results = json.loads(response.text)
+    if not isinstance(results, list) or len(results) != len(frames):
+        raise ValueError(f"Expected {len(frames)} frame descriptions, got {response.text[:200]!r}")
+    return results
@@ -0,0 +1,110 @@
+"""
+Write-behind ``cameras.last_heartbeat``.
+
+Heartbeats and scene uploads only record the time in memory. A periodic flush
+writes the latest time for every camera in one executemany UPDATE, so the
+database sees one write per camera per ``flush_interval``, however often phones
+check in.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def heartbeat_update(beats: dict[str, datetime]):
+    """
+    The UPDATE and its executemany rows. It targets the Core table: an ORM
+    ``update(Camera)`` with a parameter list is a bulk UPDATE by primary key and
+    rejects a WHERE on ``id``.
+    """
+    from sqlalchemy import bindparam, update
+
+    from app.models.user import Camera
+
+    cameras = Camera.__table__
+    statement = (
+        update(cameras)
+        .where(cameras.c.id == bindparam("camera_id"))
+        .values(last_heartbeat=bindparam("beat_at"))
+    )
+    params = [
+        {"camera_id": uuid.UUID(camera_id), "beat_at": when.replace(tzinfo=timezone.utc)}
+        for camera_id, when in beats.items()
+    ]
+    return statement, params
+
+
+async def write_heartbeats(beats: dict[str, datetime]) -> None:
+    from app.services.storage import get_session_factory
+
+    statement, params = heartbeat_update(beats)
+    async with get_session_factory()() as session:
+        await session.execute(statement, params)
+        await session.commit()
+
+
+class HeartbeatRecorder:
+    def __init__(
+        self,
+        write: Callable[[dict[str, datetime]], Awaitable[None]] = write_heartbeats,
+        flush_interval: float = 10.0,
+    ):
+        self._write = write
+        self.flush_interval = flush_interval
+        self._pending: dict[str, datetime] = {}
+        self._task: asyncio.Task | None = None
+
+    def beat(self, camera_uuid: str, at: datetime | None = None) -> None:
+        self._pending[camera_uuid] = at or datetime.utcnow()
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            await self._write(pending)
+        except Exception:
+            logger.exception("Failed to write last_heartbeat for %d cameras", len(pending))
+            # Retry with the next flush unless a newer beat has superseded it.
+            for camera_uuid, when in pending.items():
+                self._pending.setdefault(camera_uuid, when)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+_recorder: HeartbeatRecorder | None = None
+
+
+def get_heartbeats() -> HeartbeatRecorder:
+    global _recorder
+    if _recorder is None:
+        _recorder = HeartbeatRecorder(flush_interval=settings.heartbeat_flush_interval_seconds)
+    return _recorder
+
+
+async def close_heartbeats() -> None:
+    global _recorder
+    if _recorder is not None:
+        await _recorder.close()
+    _recorder = None
@@ -0,0 +1,226 @@
+"""
+Identity resolution: Telegram user id → user, camera device id → camera.
+
+Every inbound update and scene upload needs one of these lookups, so results are
+kept in a per-process LRU+TTL cache. Unknown ids are cached too (for a shorter
+time), so a stream of updates from a stranger does not hit the database each
+time, and concurrent misses for one id share a single query. Writers call
+:func:`invalidate_user` / :func:`invalidate_camera`, which also broadcast over
+Redis pub/sub so other workers drop their copy; if the subscription drops, each
+worker clears its cache on reconnect, and the TTL bounds staleness meanwhile.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.services.metrics import CACHE_LOAD_LATENCY, CACHE_LOOKUPS
+from app.utils.cache import MISSING, TTLCache
+from app.utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "homey:identity:invalidate"
+
+
+@dataclass(frozen=True, slots=True)
+class UserIdentity:
+    id: uuid.UUID
+    telegram_id: int
+    username: str | None
+    status: str
+    timezone: str
+
+
+@dataclass(frozen=True, slots=True)
+class CameraIdentity:
+    id: uuid.UUID
+    user_id: uuid.UUID
+    device_id: str
+    name: str
+    is_active: bool
+
+
+async def load_user(telegram_id: int) -> UserIdentity | None:
+    from sqlalchemy import select
+
+    from app.models.user import User
+    from app.services.storage import get_session_factory
+
+    query = select(User.id, User.telegram_id, User.username, User.status, User.timezone)
+    async with get_session_factory()() as session:
+        row = (await session.execute(query.where(User.telegram_id == telegram_id))).one_or_none()
+    return UserIdentity(*row) if row else None
+
+
+async def load_camera(device_id: str) -> CameraIdentity | None:
+    from sqlalchemy import select
+
+    from app.models.user import Camera
+    from app.services.storage import get_session_factory
+
+    query = select(Camera.id, Camera.user_id, Camera.device_id, Camera.name, Camera.is_active)
+    async with get_session_factory()() as session:
+        row = (await session.execute(query.where(Camera.device_id == device_id))).one_or_none()
+    return CameraIdentity(*row) if row else None
+
+
+class _Resolver:
+    """One cached mapping (key → identity or None) with coalesced loads."""
+
+    def __init__(self, name: str, load: Callable[[object], Awaitable[object]],
+                 maxsize: int, ttl: float, negative_ttl: float):
+        self.load = load
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(maxsize, ttl)
+        self._flight = SingleFlight()
+        # Bumped on every invalidation so a load that started before it is not cached.
+        self._generation = 0
+        self._hit = CACHE_LOOKUPS.labels(name, "hit")
+        self._miss = CACHE_LOOKUPS.labels(name, "miss")
+        self._load_latency = CACHE_LOAD_LATENCY.labels(name)
+
+    async def get(self, key):
+        value = self.cache.get(key)
+        if value is not MISSING:
+            self._hit.inc()
+            return value
+        self._miss.inc()
+        return await self._flight.do(key, lambda: self._load(key))
+
+    async def _load(self, key):
+        generation = self._generation
+        started = time.perf_counter()
+        try:
+            value = await self.load(key)
+        finally:
+            self._load_latency.observe(time.perf_counter() - started)
+        if generation == self._generation:
+            self.cache.set(key, value, ttl=None if value is not None else self.negative_ttl)
+        return value
+
+    def invalidate(self, key) -> None:
+        self._generation += 1
+        self.cache.pop(key)
+        self._flight.forget(key)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self.cache.clear()
+
+
+class IdentityCache:
+    def __init__(
+        self,
+        load_user: Callable[[int], Awaitable[UserIdentity | None]] = load_user,
+        load_camera: Callable[[str], Awaitable[CameraIdentity | None]] = load_camera,
+        maxsize: int = 10_000,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+    ):
+        self._users = _Resolver("identity_user", load_user, maxsize, ttl, negative_ttl)
+        self._cameras = _Resolver("identity_camera", load_camera, maxsize, ttl, negative_ttl)
+        self._listener: asyncio.Task | None = None
+
+    async def user(self, telegram_id: int) -> UserIdentity | None:
+        return await self._users.get(telegram_id)
+
+    async def camera(self, device_id: str) -> CameraIdentity | None:
+        return await self._cameras.get(device_id)
+
+    def invalidate_local(self, message: str) -> None:
+        """Apply one invalidation message (``user:<telegram_id>`` or ``camera:<device_id>``)."""
+        kind, _, key = message.partition(":")
+        if kind == "user":
+            try:
+                telegram_id = int(key)
+            except ValueError:
+                logger.warning("Ignoring malformed identity invalidation %r", message)
+                return
+            self._users.invalidate(telegram_id)
+        elif kind == "camera":
+            self._cameras.invalidate(key)
+        else:
+            logger.warning("Ignoring malformed identity invalidation %r", message)
+
+    def clear(self) -> None:
+        self._users.clear()
+        self._cameras.clear()
+
+    def start_listener(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(), name="identity-invalidation")
+
+    async def _listen(self) -> None:
+        from app.services.redis_client import get_redis
+
+        backoff = 1.0
+        while True:
+            try:
+                async with get_redis().pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    # Invalidations may have been missed while disconnected.
+                    self.clear()
+                    backoff = 1.0
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.invalidate_local(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Identity invalidation listener disconnected (%s); retrying in %.0fs",
+                               type(e).__name__, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+_cache: IdentityCache | None = None
+
+
+def get_identity_cache() -> IdentityCache:
+    global _cache
+    if _cache is None:
+        _cache = IdentityCache(
+            maxsize=settings.identity_cache_size,
+            ttl=settings.identity_cache_ttl_seconds,
+            negative_ttl=settings.identity_cache_negative_ttl_seconds,
+        )
+        _cache.start_listener()
+    return _cache
+
+
+async def _invalidate(message: str) -> None:
+    if _cache is not None:
+        _cache.invalidate_local(message)
+    from app.services.redis_client import get_redis
+
+    await get_redis().publish(INVALIDATION_CHANNEL, message)
+
+
+async def invalidate_user(telegram_id: int) -> None:
+    """Call after changing a user row; drops it here and on every other worker."""
+    await _invalidate(f"user:{telegram_id}")
+
+
+async def invalidate_camera(device_id: str) -> None:
+    """Call after changing a camera row; drops it here and on every other worker."""
+    await _invalidate(f"camera:{device_id}")
+
+
+async def close_identity_cache() -> None:
+    global _cache
+    if _cache is not None:
+        await _cache.close()
+    _cache = None
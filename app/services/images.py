@@ -0,0 +1,126 @@
+"""
+Snapshot variants (thumbnail, vision, Telegram), rendered in a process pool.
+
+Decoding and re-encoding a camera image takes tens of milliseconds of pure CPU
+work. Done on the event loop, it would stall every webhook and upload handled
+by the same process. Threads do not help either, because Pillow's encoders hold
+the GIL for much of that time. So rendering runs in a ``ProcessPoolExecutor``:
+
+* at most ``max_pending`` renders may be queued or running. Beyond that,
+  :class:`ImagePoolBusy` is raised and callers fall back to the original image
+  instead of building an unbounded backlog.
+* all variants of a frame are rendered together, once per frame hash, and stored
+  next to the original. Concurrent requests for the same frame share one render,
+  and frames that are already rendered are remembered in memory.
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import settings
+from app.services.metrics import IMAGE_RENDERS, QUEUE_DEPTH, STAGE_LATENCY
+from app.services.snapshots import SnapshotStore, get_snapshot_store
+from app.utils.cache import MISSING, TTLCache
+from app.utils.imaging import VARIANTS, render
+from app.utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+_RENDER_LATENCY = STAGE_LATENCY.labels("image_render")
+_RENDERED = IMAGE_RENDERS.labels("rendered")
+_REJECTED = IMAGE_RENDERS.labels("rejected")
+_FAILED = IMAGE_RENDERS.labels("failed")
+
+
+class ImagePoolBusy(RuntimeError):
+    pass
+
+
+def variant_url(url: str, variant: str) -> str:
+    """URL of ``variant`` for a snapshot URL served by this app; other URLs are returned as is."""
+    if variant not in VARIANTS or not url.startswith(settings.snapshot_public_url.rstrip("/") + "/"):
+        return url
+    return f"{url}?variant={variant}"
+
+
+class ImageProcessor:
+    def __init__(self, store: SnapshotStore, workers: int = 2, max_pending: int = 16, cache_size: int = 10_000):
+        self.store = store
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        # Frame hashes whose variants are known to be stored
+        self._rendered = TTLCache(cache_size, ttl=24 * 3600)
+        self._flight = SingleFlight()
+
+    def __len__(self) -> int:
+        return self._pending
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: forking a process that already runs an event loop and
+            # helper threads can copy a held lock into the child.
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def render(self, data: bytes, variants: tuple[str, ...] = tuple(VARIANTS)) -> dict[str, bytes]:
+        """Render ``variants`` of one image in the pool; raises ImagePoolBusy when the queue is full."""
+        if self._pending >= self.max_pending:
+            _REJECTED.inc()
+            raise ImagePoolBusy(f"{self._pending} images already queued")
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            rendered = await asyncio.get_running_loop().run_in_executor(self.executor, render, data, variants)
+        except Exception:
+            _FAILED.inc()
+            raise
+        finally:
+            self._pending -= 1
+        _RENDER_LATENCY.observe(time.perf_counter() - started)
+        _RENDERED.inc()
+        return rendered
+
+    async def ensure_variants(self, digest: str) -> bool:
+        """Make sure every variant of a stored frame exists; False if the frame itself is missing."""
+        if self._rendered.get(digest) is not MISSING:
+            return True
+        return await self._flight.do(digest, lambda: self._ensure(digest))
+
+    async def _ensure(self, digest: str) -> bool:
+        existing = await asyncio.gather(*(self.store.exists(digest, name) for name in VARIANTS))
+        if not all(existing):
+            data = await self.store.read(digest)
+            if data is None:
+                return False
+            for name, body in (await self.render(data)).items():
+                await self.store.put_variant(digest, name, body)
+        self._rendered.set(digest, True)
+        return True
+
+    async def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_processor: ImageProcessor | None = None
+
+
+def get_image_processor() -> ImageProcessor:
+    global _processor
+    if _processor is None:
+        _processor = ImageProcessor(get_snapshot_store(), settings.image_workers, settings.image_max_pending)
+        QUEUE_DEPTH.labels("image_pool").set_function(lambda: len(_processor) if _processor else 0)
+    return _processor
+
+
+async def close_image_processor() -> None:
+    global _processor
+    if _processor is not None:
+        await _processor.close()
+    _processor = None
@@ -0,0 +1,196 @@
+"""
+Latency guard for LLM calls: deadline, hedging and a circuit breaker.
+
+* Every call has a ``deadline``. Past it, the caller gets :class:`LLMUnavailable`
+  and answers without the LLM (see the conversation agent's fallback).
+* If the first attempt is slower than the recent p95, a second, hedged attempt
+  is started and whichever finishes first wins. By construction, only about
+  one call in twenty is hedged while the provider behaves.
+* A circuit breaker counts errors, timeouts and calls slower than
+  ``slow_call`` over the last ``window`` calls. When too many fail, it rejects
+  calls at once for ``open_seconds``, and then lets one trial call through to
+  decide whether to close again.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+from app.config import settings
+from app.services.metrics import LLM_GUARD
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class LLMUnavailable(RuntimeError):
+    """The call was rejected by the circuit breaker or missed its deadline."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_ratio: float = 0.5,
+        min_calls: int = 5,
+        window: int = 20,
+        open_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._trial_at: float | None = None
+
+    def allow(self) -> bool:
+        now = self._clock()
+        if self.state == OPEN and now - self._opened_at >= self.open_seconds:
+            self.state, self._trial_at = HALF_OPEN, None
+        if self.state == HALF_OPEN:
+            # One trial call at a time decides whether to close again; a trial
+            # that never reported back (cancelled) is replaced after open_seconds.
+            if self._trial_at is not None and now - self._trial_at < self.open_seconds:
+                return False
+            self._trial_at = now
+            return True
+        return self.state == CLOSED
+
+    def record(self, ok: bool) -> bool:
+        """Record a call's outcome; True if this opened the circuit."""
+        if self.state == HALF_OPEN:
+            if ok:
+                self.state = CLOSED
+                self._outcomes.clear()
+                return False
+            return self._open()
+        if self.state == OPEN:
+            return False
+        self._outcomes.append(ok)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures >= self.failure_ratio * len(self._outcomes):
+            return self._open()
+        return False
+
+    def _open(self) -> bool:
+        self.state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        return True
+
+
+class LLMGuard:
+    def __init__(
+        self,
+        operation: str,
+        deadline: float = 8.0,
+        min_hedge_delay: float = 1.0,
+        slow_call: float = 5.0,
+        breaker: CircuitBreaker | None = None,
+        samples: int = 200,
+    ):
+        self.operation = operation
+        self.deadline = deadline
+        self.min_hedge_delay = min_hedge_delay
+        self.slow_call = slow_call
+        self.breaker = breaker or CircuitBreaker()
+        # Latencies of successful attempts, for the hedge delay
+        self._latencies: deque[float] = deque(maxlen=samples)
+        self._hedged = LLM_GUARD.labels(operation, "hedged")
+        self._hedge_won = LLM_GUARD.labels(operation, "hedge_won")
+        self._timed_out = LLM_GUARD.labels(operation, "timed_out")
+        self._rejected = LLM_GUARD.labels(operation, "rejected")
+        self._opened = LLM_GUARD.labels(operation, "opened")
+
+    def hedge_delay(self) -> float:
+        """p95 of recent attempt latencies (half the deadline until there are enough samples)."""
+        if len(self._latencies) < 20:
+            estimate = self.deadline / 2
+        else:
+            ordered = sorted(self._latencies)
+            estimate = ordered[int(len(ordered) * 0.95)]
+        return min(max(self.min_hedge_delay, estimate), self.deadline)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.breaker.allow():
+            self._rejected.inc()
+            raise LLMUnavailable(f"{self.operation}: circuit open")
+
+        started = time.perf_counter()
+        first = asyncio.ensure_future(self._attempt(fn))
+        attempts, created = {first}, [first]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=self.hedge_delay())
+            if not done and self.breaker.state == CLOSED:
+                self._hedged.inc()
+                created.append(asyncio.ensure_future(self._attempt(fn)))
+                attempts.add(created[-1])
+
+            error: BaseException | None = None
+            while attempts:
+                remaining = self.deadline - (time.perf_counter() - started)
+                done, attempts = await asyncio.wait(
+                    attempts, timeout=max(remaining, 0), return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    self._timed_out.inc()
+                    self._record(False)
+                    raise LLMUnavailable(f"{self.operation}: no reply within {self.deadline:.1f}s")
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is not first:
+                            self._hedge_won.inc()
+                        self._record(time.perf_counter() - started < self.slow_call)
+                        return attempt.result()
+                    error = attempt.exception()
+            self._record(False)
+            raise error
+        finally:
+            for attempt in created:
+                if attempt.done():
+                    if not attempt.cancelled():
+                        attempt.exception()  # Retrieved, so a losing attempt's error is not logged
+                else:
+                    attempt.cancel()
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        result = await fn()
+        self._latencies.append(time.perf_counter() - started)
+        return result
+
+    def _record(self, ok: bool) -> None:
+        if self.breaker.record(ok):
+            self._opened.inc()
+            logger.warning("LLM circuit for %s opened for %.0fs", self.operation, self.breaker.open_seconds)
+
+
+_guards: dict[str, LLMGuard] = {}
+
+
+def get_guard(operation: str) -> LLMGuard:
+    guard = _guards.get(operation)
+    if guard is None:
+        guard = _guards[operation] = LLMGuard(
+            operation,
+            deadline=settings.llm_deadline_seconds,
+            min_hedge_delay=settings.llm_hedge_min_delay_seconds,
+            slow_call=settings.llm_slow_call_seconds,
+            breaker=CircuitBreaker(
+                failure_ratio=settings.llm_breaker_failure_ratio,
+                min_calls=settings.llm_breaker_min_calls,
+                open_seconds=settings.llm_breaker_open_seconds,
+            ),
+        )
+    return guard
+
+
+def reset_guards() -> None:
+    """Drop guard state so guards are rebuilt from current settings (tests)."""
+    _guards.clear()
@@ -0,0 +1,184 @@
+"""
+Background writer for append-only log tables (``messages``, ``audit_log``).
+
+Request handlers enqueue rows and return; a single task drains the bounded queue
+and inserts whatever has accumulated as one multi-row ``INSERT`` per table, so
+request latency no longer depends on how much is being logged. When the queue is
+full the configured policy either drops the row (counted) or makes the caller wait.
+Rows still queued at shutdown are flushed from the app lifespan.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Literal
+
+from app.config import settings
+from app.services.metrics import BATCH_FLUSH_LATENCY, LOG_RECORDS, QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+Sink = Callable[[str, list[dict]], Awaitable[None]]
+OverflowPolicy = Literal["drop", "block"]
+
+_FLUSH_LATENCY = BATCH_FLUSH_LATENCY.labels("log_writer")
+_STOP = object()
+
+
+class _TableCounters:
+    """Pre-bound LOG_RECORDS children for one table."""
+
+    __slots__ = ("written", "failed", "dropped")
+
+    def __init__(self, table: str):
+        self.written = LOG_RECORDS.labels(table, "written")
+        self.failed = LOG_RECORDS.labels(table, "failed")
+        self.dropped = LOG_RECORDS.labels(table, "dropped")
+
+
+_COUNTERS = {table: _TableCounters(table) for table in ("messages", "audit_log")}
+
+
+def _counters(table: str) -> _TableCounters:
+    counters = _COUNTERS.get(table)
+    if counters is None:
+        counters = _COUNTERS[table] = _TableCounters(table)
+    return counters
+
+
+async def database_sink(table: str, rows: list[dict]) -> None:
+    """Insert ``rows`` into ``table`` in one executemany round trip."""
+    from sqlalchemy import insert
+
+    from app.models.user import AuditLog, Message
+    from app.services.storage import get_session_factory
+
+    model = {"messages": Message, "audit_log": AuditLog}[table]
+    async with get_session_factory()() as session:
+        await session.execute(insert(model), rows)
+        await session.commit()
+
+
+class LogWriter:
+    def __init__(
+        self,
+        sink: Sink = database_sink,
+        capacity: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        overflow: OverflowPolicy = "drop",
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=capacity)
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    async def write(self, table: str, row: dict) -> bool:
+        """Queue one row; returns False if it was dropped (queue full or writer closed)."""
+        if self._closed:
+            _counters(table).dropped.inc()
+            return False
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="log-writer")
+
+        if self.overflow == "block":
+            await self._queue.put((table, row))
+            return True
+        try:
+            self._queue.put_nowait((table, row))
+        except asyncio.QueueFull:
+            _counters(table).dropped.inc()
+            return False
+        return True
+
+    async def log_message(self, **row) -> bool:
+        return await self.write("messages", row)
+
+    async def audit(self, action: str, **row) -> bool:
+        return await self.write("audit_log", {"action": action, **row})
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            # Take whatever is already queued, then linger briefly so a burst becomes
+            # one INSERT instead of many small ones.
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: list[tuple[str, dict]]) -> None:
+        by_table: dict[str, list[dict]] = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+
+        started = time.perf_counter()
+        for table, rows in by_table.items():
+            try:
+                await self.sink(table, rows)
+            except Exception:
+                # Losing log rows must never take down the request path; count and move on.
+                logger.exception("Failed to write %d rows to %s", len(rows), table)
+                _counters(table).failed.inc(len(rows))
+            else:
+                _counters(table).written.inc(len(rows))
+        _FLUSH_LATENCY.observe(time.perf_counter() - started)
+
+    async def close(self) -> None:
+        """Flush everything still queued, then stop the background task."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is not None:
+            # The stop marker queues behind pending rows, so they are all written first.
+            await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+
+
+_writer: LogWriter | None = None
+
+
+def get_log_writer() -> LogWriter:
+    global _writer
+    if _writer is None:
+        _writer = LogWriter(
+            capacity=settings.log_writer_capacity,
+            batch_size=settings.log_writer_batch_size,
+            flush_interval=settings.log_writer_flush_interval_seconds,
+            overflow=settings.log_writer_overflow,
+        )
+        QUEUE_DEPTH.labels("log_writer").set_function(lambda: len(_writer) if _writer else 0)
+    return _writer
+
+
+async def close_log_writer() -> None:
+    global _writer
+    if _writer is not None:
+        await _writer.close()
+    _writer = None
@@ -0,0 +1,348 @@
+"""
+Minimal Prometheus metrics for the agent pipeline.
+
+Metric children are created once per label combination and are meant to be bound
+at import time (``STAGE_LATENCY.labels("gatekeeper")``), so recording a value on
+the request path is a bisect plus a couple of integer adds - no allocation, no
+locks. Updates are not thread-safe; everything here is recorded from the event
+loop thread.
+"""
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 registry: "Registry | None" = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def children(self) -> dict[tuple[str, ...], object]:
+        """Label values → child, e.g. for reading histogram snapshots in load tests."""
+        return dict(self._children)
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+        return self._children[()]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for values, child in self._children.items():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}"]
+
+
+class _CounterChild:
+    __slots__ = ("_value",)
+
+    def __init__(self):
+        self._value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self._value += amount
+
+    def get(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._unlabelled().inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "_function")
+
+    def __init__(self):
+        self._value = 0
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self._value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Sample ``function`` at scrape time instead of tracking updates."""
+        self._function = function
+
+    def get(self) -> float:
+        return self._function() if self._function is not None else self._value
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._unlabelled().set_function(function)
+
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "_counts", "_sum", "_count")
+
+    def __init__(self, upper_bounds: tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        self._counts = [0] * (len(upper_bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._upper_bounds, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        return list(self._counts), self._sum, self._count
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS, registry: "Registry | None" = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def _render_child(self, values, child) -> list[str]:
+        counts, total, count = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def observe_latency(child: _HistogramChild, errors: _CounterChild | None = None):
+    """Decorator recording the wall time (and optionally failures) of an async function."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                if errors is not None:
+                    errors.inc()
+                raise
+            finally:
+                child.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+# Agent pipeline
+
+STAGE_LATENCY = Histogram(
+    "homey_stage_latency_seconds",
+    "Latency of each agent pipeline stage.",
+    ("stage",),
+)
+
+STAGE_ERRORS = Counter(
+    "homey_stage_errors_total",
+    "Exceptions raised by each agent pipeline stage.",
+    ("stage",),
+)
+
+LLM_REQUESTS = Counter(
+    "homey_llm_requests_total",
+    "LLM requests by operation and outcome (ok, error; joined and cached requests shared another call).",
+    ("operation", "outcome"),
+)
+
+LLM_LATENCY = Histogram(
+    "homey_llm_latency_seconds",
+    "Latency of LLM calls.",
+    ("operation",),
+)
+
+LLM_TOKENS = Counter(
+    "homey_llm_tokens_total",
+    "LLM tokens consumed, split into prompt and completion.",
+    ("operation", "kind"),
+)
+
+LLM_GUARD = Counter(
+    "homey_llm_guard_total",
+    "LLM latency guard events by operation (hedged, hedge_won, timed_out, rejected, opened, fallback).",
+    ("operation", "event"),
+)
+
+TELEGRAM_UPDATES = Counter(
+    "homey_telegram_updates_total",
+    "Telegram updates by decoder (typed, or fallback to Update.de_json).",
+    ("decoder",),
+)
+
+RULE_EVALUATIONS = Counter(
+    "homey_rule_evaluations_total",
+    "Alert rule evaluations by outcome.",
+    ("outcome",),
+)
+
+QUEUE_DEPTH = Gauge(
+    "homey_queue_depth",
+    "Number of items waiting in an internal queue.",
+    ("queue",),
+)
+
+CACHE_LOOKUPS = Counter(
+    "homey_cache_lookups_total",
+    "Cache lookups by cache and result; hit ratio is hit / (hit + miss).",
+    ("cache", "result"),
+)
+
+CACHE_LOAD_LATENCY = Histogram(
+    "homey_cache_load_latency_seconds",
+    "Time to load a missing cache entry from its source (coalesced loads count once).",
+    ("cache",),
+)
+
+# Vision enhancement
+
+VISION_FRAMES = Counter(
+    "homey_vision_frames_total",
+    "Uploaded frames by enhancement outcome (skipped, cached, joined, over_budget, queued, enhanced, failed).",
+    ("outcome",),
+)
+
+IMAGE_RENDERS = Counter(
+    "homey_image_renders_total",
+    "Snapshot variant renders in the image process pool by outcome (rendered, rejected, failed).",
+    ("outcome",),
+)
+
+# Camera uploads
+
+UPLOAD_INTERVAL = Histogram(
+    "homey_upload_interval_seconds",
+    "Upload intervals recommended to camera phones.",
+    buckets=(1, 2, 5, 10, 15, 30, 60, 120),
+)
+
+# Partitioning
+
+SCENE_ROUTING = Counter(
+    "homey_scene_routing_total",
+    "Scene uploads by route: handled locally, forwarded to the owning worker, or forward failed.",
+    ("route",),
+)
+
+PARTITION_MEMBERS = Gauge(
+    "homey_partition_members",
+    "Live workers in the camera ownership ring, as seen by this worker.",
+)
+
+# Connection pools
+
+DB_POOL_WAIT = Histogram(
+    "homey_db_pool_wait_seconds",
+    "Time to check a connection out of the database pool, including opening one when the pool grows.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# Background writers
+
+BATCH_FLUSH_LATENCY = Histogram(
+    "homey_batch_flush_latency_seconds",
+    "Time to write one batch from a background writer.",
+    ("writer",),
+)
+
+LOG_RECORDS = Counter(
+    "homey_log_records_total",
+    "Rows handed to the background log writer by table and outcome (written, dropped, failed).",
+    ("table", "outcome"),
+)
+
+# Background tasks
+
+TASKS = Counter(
+    "homey_tasks_total",
+    "Background tasks by queue and outcome (enqueued, deduplicated, succeeded, failed, timed_out).",
+    ("queue", "outcome"),
+)
@@ -0,0 +1,101 @@
+"""
+Bounded outbox for the mock transport.
+
+Messages live in a fixed-size ring buffer and get monotonically increasing sequence
+numbers, so clients page with ``after=<last seq seen>`` instead of re-reading the
+whole history, and memory stays flat during soak tests. A per-user index (also
+trimmed on eviction) keeps filtered reads proportional to the page size.
+"""
+import asyncio
+from collections import deque
+from itertools import islice
+
+
+class MessageOutbox:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buffer: deque[dict] = deque(maxlen=capacity)
+        self._by_user: dict[str, deque[dict]] = {}
+        self._last_seq = 0
+        self._waiters: list[asyncio.Future] = []
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def append(self, message: dict) -> int:
+        """Store ``message`` (its ``seq`` field is set in place) and wake long-pollers."""
+        if len(self._buffer) == self.capacity:
+            evicted = self._buffer[0]
+            user_messages = self._by_user.get(evicted["telegram_id"])
+            if user_messages:
+                user_messages.popleft()
+                if not user_messages:
+                    del self._by_user[evicted["telegram_id"]]
+
+        self._last_seq += 1
+        message["seq"] = self._last_seq
+        self._buffer.append(message)
+        self._by_user.setdefault(message["telegram_id"], deque()).append(message)
+
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        return self._last_seq
+
+    def read(self, after: int = 0, limit: int = 100, user_id: str | None = None) -> list[dict]:
+        """Messages with ``seq > after``, oldest first, at most ``limit``."""
+        if user_id is not None:
+            messages = self._by_user.get(user_id)
+            if not messages:
+                return []
+            # Pollers usually ask for the tail, so scan back from the newest.
+            start = len(messages)
+            while start > 0 and messages[start - 1]["seq"] > after:
+                start -= 1
+            return list(islice(messages, start, start + limit))
+
+        if not self._buffer:
+            return []
+        # Sequence numbers are contiguous inside the ring, so the cursor maps to an offset.
+        size = len(self._buffer)
+        start = max(0, after + 1 - self._buffer[0]["seq"])
+        end = min(size, start + limit)
+        if start >= end:
+            return []
+        if start < size - end:
+            return list(islice(self._buffer, start, end))
+        # Near the tail (the polling case), walk from the right to stay O(page).
+        page = list(islice(reversed(self._buffer), size - end, size - start))
+        page.reverse()
+        return page
+
+    async def wait(self, after: int = 0, limit: int = 100, user_id: str | None = None,
+                   timeout: float = 25.0) -> list[dict]:
+        """Like :meth:`read`, but block up to ``timeout`` seconds until something arrives."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            messages = self.read(after, limit, user_id)
+            remaining = deadline - loop.time()
+            if messages or remaining <= 0:
+                return messages
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                return []
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def clear(self) -> int:
+        count = len(self._buffer)
+        self._buffer.clear()
+        self._by_user.clear()
+        return count
@@ -0,0 +1,256 @@
+"""
+Camera ownership across workers.
+
+Per-camera state (recent scenes, alert cooldowns) lives in process memory, so
+every camera is owned by exactly one worker. Owners are picked by consistent
+hashing over the live members, which heartbeat into a Redis sorted set; a member
+that misses heartbeats for ``member_ttl`` seconds drops out. A scene upload that
+lands on the wrong worker is forwarded to the owner over HTTP.
+
+When membership changes only about 1/N of the cameras move. The previous owner
+exports their state into Redis (``homey:handoff:<camera>``) and forgets it. The
+new owner imports it on its first upload for that camera. For a short grace
+period it keeps checking, because the old owner may notice the change a
+heartbeat later.
+
+Each worker needs its own reachable ``worker_advertise_url``. Run one server
+process per port, rather than ``uvicorn --workers``, which share one port.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import time
+from bisect import bisect
+from typing import Awaitable, Callable, Iterable
+
+from app.config import settings
+from app.services.metrics import PARTITION_MEMBERS, SCENE_ROUTING
+
+logger = logging.getLogger(__name__)
+
+FORWARDED_HEADER = "X-Homey-Forwarded-By"
+
+_MEMBERS_KEY = "homey:workers"
+_URLS_KEY = "homey:workers:urls"
+_HANDOFF_PREFIX = "homey:handoff:"
+
+_FORWARDED = SCENE_ROUTING.labels("forwarded")
+_FORWARD_FAILED = SCENE_ROUTING.labels("forward_failed")
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring with ``vnodes`` points per member for an even spread."""
+
+    def __init__(self, members: Iterable[str] = (), vnodes: int = 64):
+        self.members = frozenset(members)
+        points = sorted((_hash(f"{member}#{i}"), member) for member in self.members for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [member for _, member in points]
+
+    def owner(self, key: str) -> str | None:
+        if not self._hashes:
+            return None
+        index = bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class RedisMembership:
+    """Membership list and handoff mailbox in Redis."""
+
+    async def heartbeat(self, worker_id: str, url: str, ttl: float) -> dict[str, str]:
+        """Refresh our entry, expire silent members, and return live ``worker_id → url``."""
+        from app.services.redis_client import get_redis
+
+        now = time.time()
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.zadd(_MEMBERS_KEY, {worker_id: now})
+            pipe.hset(_URLS_KEY, worker_id, url)
+            pipe.zremrangebyscore(_MEMBERS_KEY, "-inf", now - ttl)
+            pipe.zrange(_MEMBERS_KEY, 0, -1)
+            pipe.hgetall(_URLS_KEY)
+            *_, members, urls = await pipe.execute()
+        urls = {k.decode(): v.decode() for k, v in urls.items()}
+        return {m.decode(): urls[m.decode()] for m in members if m.decode() in urls}
+
+    async def leave(self, worker_id: str) -> None:
+        from app.services.redis_client import get_redis
+
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.zrem(_MEMBERS_KEY, worker_id)
+            pipe.hdel(_URLS_KEY, worker_id)
+            await pipe.execute()
+
+    async def put_handoff(self, camera_id: str, state: dict, ttl: float) -> None:
+        from app.services.redis_client import get_redis
+
+        await get_redis().set(_HANDOFF_PREFIX + camera_id, json.dumps(state), ex=max(1, int(ttl)))
+
+    async def take_handoff(self, camera_id: str) -> dict | None:
+        from app.services.redis_client import get_redis
+
+        raw = await get_redis().getdel(_HANDOFF_PREFIX + camera_id)
+        return json.loads(raw) if raw else None
+
+
+class Partitioner:
+    def __init__(
+        self,
+        export_state: Callable[[str], Awaitable[dict | None]],
+        import_state: Callable[[str, dict], Awaitable[None]],
+        membership: RedisMembership | None = None,
+        worker_id: str | None = None,
+        advertise_url: str = "",
+        heartbeat_interval: float = 2.0,
+        member_ttl: float = 10.0,
+        vnodes: int = 64,
+    ):
+        self.export_state = export_state
+        self.import_state = import_state
+        self.membership = membership or RedisMembership()
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.advertise_url = advertise_url
+        self.heartbeat_interval = heartbeat_interval
+        self.member_ttl = member_ttl
+        self.vnodes = vnodes
+        self.ring = HashRing([self.worker_id], vnodes)
+        self._urls: dict[str, str] = {self.worker_id: advertise_url}
+        # Cameras whose state lives here → when we took them over.
+        self._owned: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+        self._client = None
+
+    # Routing.
+
+    def owner_url(self, camera_id: str) -> str | None:
+        """Base URL of the worker owning ``camera_id``, or None if that is us."""
+        owner = self.ring.owner(camera_id)
+        if owner is None or owner == self.worker_id:
+            return None
+        return self._urls.get(owner)
+
+    async def forward(
+        self, url: str, path: str, body: dict | bytes, content_type: str = "application/octet-stream",
+    ) -> tuple[int, dict] | None:
+        """
+        POST an upload to its owner, as JSON or, for ``bytes``, as is with
+        ``content_type``. None if the owner could not be reached or did not answer with JSON.
+        """
+        import httpx
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=5.0)
+        headers = {FORWARDED_HEADER: self.worker_id}
+        if isinstance(body, bytes):
+            payload = {"content": body}
+            headers["content-type"] = content_type
+        else:
+            payload = {"json": body}
+        try:
+            response = await self._client.post(url.rstrip("/") + path, headers=headers, **payload)
+            reply = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            # ValueError: the reply was not JSON (a proxy error page, say).
+            logger.warning("Forwarding to %s failed (%s); handling locally", url, type(e).__name__)
+            _FORWARD_FAILED.inc()
+            return None
+        _FORWARDED.inc()
+        return response.status_code, reply
+
+    async def claim(self, camera_id: str) -> None:
+        """Call before touching a camera's local state; imports handed-off state."""
+        claimed_at = self._owned.get(camera_id)
+        now = time.monotonic()
+        if claimed_at is None:
+            self._owned[camera_id] = claimed_at = now
+        elif now - claimed_at > self.member_ttl:
+            return
+        state = await self.membership.take_handoff(camera_id)
+        if state:
+            await self.import_state(camera_id, state)
+
+    # Membership.
+
+    async def start(self) -> None:
+        if not self.advertise_url:
+            # Peers would get "" as our URL and handle our cameras themselves.
+            raise RuntimeError("WORKER_ADVERTISE_URL must be set when PARTITIONING_ENABLED is true")
+        await self._refresh()
+        self._task = asyncio.create_task(self._heartbeat_loop(), name="partition-heartbeat")
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self._refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Partition heartbeat failed (%s)", type(e).__name__)
+
+    async def _refresh(self) -> None:
+        urls = await self.membership.heartbeat(self.worker_id, self.advertise_url, self.member_ttl)
+        urls[self.worker_id] = self.advertise_url
+        self._urls = urls
+        PARTITION_MEMBERS.set(len(urls))
+        if set(urls) != self.ring.members:
+            logger.info("Partition membership changed: %s", sorted(urls))
+            self.ring = HashRing(urls, self.vnodes)
+            await self._release(lambda camera_id: self.ring.owner(camera_id) != self.worker_id)
+
+    async def _release(self, moved: Callable[[str], bool]) -> None:
+        for camera_id in [c for c in self._owned if moved(c)]:
+            del self._owned[camera_id]
+            state = await self.export_state(camera_id)
+            if state:
+                await self.membership.put_handoff(camera_id, state, ttl=self.member_ttl * 6)
+
+    async def close(self) -> None:
+        """Leave the ring and hand every owned camera to its next owner."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.membership.leave(self.worker_id)
+            await self._release(lambda camera_id: True)
+        except Exception as e:
+            logger.warning("Could not hand off cameras on shutdown (%s)", type(e).__name__)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_partitioner: Partitioner | None = None
+
+
+def get_partitioner() -> Partitioner:
+    global _partitioner
+    if _partitioner is None:
+        from app.agents.pipeline import get_ingest
+
+        ingest = get_ingest()
+        _partitioner = Partitioner(
+            export_state=ingest.export_camera,
+            import_state=ingest.import_camera,
+            advertise_url=settings.worker_advertise_url or "",
+            heartbeat_interval=settings.worker_heartbeat_seconds,
+            member_ttl=settings.worker_ttl_seconds,
+        )
+    return _partitioner
+
+
+async def close_partitioner() -> None:
+    global _partitioner
+    if _partitioner is not None:
+        await _partitioner.close()
+    _partitioner = None
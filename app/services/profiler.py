@@ -0,0 +1,59 @@
+"""
+In-process sampling profiler.
+
+Samples every thread's Python stack at a fixed interval via ``sys._current_frames()``
+and aggregates them into the folded-stack format (``frame;frame;frame count``)
+consumed by flamegraph.pl, speedscope and inferno. Sampling runs in its own
+thread, so the event loop keeps serving requests while being profiled.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+
+_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _fold(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+def sample(seconds: float, interval: float = 0.005) -> Counter:
+    """Collect folded stacks for ``seconds``; blocking, run it off the event loop."""
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already being collected")
+
+    try:
+        own_thread = threading.get_ident()
+        names = {}
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                if thread_id == own_thread:
+                    continue
+                stacks[f"{names.get(thread_id, thread_id)};{_fold(frame)}"] += 1
+            del frames
+            time.sleep(interval)
+
+        return stacks
+    finally:
+        _lock.release()
+
+
+def to_folded(stacks: Counter) -> str:
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
@@ -0,0 +1,102 @@
+"""
+Adaptive upload intervals for camera phones.
+
+Every scene upload and heartbeat response carries ``upload_interval_seconds``.
+This is how long the phone may wait before its next routine upload. Phones still
+upload at once when their detector's set of objects changes or motion starts.
+The interval only paces uploads of an unchanged view, so a quiet camera can be
+slowed a lot without delaying the first frame of an event.
+
+The interval falls from ``max_interval`` to ``min_interval`` with the camera's
+urgency, on a log scale. Urgency combines three inputs:
+
+* activity: the strongest motion score or detection confidence. It jumps up with
+  the scene, but only decays with a ``half_life``, so a brief lull does not
+  slow a busy camera straight away.
+* rule interest: how much the alert rules that could fire right now (given
+  their time, status and day conditions) care about what is in view. See
+  ``EventAgentImpl.interest``. An alert that fired recently holds urgency at its
+  maximum for ``alert_hold`` seconds.
+* server load: the number of uploads being processed, relative to
+  ``capacity``. Under load, low-urgency cameras are stretched towards
+  ``overload_interval`` first.
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from app.models.scene import CompactScene
+
+
+@dataclass(slots=True)
+class _CameraRate:
+    activity: float
+    interest: float
+    updated_at: float
+    alert_at: float | None = None
+
+
+def scene_activity(scene: CompactScene) -> float:
+    motion = scene.motion_score if scene.motion_score is not None else (1.0 if scene.motion else 0.0)
+    return min(1.0, max([motion] + [o.confidence for o in scene.objects]))
+
+
+class UploadRateController:
+    def __init__(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        overload_interval: float = 120.0,
+        half_life: float = 60.0,
+        alert_hold: float = 120.0,
+        capacity: int = 64,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.overload_interval = overload_interval
+        self.half_life = half_life
+        self.alert_hold = alert_hold
+        self.capacity = capacity
+        self._clock = clock
+        self._cameras: dict[str, _CameraRate] = {}
+
+    def observe(self, scene: CompactScene, interest: float, alerted: bool, depth: int = 0) -> float:
+        """Record an upload and return the camera's next interval."""
+        now = self._clock()
+        state = self._cameras.get(scene.camera_id)
+        level = scene_activity(scene)
+        if state is None:
+            state = self._cameras[scene.camera_id] = _CameraRate(level, interest, now)
+        else:
+            state.activity = max(level, self._decayed(state, now))
+            state.interest = interest
+            state.updated_at = now
+        if alerted:
+            state.alert_at = now
+        return self._interval(state, now, depth)
+
+    def interval(self, camera_id: str, depth: int = 0) -> float:
+        """The camera's current interval without a new scene, e.g. for a heartbeat."""
+        state = self._cameras.get(camera_id)
+        if state is None:
+            return self.max_interval
+        return self._interval(state, self._clock(), depth)
+
+    def forget(self, camera_id: str) -> None:
+        self._cameras.pop(camera_id, None)
+
+    def _decayed(self, state: _CameraRate, now: float) -> float:
+        return state.activity * 0.5 ** ((now - state.updated_at) / self.half_life)
+
+    def _interval(self, state: _CameraRate, now: float, depth: int) -> float:
+        if state.alert_at is not None and now - state.alert_at < self.alert_hold:
+            urgency = 1.0
+        else:
+            # Activity nobody has a rule for still counts a little, for "what's happening?".
+            urgency = self._decayed(state, now) * (0.2 + 0.8 * state.interest)
+        interval = self.max_interval * (self.min_interval / self.max_interval) ** urgency
+        load = min(1.0, depth / self.capacity) if self.capacity else 0.0
+        interval += (self.overload_interval - interval) * load * (1.0 - urgency)
+        return round(max(self.min_interval, interval), 1)
+
@@ -0,0 +1,54 @@
+"""Shared Redis connection pool, created lazily like the DB engines."""
+import time
+from app.config import settings
+
+_pool = None
+_client = None
+
+
+def get_redis():
+    global _pool, _client
+    if _client is None:
+        import redis.asyncio as redis
+
+        _pool = redis.ConnectionPool.from_url(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+        )
+        _client = redis.Redis(connection_pool=_pool)
+    return _client
+
+
+def pool_stats() -> dict:
+    """Connection pool counters for the shared Redis pool (no I/O, safe to poll)."""
+    if _pool is None:
+        return {"initialized": False}
+
+    in_use = len(getattr(_pool, "_in_use_connections", ()))
+    available = len(getattr(_pool, "_available_connections", ()))
+    capacity = _pool.max_connections
+    return {
+        "initialized": True,
+        "size": in_use + available,
+        "checked_in": available,
+        "checked_out": in_use,
+        "capacity": capacity,
+        "exhausted": in_use >= capacity,
+    }
+
+
+async def probe_redis() -> dict:
+    """Round-trip ``PING`` and report its latency."""
+    started = time.perf_counter()
+    await get_redis().ping()
+    return {"latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+
+async def close_redis() -> None:
+    global _pool, _client
+    if _client is not None:
+        await _client.aclose()
+    if _pool is not None:
+        await _pool.disconnect()
+    _pool = None
+    _client = None
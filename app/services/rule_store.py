@@ -0,0 +1,274 @@
+"""
+In-memory copy of the ``alert_rules`` table.
+
+The scene path evaluates rules on every upload, so it must not touch the
+database: :meth:`RuleStore.rules_for` is a dict lookup. The store is loaded once
+and then kept current with Postgres LISTEN/NOTIFY - a trigger (alembic revision
+0004) sends the owning ``user_id`` whenever a rule changes, and only that user's
+rules are reloaded. After a dropped listener connection everything is reloaded,
+since notifications sent meanwhile are lost.
+
+``last_triggered_at`` moves the other way: matches are recorded in memory and
+written back in batches, latest timestamp per rule, so a busy camera does not
+turn into one UPDATE per alert. It is a record of the last match, not cooldown
+state: cooldowns are per camera and live in the event agent.
+"""
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.models.event import AlertRule as AlertRuleModel
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "alert_rules_changed"
+
+
+@dataclass(frozen=True, slots=True)
+class StoredRule:
+    user_id: str
+    camera_id: str | None  # None applies to every camera of the user
+    rule: AlertRuleModel
+    last_triggered_at: datetime | None  # naive UTC, like the rest of the event agent
+
+
+def _naive_utc(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def load_rules(user_id: str | None = None) -> list[StoredRule]:
+    """Rules for one user, or for everyone when ``user_id`` is None."""
+    from sqlalchemy import select
+
+    from app.models.user import AlertRule
+    from app.services.storage import get_session_factory
+
+    query = select(AlertRule)
+    if user_id is not None:
+        query = query.where(AlertRule.user_id == uuid.UUID(user_id))
+    async with get_session_factory()() as session:
+        rows = (await session.scalars(query)).all()
+
+    rules = []
+    for row in rows:
+        try:
+            rule = AlertRuleModel(
+                id=str(row.id),
+                name=row.name,
+                enabled=bool(row.enabled),
+                trigger={"type": row.trigger_type, **(row.trigger_config or {})},
+                conditions=row.conditions or [],
+                cooldown_seconds=row.cooldown_seconds or 0,
+                severity=row.severity or "medium",
+            )
+        except ValueError:
+            # One bad row must not stop everyone else's rules from loading.
+            logger.exception("Skipping invalid alert rule %s", row.id)
+            continue
+        rules.append(StoredRule(
+            user_id=str(row.user_id),
+            camera_id=str(row.camera_id) if row.camera_id else None,
+            rule=rule,
+            last_triggered_at=_naive_utc(row.last_triggered_at),
+        ))
+    return rules
+
+
+def last_triggered_update(triggered: dict[str, datetime]):
+    """
+    The UPDATE and its executemany rows, against the Core table like
+    :func:`app.services.heartbeats.heartbeat_update`. Ids that are not stored
+    rules are left out.
+    """
+    from sqlalchemy import bindparam, update
+
+    from app.models.user import AlertRule
+
+    rules = AlertRule.__table__
+    statement = (
+        update(rules)
+        .where(rules.c.id == bindparam("rule_id"))
+        .values(last_triggered_at=bindparam("triggered_at"))
+    )
+    params = []
+    for rule_id, when in triggered.items():
+        try:
+            params.append({"rule_id": uuid.UUID(rule_id), "triggered_at": when.replace(tzinfo=timezone.utc)})
+        except ValueError:
+            logger.warning("Not writing last_triggered_at for rule %r: not a stored rule id", rule_id)
+    return statement, params
+
+
+async def write_last_triggered(triggered: dict[str, datetime]) -> None:
+    """One executemany UPDATE for every rule that fired since the last flush."""
+    from app.services.storage import get_session_factory
+
+    statement, params = last_triggered_update(triggered)
+    if not params:
+        return
+    async with get_session_factory()() as session:
+        await session.execute(statement, params)
+        await session.commit()
+
+
+class RuleStore:
+    def __init__(
+        self,
+        load: Callable[[str | None], Awaitable[list[StoredRule]]] = load_rules,
+        write_triggers: Callable[[dict[str, datetime]], Awaitable[None]] = write_last_triggered,
+        flush_interval: float = 5.0,
+    ):
+        self._load = load
+        self._write_triggers = write_triggers
+        self.flush_interval = flush_interval
+        self.loaded = False
+        self._by_user: dict[str, list[StoredRule]] = {}
+        self._resolved: dict[tuple[str, str | None], tuple[AlertRuleModel, ...]] = {}
+        self._pending: dict[str, datetime] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    # Scene path: memory only.
+
+    def rules_for(self, user_id: str, camera_id: str | None = None) -> tuple[AlertRuleModel, ...] | None:
+        """
+        The user's rules that apply to ``camera_id`` (user-wide ones first), or None
+        when the user has no stored rules and the caller should use the defaults.
+        """
+        key = (user_id, camera_id)
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            rules = self._by_user.get(user_id)
+            if rules is None:
+                return None
+            applicable = sorted(
+                (r for r in rules if r.camera_id is None or r.camera_id == camera_id),
+                key=lambda r: r.camera_id is not None,
+            )
+            resolved = self._resolved[key] = tuple(r.rule for r in applicable)
+        return resolved
+
+    def record_trigger(self, rule_id: str, when: datetime) -> None:
+        """Remember a match now; it reaches the database with the next flush."""
+        self._pending[rule_id] = when
+
+    # Loading.
+
+    def _replace(self, user_id: str | None, rules: list[StoredRule]) -> None:
+        by_user: dict[str, list[StoredRule]] = {}
+        for stored in rules:
+            by_user.setdefault(stored.user_id, []).append(stored)
+
+        if user_id is None:
+            self._by_user = by_user
+            self._resolved = {}
+        else:
+            if user_id in by_user:
+                self._by_user[user_id] = by_user[user_id]
+            else:
+                self._by_user.pop(user_id, None)
+            self._resolved = {key: value for key, value in self._resolved.items() if key[0] != user_id}
+
+    async def reload(self, user_id: str | None = None) -> None:
+        """Reload one user's rules (after a notification) or all of them."""
+        self._replace(user_id, await self._load(user_id))
+        if user_id is None:
+            self.loaded = True
+
+    # Background tasks.
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._listen(), name="rule-store-listen"),
+                asyncio.create_task(self._flush_periodically(), name="rule-store-flush"),
+            ]
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        backoff = 1.0
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(settings.database_url)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(
+                    NOTIFY_CHANNEL,
+                    lambda _conn, _pid, _channel, payload: asyncio.ensure_future(self._on_notify(payload)),
+                )
+                # Subscribe first, then load, so no change can fall between the two.
+                await self.reload()
+                backoff = 1.0
+                await lost.wait()
+                raise ConnectionError("LISTEN connection closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Alert rule listener unavailable (%s); retrying in %.0fs", type(e).__name__, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+    async def _on_notify(self, user_id: str) -> None:
+        try:
+            await self.reload(user_id)
+        except Exception:
+            logger.exception("Failed to reload alert rules for user %s", user_id)
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            await self._write_triggers(pending)
+        except ValueError:
+            # Bad data fails the same way every time; retrying would block every later flush.
+            logger.exception("Dropping last_triggered_at for %d rules", len(pending))
+        except Exception:
+            logger.exception("Failed to write last_triggered_at for %d rules", len(pending))
+            # Retry with the next flush unless a newer match has superseded it.
+            for rule_id, when in pending.items():
+                self._pending.setdefault(rule_id, when)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        await self.flush()
+
+
+_store: RuleStore | None = None
+
+
+def get_rule_store() -> RuleStore:
+    global _store
+    if _store is None:
+        _store = RuleStore(flush_interval=settings.rule_trigger_flush_interval_seconds)
+        _store.start()
+    return _store
+
+
+async def close_rule_store() -> None:
+    global _store
+    if _store is not None:
+        await _store.close()
+    _store = None
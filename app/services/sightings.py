@@ -0,0 +1,249 @@
+"""
+Last-seen index: (camera, object type) → when it was last seen, its best
+confidence and how often it was seen.
+
+The index is updated as scenes are recorded, so "Is my cat there?" is a dict
+lookup instead of a scan of the scene history. Object words from users and from
+detectors are normalized to one name first ("kitty", "cats" → "cat").
+
+With a :class:`SightingRecorder`, the index survives restarts. Changed entries
+are written behind to one Redis hash per camera (``sightings:<camera>``, field =
+object type), and a camera's hash is read back the first time this process
+touches the camera.
+"""
+import asyncio
+import json
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.models.scene import CompactScene
+
+logger = logging.getLogger(__name__)
+
+SIGHTINGS_PREFIX = "sightings:"
+
+# Word → detector object type. Types map to themselves, so a word is known iff it is a key.
+OBJECT_SYNONYMS: dict[str, str] = {
+    "person": "person", "people": "person", "someone": "person", "somebody": "person",
+    "anyone": "person", "anybody": "person", "man": "person", "woman": "person",
+    "kid": "person", "child": "person", "visitor": "person", "stranger": "person",
+    "cat": "cat", "kitty": "cat", "kitten": "cat", "kittie": "cat",
+    "dog": "dog", "doggy": "dog", "doggie": "dog", "puppy": "dog", "pup": "dog",
+    "package": "package", "parcel": "package", "delivery": "package", "box": "package",
+    "car": "car", "vehicle": "car",
+    "truck": "truck",
+    "bird": "bird",
+}
+
+_WORD = re.compile(r"[a-z]+")
+
+
+def normalize_object_type(word: str) -> str | None:
+    """The object type ``word`` refers to, or None if it is not an object word."""
+    word = word.strip().lower()
+    if word in OBJECT_SYNONYMS:
+        return OBJECT_SYNONYMS[word]
+    # Plurals: "cats", "packages", "puppies"
+    for suffix, replacement in (("ies", "y"), ("es", ""), ("s", "")):
+        if word.endswith(suffix):
+            singular = word[: -len(suffix)] + replacement
+            if singular in OBJECT_SYNONYMS:
+                return OBJECT_SYNONYMS[singular]
+    return None
+
+
+def mentioned_object_types(text: str) -> list[str]:
+    """Object types mentioned in ``text``, in order of first mention."""
+    found: list[str] = []
+    for word in _WORD.findall(text.lower()):
+        object_type = normalize_object_type(word)
+        if object_type is not None and object_type not in found:
+            found.append(object_type)
+    return found
+
+
+def utc_timestamp(timestamp: datetime) -> float:
+    """Unix time of a scene timestamp; naive timestamps are UTC, like datetime.utcnow() elsewhere."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+@dataclass(slots=True)
+class Sighting:
+    last_seen: float  # Unix time
+    confidence: float  # Highest confidence seen
+    count: int
+
+    @property
+    def last_seen_at(self) -> datetime:
+        return datetime.fromtimestamp(self.last_seen, timezone.utc)
+
+
+async def load_sightings(camera_id: str) -> dict[str, list]:
+    from app.services.redis_client import get_redis
+
+    stored = await get_redis().hgetall(SIGHTINGS_PREFIX + camera_id)
+    return {_text(t): json.loads(v) for t, v in stored.items()}
+
+
+async def write_sightings(changed: dict[str, dict[str, list]]) -> None:
+    from app.services.redis_client import get_redis
+
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for camera_id, sightings in changed.items():
+            pipe.hset(SIGHTINGS_PREFIX + camera_id, mapping={t: json.dumps(v) for t, v in sightings.items()})
+        await pipe.execute()
+
+
+def _text(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class SightingRecorder:
+    """Write-behind persistence for :class:`SightingIndex`, flushed every ``flush_interval`` seconds."""
+
+    def __init__(
+        self,
+        load: Callable[[str], Awaitable[dict[str, list]]] = load_sightings,
+        write: Callable[[dict[str, dict[str, list]]], Awaitable[None]] = write_sightings,
+        flush_interval: float = 10.0,
+    ):
+        self.load = load
+        self._write = write
+        self.flush_interval = flush_interval
+        self._pending: dict[str, dict[str, list]] = {}
+        self._task: asyncio.Task | None = None
+
+    def record(self, camera_id: str, object_type: str, sighting: Sighting) -> None:
+        self._pending.setdefault(camera_id, {})[object_type] = [sighting.last_seen, sighting.confidence, sighting.count]
+        if self._task is None:
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._flush_periodically())
+            except RuntimeError:
+                pass  # No loop (scripts); close() or the next flush writes it
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            await self._write(pending)
+        except Exception:
+            logger.exception("Failed to write sightings for %d cameras", len(pending))
+            # Retry with the next flush unless a newer value has superseded it.
+            for camera_id, sightings in pending.items():
+                current = self._pending.setdefault(camera_id, {})
+                for object_type, value in sightings.items():
+                    current.setdefault(object_type, value)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+class SightingIndex:
+    def __init__(self, min_confidence: float = 0.4, recorder: SightingRecorder | None = None):
+        self.min_confidence = min_confidence
+        self.recorder = recorder
+        self._cameras: dict[str, dict[str, Sighting]] = {}
+        # Cameras whose persisted sightings have been read back
+        self._restored: set[str] = set()
+
+    async def restore(self, camera_id: str) -> None:
+        """Merge the camera's persisted sightings in, once per process; a no-op without a recorder."""
+        if self.recorder is None or camera_id in self._restored:
+            return
+        self._restored.add(camera_id)
+        try:
+            stored = await self.recorder.load(camera_id)
+        except Exception as e:
+            logger.warning("Could not load sightings for %s (%s)", camera_id, type(e).__name__)
+            return
+        sightings = self._cameras.setdefault(camera_id, {})
+        for object_type, (last_seen, confidence, count) in stored.items():
+            current = sightings.get(object_type)
+            if current is None:
+                sightings[object_type] = Sighting(last_seen, confidence, count)
+            else:
+                # The stored count already includes whatever this process wrote.
+                current.last_seen = max(current.last_seen, last_seen)
+                current.confidence = max(current.confidence, confidence)
+                current.count = max(current.count, count)
+
+    def observe(self, scene: CompactScene) -> None:
+        sightings = self._cameras.setdefault(scene.camera_id, {})
+        seen_at = utc_timestamp(scene.timestamp)
+        # One scene counts once per type, however many instances it shows.
+        best: dict[str, float] = {}
+        for obj in scene.objects:
+            if obj.confidence < self.min_confidence:
+                continue
+            object_type = normalize_object_type(obj.type) or obj.type.lower()
+            best[object_type] = max(obj.confidence, best.get(object_type, 0.0))
+        for object_type, confidence in best.items():
+            sighting = sightings.get(object_type)
+            if sighting is None:
+                sighting = sightings[object_type] = Sighting(seen_at, confidence, 1)
+            else:
+                # Uploads can arrive out of order; never move last_seen back.
+                sighting.last_seen = max(sighting.last_seen, seen_at)
+                sighting.confidence = max(sighting.confidence, confidence)
+                sighting.count += 1
+            if self.recorder is not None:
+                self.recorder.record(scene.camera_id, object_type, sighting)
+
+    def get(self, camera_id: str, object_type: str) -> Sighting | None:
+        sightings = self._cameras.get(camera_id)
+        return sightings.get(object_type) if sightings else None
+
+    def export_camera(self, camera_id: str) -> dict[str, list]:
+        """Remove and return a camera's sightings as ``{type: [last_seen, confidence, count]}``."""
+        sightings = self._cameras.pop(camera_id, None) or {}
+        self._restored.discard(camera_id)
+        return {t: [s.last_seen, s.confidence, s.count] for t, s in sightings.items()}
+
+    def import_camera(self, camera_id: str, state: dict[str, list]) -> None:
+        sightings = self._cameras.setdefault(camera_id, {})
+        for object_type, (last_seen, confidence, count) in state.items():
+            current = sightings.get(object_type)
+            if current is None:
+                current = sightings[object_type] = Sighting(last_seen, confidence, count)
+            else:
+                current.last_seen = max(current.last_seen, last_seen)
+                current.confidence = max(current.confidence, confidence)
+                current.count += count
+            if self.recorder is not None:
+                self.recorder.record(camera_id, object_type, current)
+
+
+_recorder: SightingRecorder | None = None
+
+
+def get_sighting_recorder() -> SightingRecorder:
+    global _recorder
+    if _recorder is None:
+        _recorder = SightingRecorder(flush_interval=settings.sightings_flush_interval_seconds)
+    return _recorder
+
+
+async def close_sighting_recorder() -> None:
+    global _recorder
+    if _recorder is not None:
+        await _recorder.close()
+    _recorder = None
@@ -0,0 +1,299 @@
+"""
+Snapshot storage, content-addressed by frame hash.
+
+Each image is stored under its sha256 (``ab/cd/abcd….jpg``). Identical frames
+are stored once, and a snapshot URL never changes meaning, so clients and
+proxies may cache it forever. Uploads are streamed: chunks are hashed while
+being spooled to a temporary file on disk, and an image is never held in memory
+whole. The file only moves into place, or is sent to S3, if that hash is not
+already stored.
+
+Snapshot URLs are always ``{snapshot_public_url}/{hash}``. The API serves local
+files from a memory map and redirects S3 snapshots to a short-lived presigned URL.
+Resized variants (see app/services/images.py) are stored next to the original
+as ``<hash>.<variant>.jpg``.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterable
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+CONTENT_TYPE = "image/jpeg"
+IMMUTABLE = "public, max-age=31536000, immutable"
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+class SnapshotTooLarge(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class StoredSnapshot:
+    hash: str
+    size: int
+    created: bool  # False if an identical snapshot was already stored
+
+
+def is_digest(value: str) -> bool:
+    return _DIGEST.fullmatch(value) is not None
+
+
+def snapshot_key(digest: str, variant: str | None = None) -> str:
+    # Two levels of fan-out keep directories (and S3 listing prefixes) small.
+    name = f"{digest}.{variant}" if variant else digest
+    return f"{digest[:2]}/{digest[2:4]}/{name}.jpg"
+
+
+async def _chunks(data: bytes) -> AsyncIterable[bytes]:
+    view = memoryview(data)
+    for offset in range(0, len(view), CHUNK_SIZE):
+        yield view[offset:offset + CHUNK_SIZE]
+
+
+def _temp_file(directory: Path) -> tuple[int, str]:
+    directory.mkdir(parents=True, exist_ok=True)
+    return tempfile.mkstemp(dir=directory, suffix=".part")
+
+
+async def _spool(chunks: AsyncIterable[bytes], directory: Path, max_bytes: int) -> tuple[str, str, int]:
+    """Write ``chunks`` to a temp file in ``directory``; returns (path, sha256, size)."""
+    fd, path = await asyncio.to_thread(_temp_file, directory)
+    hasher = hashlib.sha256()
+    size = 0
+
+    def write(file, chunk: bytes) -> None:
+        hasher.update(chunk)
+        file.write(chunk)
+
+    try:
+        with os.fdopen(fd, "wb") as file:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise SnapshotTooLarge(f"Snapshot exceeds {max_bytes} bytes")
+                # Hashing and the write both release the GIL; neither runs on the loop.
+                await asyncio.to_thread(write, file, chunk)
+        if size == 0:
+            raise ValueError("Empty snapshot")
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, hasher.hexdigest(), size
+
+
+def _move_into_place(spooled: str, target: Path, replace: bool = True) -> bool:
+    """Move a spooled file to ``target``; False (and the spool removed) if it exists and ``replace`` is off."""
+    if not replace and target.exists():
+        os.unlink(spooled)
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Atomic; if an identical upload raced us, it replaces the same bytes.
+    os.replace(spooled, target)
+    return True
+
+
+def _write_file(directory: Path, target: Path, data: bytes) -> None:
+    fd, spooled = _temp_file(directory)
+    with os.fdopen(fd, "wb") as file:
+        file.write(data)
+    _move_into_place(spooled, target)
+
+
+class SnapshotStore:
+    shared = False  # True if every worker reads the same storage
+
+    def __init__(self, public_url: str, max_bytes: int):
+        self.public_url = public_url.rstrip("/")
+        self.max_bytes = max_bytes
+
+    def url(self, digest: str) -> str:
+        return f"{self.public_url}/{digest}"
+
+    async def put(self, data: bytes) -> StoredSnapshot:
+        return await self.put_stream(_chunks(data))
+
+    async def put_stream(self, chunks: AsyncIterable[bytes]) -> StoredSnapshot:
+        raise NotImplementedError
+
+    async def put_variant(self, digest: str, variant: str, data: bytes) -> None:
+        """Store a derived image of ``digest``; variants are small, so they are written whole."""
+        raise NotImplementedError
+
+    async def read(self, digest: str) -> bytes | None:
+        raise NotImplementedError
+
+    async def exists(self, digest: str, variant: str | None = None) -> bool:
+        raise NotImplementedError
+
+    async def locate(self, digest: str, variant: str | None = None) -> Path | str | None:
+        """Where to serve ``digest`` from: a local file, a URL to redirect to, or None if missing."""
+        raise NotImplementedError
+
+
+class LocalSnapshotStore(SnapshotStore):
+    def __init__(self, root: str | Path, public_url: str, max_bytes: int):
+        super().__init__(public_url, max_bytes)
+        self.root = Path(root)
+        self._spool_dir = self.root / "tmp"
+
+    def path(self, digest: str, variant: str | None = None) -> Path:
+        return self.root / snapshot_key(digest, variant)
+
+    async def put_stream(self, chunks: AsyncIterable[bytes]) -> StoredSnapshot:
+        spooled, digest, size = await _spool(chunks, self._spool_dir, self.max_bytes)
+        created = await asyncio.to_thread(_move_into_place, spooled, self.path(digest), False)
+        return StoredSnapshot(digest, size, created=created)
+
+    async def put_variant(self, digest: str, variant: str, data: bytes) -> None:
+        await asyncio.to_thread(_write_file, self._spool_dir, self.path(digest, variant), data)
+
+    async def read(self, digest: str) -> bytes | None:
+        try:
+            return await asyncio.to_thread(self.path(digest).read_bytes)
+        except FileNotFoundError:
+            return None
+
+    async def exists(self, digest: str, variant: str | None = None) -> bool:
+        return await asyncio.to_thread(self.path(digest, variant).exists)
+
+    async def locate(self, digest: str, variant: str | None = None) -> Path | None:
+        path = self.path(digest, variant)
+        return path if await asyncio.to_thread(path.exists) else None
+
+
+def _is_not_found(error: Exception) -> bool:
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+class S3SnapshotStore(SnapshotStore):
+    """S3-compatible backend (AWS, R2, MinIO). boto3 is blocking, so calls run in a thread."""
+
+    shared = True
+
+    def __init__(
+        self,
+        bucket: str,
+        public_url: str,
+        max_bytes: int,
+        spool_dir: str | Path,
+        client=None,
+        prefix: str = "snapshots/",
+        url_expiry: int = 3600,
+    ):
+        super().__init__(public_url, max_bytes)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.url_expiry = url_expiry
+        self._spool_dir = Path(spool_dir)
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client(
+                "s3",
+                region_name=settings.aws_region,
+                endpoint_url=settings.s3_endpoint_url,
+                aws_access_key_id=settings.aws_access_key_id,
+                aws_secret_access_key=settings.aws_secret_access_key,
+            )
+        return self._client
+
+    def key(self, digest: str, variant: str | None = None) -> str:
+        return self.prefix + snapshot_key(digest, variant)
+
+    async def put_stream(self, chunks: AsyncIterable[bytes]) -> StoredSnapshot:
+        spooled, digest, size = await _spool(chunks, self._spool_dir, self.max_bytes)
+
+        def upload() -> None:
+            with open(spooled, "rb") as file:
+                # upload_fileobj reads the file in parts; nothing is loaded whole.
+                self.client.upload_fileobj(
+                    file,
+                    self.bucket,
+                    self.key(digest),
+                    ExtraArgs={"ContentType": CONTENT_TYPE, "CacheControl": IMMUTABLE},
+                )
+
+        try:
+            if await self.exists(digest):
+                return StoredSnapshot(digest, size, created=False)
+            await asyncio.to_thread(upload)
+        finally:
+            os.unlink(spooled)
+        return StoredSnapshot(digest, size, created=True)
+
+    async def put_variant(self, digest: str, variant: str, data: bytes) -> None:
+        await asyncio.to_thread(
+            self.client.put_object,
+            Bucket=self.bucket,
+            Key=self.key(digest, variant),
+            Body=data,
+            ContentType=CONTENT_TYPE,
+            CacheControl=IMMUTABLE,
+        )
+
+    async def read(self, digest: str) -> bytes | None:
+        def read() -> bytes | None:
+            try:
+                response = self.client.get_object(Bucket=self.bucket, Key=self.key(digest))
+            except Exception as e:
+                if _is_not_found(e):
+                    return None
+                raise
+            return response["Body"].read()
+
+        return await asyncio.to_thread(read)
+
+    async def exists(self, digest: str, variant: str | None = None) -> bool:
+        try:
+            await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=self.key(digest, variant))
+        except Exception as e:
+            if _is_not_found(e):
+                return False
+            raise
+        return True
+
+    async def locate(self, digest: str, variant: str | None = None) -> str | None:
+        if not await self.exists(digest, variant):
+            return None
+        # Presigning is local (no request), so it doesn't need a thread.
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.key(digest, variant)},
+            ExpiresIn=self.url_expiry,
+        )
+
+
+_store: SnapshotStore | None = None
+
+
+def get_snapshot_store() -> SnapshotStore:
+    global _store
+    if _store is None:
+        if settings.storage_type == "s3":
+            if not settings.s3_bucket:
+                raise ValueError("S3_BUCKET must be set when STORAGE_TYPE=s3")
+            _store = S3SnapshotStore(
+                settings.s3_bucket,
+                settings.snapshot_public_url,
+                settings.snapshot_max_bytes,
+                spool_dir=Path(tempfile.gettempdir()) / "homey-snapshots",
+                url_expiry=settings.s3_url_expiry_seconds,
+            )
+        else:
+            _store = LocalSnapshotStore(settings.snapshot_dir, settings.snapshot_public_url, settings.snapshot_max_bytes)
+    return _store
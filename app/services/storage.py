@@ -1,28 +1,141 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
+import time
+from typing import Any
+from sqlalchemy.orm import declarative_base
 from app.config import settings
+from app.services.metrics import DB_POOL_WAIT
 
 Base = declarative_base()
 
-sync_engine = create_engine(
-    settings.database_url.replace("postgresql://", "postgresql+psycopg2://"),
-    pool_pre_ping=True,
-)
+# Engines are created on first use (or at lifespan startup) rather than at import
+# time, so importing models or the app does not pull in asyncpg/psycopg2.
+_sync_engine = None
+_async_engine = None
+_session_factory = None
 
-async_engine = create_async_engine(
-    settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
-    pool_pre_ping=True,
-    echo=settings.debug,
-)
 
-AsyncSessionLocal = async_sessionmaker(
-    async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+def get_sync_engine():
+    global _sync_engine
+    if _sync_engine is None:
+        from sqlalchemy import create_engine
+
+        _sync_engine = create_engine(
+            settings.database_url.replace("postgresql://", "postgresql+psycopg2://"),
+            pool_pre_ping=True,
+        )
+    return _sync_engine
+
+
+_timed_pools: dict[type, type] = {}
+
+
+def timed_pool(base: type) -> type:
+    """``base`` (a SQLAlchemy pool class) with checkout wait time observed in DB_POOL_WAIT."""
+    pool_class = _timed_pools.get(base)
+    if pool_class is None:
+        def _do_get(self):
+            # Waiting for a free connection, or a timeout when the pool stays exhausted.
+            started = time.perf_counter()
+            try:
+                return base._do_get(self)
+            finally:
+                DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+        pool_class = _timed_pools[base] = type(f"Timed{base.__name__}", (base,), {"_do_get": _do_get})
+    return pool_class
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+        _async_engine = create_async_engine(
+            settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
+            poolclass=timed_pool(AsyncAdaptedQueuePool),
+            pool_pre_ping=True,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            echo=settings.debug,
+        )
+    return _async_engine
+
+
+def get_session_factory():
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+        _session_factory = async_sessionmaker(
+            get_async_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+    return _session_factory
+
+
+def pool_stats() -> dict:
+    """Connection pool counters for the async engine (no I/O, safe to poll)."""
+    if _async_engine is None:
+        return {"initialized": False}
+
+    pool = _async_engine.pool
+    size = pool.size()
+    checked_out = pool.checkedout()
+    capacity = size + max(getattr(pool, "_max_overflow", 0), 0)
+    return {
+        "initialized": True,
+        "size": size,
+        "checked_in": pool.checkedin(),
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "capacity": capacity,
+        "timeout_seconds": pool.timeout(),
+        "exhausted": capacity > 0 and checked_out >= capacity,
+    }
+
+
+async def probe_database() -> dict:
+    """Round-trip ``SELECT 1``, timing pool acquisition and the query separately."""
+    from sqlalchemy import text
+
+    started = time.perf_counter()
+    async with get_async_engine().connect() as conn:
+        acquired = time.perf_counter()
+        await conn.execute(text("SELECT 1"))
+        finished = time.perf_counter()
+
+    return {
+        "acquire_ms": round((acquired - started) * 1000, 2),
+        "query_ms": round((finished - acquired) * 1000, 2),
+        "latency_ms": round((finished - started) * 1000, 2),
+    }
+
+
+async def dispose_engines() -> None:
+    """Release pooled connections; called from the app lifespan on shutdown."""
+    global _sync_engine, _async_engine, _session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _sync_engine is not None:
+        _sync_engine.dispose()
+    _sync_engine = None
+    _async_engine = None
+    _session_factory = None
+
+
+def __getattr__(name: str) -> Any:
+    # Backwards-compatible lazy access to the old module-level names.
+    if name == "sync_engine":
+        return get_sync_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    if name == "AsyncSessionLocal":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def get_db():
-    async with AsyncSessionLocal() as session:
+    async with get_session_factory()() as session:
         yield session
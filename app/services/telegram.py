@@ -6,6 +6,7 @@ from telegram.error import TelegramError
 from telegram.constants import ParseMode
 
 from app.models.message import OutgoingMessage, InlineKeyboardButton as InlineKeyboardButtonModel
+from app.services.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +18,19 @@ class TelegramBotClient:
     via python-telegram-bot library.
     """
 
-    def __init__(self, token: str):
+    def __init__(self, token: str, base_url: Optional[str] = None):
         """
         Initialize Telegram Bot client.
 
         Args:
             token: Telegram Bot API token from @BotFather
+            base_url: Optional Bot API server URL (e.g. "http://127.0.0.1:8081/bot"),
+                for self-hosted Bot API servers or local fakes
         """
-        self.bot = Bot(token=token)
+        if base_url:
+            self.bot = Bot(token=token, base_url=base_url)
+        else:
+            self.bot = Bot(token=token)
         logger.info("TelegramBotClient initialized")
 
     async def send_message(
@@ -164,6 +170,7 @@ class TelegramBotClient:
             logger.error(f"Failed to send interactive message to {chat_id}: {e}")
             raise
 
+    @traced("telegram.send")
     async def send(self, chat_id: int, message: OutgoingMessage) -> bool:
         """
         Send a message based on OutgoingMessage schema.
@@ -0,0 +1,140 @@
+"""
+Typed decoding of Telegram webhook updates.
+
+``Update.de_json`` builds python-telegram-bot's full object graph (users, chats,
+entities, ...) for every update, and most of it is never read. This module
+declares only the fields :class:`IncomingMessage` needs and lets pydantic-core
+validate the raw webhook body against that schema in one pass; unknown fields
+are skipped while parsing. Text, photo, location and callback-query updates are
+decoded here. Anything else (edited messages, stickers, channel posts, ...) is
+returned undecoded with its raw body, and the transport falls back to
+``Update.de_json`` for it, so those keep behaving exactly as before.
+"""
+import json
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+from pydantic import TypeAdapter, ValidationError
+from typing_extensions import Required, TypedDict
+
+from app.models.message import IncomingMessage
+from app.services.metrics import TELEGRAM_UPDATES
+
+_TYPED = TELEGRAM_UPDATES.labels("typed")
+_FALLBACK = TELEGRAM_UPDATES.labels("fallback")
+
+
+class _User(TypedDict, total=False):
+    id: Required[int]
+    username: str
+
+
+class _PhotoSize(TypedDict):
+    file_id: str
+
+
+class _Location(TypedDict):
+    # int | float, so "52" stays 52 in the content, as it does with Update.de_json.
+    latitude: Union[int, float]
+    longitude: Union[int, float]
+
+
+_Message = TypedDict("_Message", {
+    "message_id": Required[int],
+    "date": Required[int],
+    "from": _User,
+    "text": str,
+    "caption": str,
+    "photo": list[_PhotoSize],
+    "location": _Location,
+}, total=False)
+
+_CallbackQuery = TypedDict("_CallbackQuery", {
+    "from": Required[_User],
+    "data": str,
+    "message": _Message,
+}, total=False)
+
+
+class _Update(TypedDict, total=False):
+    update_id: int
+    message: _Message
+    callback_query: _CallbackQuery
+
+
+_UPDATE = TypeAdapter(_Update)
+
+
+class DecodedUpdate:
+    """``message`` is None when the update needs ``Update.de_json`` (see ``raw``)."""
+
+    __slots__ = ("update_id", "message", "raw")
+
+    def __init__(self, update_id: Optional[int], message: Optional[IncomingMessage], raw: bytes | str | dict):
+        self.update_id = update_id
+        self.message = message
+        self.raw = raw
+
+
+def decode_update(body: bytes | str | dict) -> DecodedUpdate:
+    """Decode a webhook body (or an already parsed update); raises ValueError if it is not a JSON object."""
+    try:
+        update = _UPDATE.validate_python(body) if isinstance(body, dict) else _UPDATE.validate_json(body)
+    except ValidationError:
+        # Not the shape this schema expects (or not JSON): let Update.de_json have it.
+        raw = body if isinstance(body, dict) else json.loads(body)
+        if not isinstance(raw, dict):
+            raise ValueError("Telegram update is not a JSON object")
+        _FALLBACK.inc()
+        update_id = raw.get("update_id")
+        return DecodedUpdate(update_id if isinstance(update_id, int) else None, None, raw)
+
+    message = _to_incoming(update)
+    (_TYPED if message is not None else _FALLBACK).inc()
+    return DecodedUpdate(update.get("update_id"), message, body)
+
+
+def _to_incoming(update: _Update) -> Optional[IncomingMessage]:
+    """Mirror of TelegramTransport's mapping from an ``Update``; None where that would not succeed."""
+    msg = update.get("message")
+    if msg is not None:
+        sender = msg.get("from")
+        if sender is None:
+            return None
+        content = media_file_id = None
+        if msg.get("text"):
+            message_type, content = "text", msg["text"]
+        elif msg.get("photo"):
+            # Largest size last
+            message_type, media_file_id, content = "photo", msg["photo"][-1]["file_id"], msg.get("caption")
+        elif msg.get("location"):
+            location = msg["location"]
+            message_type, content = "location", f"{location['latitude']},{location['longitude']}"
+        else:
+            return None
+        return _incoming(msg["message_id"], sender, msg["date"], message_type, content, media_file_id=media_file_id)
+
+    query = update.get("callback_query")
+    if query is not None:
+        if query.get("message") is None:
+            return None
+        data = query.get("data")
+        return _incoming(
+            query["message"]["message_id"], query["from"], query["message"]["date"], "callback_query", data,
+            callback_data=data,
+        )
+    return None
+
+
+def _incoming(message_id: int, sender: _User, date: int, message_type: str, content: Optional[str], **media) -> Optional[IncomingMessage]:
+    if not message_id or not sender["id"]:
+        return None
+    return IncomingMessage(
+        message_id=message_id,
+        sender_telegram_id=sender["id"],
+        sender_username=sender.get("username"),
+        timestamp=datetime.fromtimestamp(date, timezone.utc),
+        type=message_type,
+        content=content,
+        **media,
+    )
@@ -0,0 +1,125 @@
+"""
+Per-camera activity timeline at one-minute resolution.
+
+For each camera and channel ("motion", or an object type such as "cat") the
+timeline keeps one bitset per UTC day: bit ``m`` is set if the channel was
+active in minute ``m`` of that day. A day of one channel is at most 180 bytes,
+however many scenes were uploaded. Range queries turn the bits into merged
+intervals, so questions like "when was there motion today?" and the
+``recent_events`` section of the LLM prompt never read raw scenes.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+
+from app.models.scene import CompactScene
+from app.services.sightings import normalize_object_type, utc_timestamp
+
+MOTION = "motion"
+MINUTES_PER_DAY = 24 * 60
+
+_RUN = re.compile("1+")
+
+Interval = tuple[datetime, datetime]
+
+
+def _minute(at: datetime) -> int:
+    return int(utc_timestamp(at) // 60)
+
+
+def _at(minute: int) -> datetime:
+    # Naive UTC, like scene timestamps and datetime.utcnow().
+    return datetime.fromtimestamp(minute * 60, timezone.utc).replace(tzinfo=None)
+
+
+class ActivityTimeline:
+    def __init__(self, retention_days: int = 7, min_confidence: float = 0.4):
+        self.retention_days = retention_days
+        self.min_confidence = min_confidence
+        # camera_id → channel → day number (days since the epoch) → minute bitset
+        self._cameras: dict[str, dict[str, dict[int, int]]] = {}
+
+    def observe(self, scene: CompactScene) -> None:
+        channels = {MOTION} if scene.motion else set()
+        for obj in scene.objects:
+            if obj.confidence >= self.min_confidence:
+                channels.add(normalize_object_type(obj.type) or obj.type.lower())
+        if not channels:
+            return
+        day, bit = divmod(_minute(scene.timestamp), MINUTES_PER_DAY)
+        camera = self._cameras.setdefault(scene.camera_id, {})
+        for channel in channels:
+            days = camera.setdefault(channel, {})
+            if day not in days:
+                # A new day is the only time old ones can fall out of retention.
+                for expired in [d for d in days if d <= day - self.retention_days]:
+                    del days[expired]
+            days[day] = days.get(day, 0) | (1 << bit)
+
+    def intervals(self, camera_id: str, channel: str, since: datetime, until: datetime, gap_minutes: int = 1) -> list[Interval]:
+        """
+        Merged ``[start, end)`` intervals in which ``channel`` was active. Runs separated
+        by at most ``gap_minutes`` quiet minutes are merged, since cameras upload
+        less often than once a minute while idle.
+        """
+        days = self._cameras.get(camera_id, {}).get(channel)
+        if not days:
+            return []
+        first, last = _minute(since), _minute(until)
+        runs: list[list[int]] = []
+        for day in range(first // MINUTES_PER_DAY, last // MINUTES_PER_DAY + 1):
+            bits = days.get(day)
+            if not bits:
+                continue
+            offset = day * MINUTES_PER_DAY
+            # Clip to [first, last]
+            low, high = max(first - offset, 0), min(last - offset, MINUTES_PER_DAY - 1)
+            bits &= ((1 << (high + 1)) - 1) & ~((1 << low) - 1)
+            # Reversed binary string: character i is minute i of the day.
+            for run in _RUN.finditer(format(bits, "b")[::-1]):
+                start, end = offset + run.start(), offset + run.end()
+                if runs and start - runs[-1][1] <= gap_minutes:
+                    runs[-1][1] = end
+                else:
+                    runs.append([start, end])
+        return [(_at(start), _at(end)) for start, end in runs]
+
+    def activity(self, camera_id: str, since: datetime, until: datetime) -> dict[str, list[Interval]]:
+        """Intervals for every channel that was active between ``since`` and ``until``."""
+        found = {}
+        for channel in self._cameras.get(camera_id, {}):
+            intervals = self.intervals(camera_id, channel, since, until)
+            if intervals:
+                found[channel] = intervals
+        return found
+
+    def export_camera(self, camera_id: str) -> dict[str, dict[str, str]]:
+        """Remove and return a camera's timeline as ``{channel: {day: hex bitset}}``."""
+        camera = self._cameras.pop(camera_id, None) or {}
+        return {channel: {str(day): format(bits, "x") for day, bits in days.items()} for channel, days in camera.items()}
+
+    def import_camera(self, camera_id: str, state: dict[str, dict[str, str]]) -> None:
+        camera = self._cameras.setdefault(camera_id, {})
+        for channel, days in state.items():
+            merged = camera.setdefault(channel, {})
+            for day, bits in days.items():
+                merged[int(day)] = merged.get(int(day), 0) | int(bits, 16)
+
+
+def format_intervals(intervals: list[Interval], limit: int = 5) -> str:
+    """``08:12–08:20, 14:02`` for the most recent ``limit`` intervals (times in UTC)."""
+    parts = []
+    for start, end in intervals[-limit:]:
+        last_minute = end - timedelta(minutes=1)
+        parts.append(start.strftime("%H:%M") if last_minute == start else f"{start:%H:%M}–{last_minute:%H:%M}")
+    if len(intervals) > limit:
+        parts.insert(0, "…")
+    return ", ".join(parts)
+
+
+def summarize_activity(activity: dict[str, list[Interval]]) -> str:
+    """The ``recent_events`` section of the conversation prompt."""
+    if not activity:
+        return "None"
+    # Motion first, then object types by most recent activity.
+    channels = sorted(activity, key=lambda c: (c != MOTION, -activity[c][-1][1].timestamp()))
+    return "\n".join(f"- {channel.capitalize()}: {format_intervals(activity[channel])} (UTC)" for channel in channels)
@@ -0,0 +1,211 @@
+"""
+Lightweight per-update tracing.
+
+Spans are tracked through a context variable so nested awaits pick up the right
+parent without threading a trace object through every agent. When the root span
+of a trace finishes, the whole timeline is appended to ``tracing_export_path`` as
+one OTLP/JSON ``ExportTraceServiceRequest`` per line, which OpenTelemetry tooling
+(collector file receiver, Jaeger/Tempo importers) can ingest as-is.
+"""
+import asyncio
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    __slots__ = (
+        "trace", "trace_id", "span_id", "parent_id", "name",
+        "start_ns", "end_ns", "attributes", "status", "_token",
+    )
+
+    def __init__(self, name: str, parent: "Span | None", attributes: dict):
+        self.trace: list[Span] = parent.trace if parent else []
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.start_ns = 0
+        self.end_ns = 0
+        self.attributes = attributes
+        self.status = STATUS_UNSET
+        self._token = None
+        self.trace.append(self)
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.time_ns()
+        if exc_type is not None:
+            self.status = STATUS_ERROR
+            self.attributes["exception.type"] = exc_type.__name__
+        _current_span.reset(self._token)
+        if self.parent_id is None:
+            _exporter.export(self.trace)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Shared stand-in used when tracing is disabled, so call sites cost nothing."""
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class FileExporter:
+    """
+    Appends finished traces to a JSON-lines file in OTLP/JSON format.
+
+    ``export`` runs when a root span closes, usually on the event loop, so it only
+    queues the line. A worker thread appends everything queued in one write.
+    Without a running loop (scripts, worker threads) the write happens inline.
+    Past ``max_pending`` queued traces, new ones are dropped.
+    """
+
+    def __init__(self, path: str | None = None, max_pending: int = 10_000):
+        self.path = path
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending: list[tuple[str, str]] = []
+        self._writing = False
+        self._writer: asyncio.Future | None = None
+        self.dropped = 0
+
+    def export(self, spans: list[Span]) -> None:
+        path = self.path or settings.tracing_export_path
+        record = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", settings.app_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append((path, line))
+            if self._writing:
+                # The running writer picks it up before it stops.
+                return
+            self._writing = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_pending()
+            return
+        self._writer = loop.run_in_executor(None, self._write_pending)
+
+    async def flush(self) -> None:
+        """Wait until every queued trace is written."""
+        while self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+
+    def _write_pending(self) -> None:
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if not batch:
+                    self._writing = False
+                    return
+            by_path: dict[str, list[str]] = {}
+            for path, line in batch:
+                by_path.setdefault(path, []).append(line)
+            for path, lines in by_path.items():
+                try:
+                    directory = os.path.dirname(path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + "\n")
+                except OSError as e:
+                    logger.warning(f"Failed to export {len(lines)} traces: {e}")
+
+
+_exporter = FileExporter()
+
+
+async def flush_traces() -> None:
+    """Write out traces that are still queued (shutdown, tests)."""
+    await _exporter.flush()
+
+
+def span(name: str, **attributes):
+    """Start a span as a child of the current one (or a new trace if there is none)."""
+    if not settings.tracing_enabled:
+        return _NOOP_SPAN
+    return Span(name, _current_span.get(), attributes)
+
+
+def current_span() -> "Span | _NoopSpan":
+    return _current_span.get() or _NOOP_SPAN
+
+
+def traced(name: str):
+    """Decorator wrapping an async function in a span."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,240 @@
+"""
+Selective vision enhancement of uploaded frames.
+
+Phones run a small on-device detector and upload its detections with every
+scene. The vision model only sees a frame when it could add information:
+
+* a new object type appears, meaning one not seen on this camera within
+  ``settle_seconds``. Objects that stay in view are not re-sent on every frame.
+* a detection is ambiguous, with confidence between ``ignore_below`` and
+  ``ambiguous_below``, and its type has not been checked recently.
+
+Escalated frames are collected for up to ``batch_wait`` seconds and sent
+together in one multimodal request of at most ``batch_size`` frames. Each
+camera spends from its own ``budget_per_hour`` token bucket. Results are
+cached by frame hash, so a re-uploaded frame costs nothing.
+
+Enhancement runs after the upload has been answered. It fills
+``scene.enhancement`` in place, so later conversation turns see it.
+"""
+import asyncio
+import base64
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.models.scene import CompactScene, DetectedObject, SceneEnhancement
+from app.services.metrics import CACHE_LOOKUPS, VISION_FRAMES
+from app.utils.cache import MISSING, TTLCache
+
+logger = logging.getLogger(__name__)
+
+Describe = Callable[[list[bytes], list[list[dict]]], Awaitable[list[dict]]]
+
+_SKIPPED = VISION_FRAMES.labels("skipped")
+_CACHED = VISION_FRAMES.labels("cached")
+_JOINED = VISION_FRAMES.labels("joined")
+_OVER_BUDGET = VISION_FRAMES.labels("over_budget")
+_QUEUED = VISION_FRAMES.labels("queued")
+_ENHANCED = VISION_FRAMES.labels("enhanced")
+_FAILED = VISION_FRAMES.labels("failed")
+_CACHE_HIT = CACHE_LOOKUPS.labels("vision_frames", "hit")
+_CACHE_MISS = CACHE_LOOKUPS.labels("vision_frames", "miss")
+
+
+def frame_hash(frame: bytes) -> str:
+    return hashlib.sha256(frame).hexdigest()
+
+
+async def describe_on_worker(frames: list[bytes], detections: list[list[dict]]) -> list[dict]:
+    """Run one batch as a ``vision`` queue task and wait for its result."""
+    from app.worker import enqueue
+
+    encoded = [base64.b64encode(frame).decode("ascii") for frame in frames]
+    handle = await enqueue("vision.enhance_frames", encoded, detections)
+    return await handle.result()
+
+
+class SceneEnhancer:
+    def __init__(
+        self,
+        describe: Describe = describe_on_worker,
+        batch_size: int = 4,
+        batch_wait: float = 2.0,
+        budget_per_hour: float = 30,
+        ignore_below: float = 0.4,
+        ambiguous_below: float = 0.7,
+        settle_seconds: float = 60.0,
+        cache_size: int = 2048,
+        cache_ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._describe = describe
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.budget_per_hour = budget_per_hour
+        self.ignore_below = ignore_below
+        self.ambiguous_below = ambiguous_below
+        self.settle_seconds = settle_seconds
+        self._clock = clock
+        self._cache = TTLCache(cache_size, cache_ttl, clock)
+        # camera_id → object type id → scene timestamp it was last seen or checked
+        self._seen: dict[str, dict[int, float]] = {}
+        # camera_id → (tokens, refilled_at)
+        self._budgets: dict[str, tuple[float, float]] = {}
+        # frame hash → scenes waiting for it, whether batched or in flight
+        self._waiting: dict[str, list[tuple[CompactScene, str]]] = {}
+        self._batch: list[tuple[str, bytes, list[dict]]] = []
+        self._timer: asyncio.Task | None = None
+        self._in_flight: set[asyncio.Task] = set()
+
+    def escalation_reason(self, scene: CompactScene) -> str | None:
+        """Why ``scene`` should go to the vision model, or None; updates what the camera has seen."""
+        seen = self._seen.setdefault(scene.camera_id, {})
+        now = scene.timestamp.timestamp()
+        reason = None
+        for obj in scene.objects:
+            if obj.confidence < self.ignore_below:
+                continue
+            last = seen.get(obj.type_id)
+            if reason is None and (last is None or now - last > self.settle_seconds):
+                reason = "new_object" if obj.confidence >= self.ambiguous_below else "ambiguous"
+            seen[obj.type_id] = now
+        return reason
+
+    def submit(self, scene: CompactScene, frame: bytes) -> str:
+        """Queue ``frame`` for enhancement if it is worth it; returns the outcome, never blocks."""
+        reason = self.escalation_reason(scene)
+        if reason is None:
+            _SKIPPED.inc()
+            return "skipped"
+
+        key = scene.frame_hash or frame_hash(frame)
+        scene.frame_hash = key
+        cached = self._cache.get(key)
+        if cached is not MISSING:
+            _CACHE_HIT.inc()
+            _CACHED.inc()
+            _apply(scene, cached, reason)
+            return "cached"
+        _CACHE_MISS.inc()
+
+        waiting = self._waiting.get(key)
+        if waiting is not None:
+            waiting.append((scene, reason))
+            _JOINED.inc()
+            return "joined"
+
+        if not self._take_budget(scene.camera_id):
+            _OVER_BUDGET.inc()
+            return "over_budget"
+
+        self._waiting[key] = [(scene, reason)]
+        detections = [{"type": o.type, "confidence": o.confidence} for o in scene.objects]
+        self._batch.append((key, frame, detections))
+        _QUEUED.inc()
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return "queued"
+
+    def _take_budget(self, camera_id: str) -> bool:
+        now = self._clock()
+        tokens, refilled_at = self._budgets.get(camera_id, (self.budget_per_hour, now))
+        tokens = min(self.budget_per_hour, tokens + (now - refilled_at) * self.budget_per_hour / 3600)
+        if tokens < 1:
+            self._budgets[camera_id] = (tokens, now)
+            return False
+        self._budgets[camera_id] = (tokens - 1, now)
+        return True
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.batch_wait)
+        self._timer = None
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _run(self, batch: list[tuple[str, bytes, list[dict]]]) -> None:
+        keys = [key for key, _, _ in batch]
+        enhancements: list[SceneEnhancement] | None = None
+        try:
+            results = await self._describe([frame for _, frame, _ in batch], [d for _, _, d in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Expected {len(batch)} frame descriptions, got {len(results)}")
+            enhancements = [
+                SceneEnhancement(
+                    description=str(result.get("description", "")),
+                    objects=[DetectedObject.model_validate(o) for o in result.get("objects", [])],
+                    reason="new_object",
+                )
+                for result in results
+            ]
+        except Exception:
+            logger.exception("Vision enhancement of %d frames failed", len(batch))
+            _FAILED.inc(len(batch))
+        finally:
+            # Failed or cancelled: release every waiting key so a later upload of the frame can try again.
+            if enhancements is None:
+                for key in keys:
+                    self._waiting.pop(key, None)
+        if enhancements is None:
+            return
+
+        for key, enhancement in zip(keys, enhancements):
+            self._cache.set(key, enhancement)
+            for scene, reason in self._waiting.pop(key, ()):
+                _apply(scene, enhancement, reason)
+                _ENHANCED.inc()
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Send whatever is batched and wait up to ``timeout`` seconds for outstanding requests."""
+        self._flush()
+        if not self._in_flight:
+            return
+        _, pending = await asyncio.wait(set(self._in_flight), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _apply(scene: CompactScene, enhancement: SceneEnhancement, reason: str) -> None:
+    scene.enhancement = enhancement if enhancement.reason == reason else enhancement.model_copy(update={"reason": reason})
+    scene.enhanced = True
+
+
+_enhancer: SceneEnhancer | None = None
+
+
+def get_enhancer() -> SceneEnhancer:
+    global _enhancer
+    if _enhancer is None:
+        _enhancer = SceneEnhancer(
+            batch_size=settings.vision_batch_size,
+            batch_wait=settings.vision_batch_wait_seconds,
+            budget_per_hour=settings.vision_budget_per_hour,
+            ignore_below=settings.vision_ignore_below,
+            ambiguous_below=settings.vision_ambiguous_below,
+            settle_seconds=settings.vision_settle_seconds,
+            cache_size=settings.vision_cache_size,
+            cache_ttl=settings.vision_cache_ttl_seconds,
+        )
+    return _enhancer
+
+
+async def close_enhancer() -> None:
+    global _enhancer
+    if _enhancer is not None:
+        await _enhancer.close()
+    _enhancer = None
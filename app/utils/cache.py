@@ -0,0 +1,47 @@
+"""In-process LRU cache with per-entry expiry."""
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU map whose entries also expire ``ttl`` seconds after being set.
+    Expired entries are dropped lazily on lookup; the LRU bound keeps memory flat.
+    Not thread-safe - use from the event loop thread only.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default=MISSING):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value, ttl: float | None = None) -> None:
+        self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
@@ -0,0 +1,44 @@
+"""
+JPEG resizing, run inside the image process pool.
+
+This module is imported by every pool worker, so it only depends on Pillow and
+the standard library, and worker start-up stays cheap.
+"""
+import io
+
+# Variant → (longest side in px, JPEG quality)
+VARIANTS: dict[str, tuple[int, int]] = {
+    "thumb": (320, 70),
+    "vision": (768, 85),  # Enough detail for the vision model, a fraction of the tokens
+    "telegram": (1280, 82),  # Telegram recompresses photos to 1280px anyway
+}
+
+
+def render(data: bytes, variants: tuple[str, ...]) -> dict[str, bytes]:
+    """Decode ``data`` once and encode each requested variant."""
+    from PIL import Image, ImageOps
+
+    largest = max(VARIANTS[name][0] for name in variants)
+    with Image.open(io.BytesIO(data)) as source:
+        source_format, source_size = source.format, source.size
+        # For JPEG, decode at the smallest DCT scale that still covers the largest
+        # variant: much faster than decoding full size and resizing afterwards.
+        source.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        rendered = {}
+        # Largest first, each resized from the previous one rather than from the full frame.
+        for name in sorted(variants, key=lambda name: -VARIANTS[name][0]):
+            side, quality = VARIANTS[name]
+            image = image.copy()
+            image.thumbnail((side, side), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=side >= 640)
+            encoded = buffer.getvalue()
+            # A small, already-compressed JPEG can come out larger; keep the original then.
+            if source_format == "JPEG" and len(encoded) >= len(data) and max(source_size) <= side:
+                encoded = data
+            rendered[name] = encoded
+    return rendered
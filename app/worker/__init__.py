@@ -0,0 +1,21 @@
+"""
+Background tasks: alert delivery, vision enhancement, snapshot processing and
+maintenance, each on its own queue.
+
+Enqueue with ``await enqueue("alerts.deliver", telegram_id, text)``. Run the
+workers with ``celery -A app.worker worker -Q <queues>``. Celery is only imported
+when the app is requested, so the API process does not load it in eager mode.
+"""
+from app.worker.dispatch import TaskHandle, close_dispatcher, enqueue, get_dispatcher
+from app.worker.registry import task
+
+__all__ = ["TaskHandle", "close_dispatcher", "enqueue", "get_dispatcher", "task"]
+
+
+def __getattr__(name: str):
+    # `celery -A app.worker` looks for an attribute named `app` or `celery`.
+    if name in ("app", "celery"):
+        from app.worker.celery_app import get_celery_app
+
+        return get_celery_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
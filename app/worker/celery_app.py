@@ -0,0 +1,86 @@
+"""
+Celery application for ``celery -A app.worker worker``.
+
+Tasks are async functions; each worker process keeps one event loop for its
+lifetime, so lazily created clients (DB engine, Redis, Telegram) are reused
+across tasks instead of being bound to a loop that ``asyncio.run`` closed.
+"""
+import asyncio
+
+from app.config import settings
+from app.services.metrics import TASKS
+from app.worker.queues import QUEUES
+from app.worker.registry import TaskSpec, load_tasks
+
+DEDUP_PREFIX = "homey:task:dedup:"
+
+_celery = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _run(coro):
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+async def _release(dedup_key: str) -> None:
+    from app.services.redis_client import get_redis
+
+    await get_redis().delete(DEDUP_PREFIX + dedup_key)
+
+
+def _register(celery, spec: TaskSpec) -> None:
+    succeeded = TASKS.labels(spec.queue.name, "succeeded")
+    failed = TASKS.labels(spec.queue.name, "failed")
+
+    def run(*args, _dedup_key: str | None = None, **kwargs):
+        try:
+            result = _run(spec.fn(*args, **kwargs))
+        except Exception:
+            failed.inc()
+            raise
+        finally:
+            if _dedup_key:
+                _run(_release(_dedup_key))
+        succeeded.inc()
+        return result
+
+    run.__name__ = spec.fn.__name__
+    celery.task(
+        name=spec.name,
+        queue=spec.queue.name,
+        time_limit=spec.queue.time_limit,
+        # Raised inside the task first, so it can clean up before the hard kill.
+        soft_time_limit=spec.queue.time_limit * 0.9,
+    )(run)
+
+
+def get_celery_app():
+    global _celery
+    if _celery is None:
+        from celery import Celery
+        from kombu import Queue
+
+        celery = Celery("homey", broker=settings.redis_url, backend=settings.redis_url)
+        celery.conf.update(
+            task_queues=[Queue(name) for name in QUEUES],
+            task_default_queue="maintenance",
+            task_serializer="json",
+            result_serializer="json",
+            accept_content=["json"],
+            result_expires=3600,
+            # Re-deliver tasks from a crashed worker, and do not let one process
+            # reserve several long tasks while its siblings sit idle.
+            task_acks_late=True,
+            task_reject_on_worker_lost=True,
+            worker_prefetch_multiplier=1,
+            broker_transport_options={
+                "visibility_timeout": int(max(q.time_limit for q in QUEUES.values()) * 2),
+            },
+        )
+        for spec in load_tasks().values():
+            _register(celery, spec)
+        _celery = celery
+    return _celery
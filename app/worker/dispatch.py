@@ -0,0 +1,195 @@
+"""
+Enqueueing tasks from the API process.
+
+``WORKER_MODE=celery`` publishes to the broker and the worker processes run the
+task. ``WORKER_MODE=eager`` runs tasks in-process, as background asyncio tasks
+limited by each queue's concurrency and time limit. Eager mode is the default
+for development and tests. Either way the request path only pays for the enqueue.
+
+A ``dedup_key`` makes enqueueing idempotent while a task is pending or running.
+For example, "enhance frame X" is not queued twice because two uploads raced.
+"""
+import asyncio
+import logging
+import uuid
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.services.metrics import QUEUE_DEPTH, TASKS
+from app.worker.queues import QUEUES, QueueSpec
+from app.worker.registry import TaskSpec, get_task
+
+logger = logging.getLogger(__name__)
+
+
+class _QueueCounters:
+    """Pre-bound TASKS children for one queue."""
+
+    __slots__ = ("enqueued", "deduplicated", "succeeded", "failed", "timed_out")
+
+    def __init__(self, queue: str):
+        for outcome in self.__slots__:
+            setattr(self, outcome, TASKS.labels(queue, outcome))
+
+
+_COUNTERS = {name: _QueueCounters(name) for name in QUEUES}
+
+
+def _counters(queue: str) -> _QueueCounters:
+    counters = _COUNTERS.get(queue)
+    if counters is None:
+        counters = _COUNTERS[queue] = _QueueCounters(queue)
+    return counters
+
+
+class TaskHandle:
+    def __init__(self, task_id: str, spec: TaskSpec, wait: Callable[[float], Awaitable]):
+        self.id = task_id
+        self.name = spec.name
+        self.queue = spec.queue
+        self._wait = wait
+
+    async def result(self, timeout: float | None = None):
+        """The task's return value; raises TimeoutError after the queue's ``result_timeout``."""
+        return await self._wait(self.queue.result_timeout if timeout is None else timeout)
+
+
+def _dedup_ttl(queue: QueueSpec) -> int:
+    # Long enough to cover queueing plus execution; a crashed worker cannot hold a key forever.
+    return int((queue.expires or queue.time_limit) + queue.time_limit)
+
+
+class EagerBackend:
+    def __init__(self):
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._pending = {name: 0 for name in QUEUES}
+        self._dedup: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        for name in QUEUES:
+            QUEUE_DEPTH.labels(f"tasks_{name}").set_function(lambda name=name: self._pending[name])
+
+    async def claim(self, dedup_key: str, ttl: int) -> bool:
+        if dedup_key in self._dedup:
+            return False
+        self._dedup.add(dedup_key)
+        return True
+
+    async def submit(self, spec: TaskSpec, args: tuple, kwargs: dict, dedup_key: str | None) -> TaskHandle:
+        task = asyncio.create_task(self._execute(spec, args, kwargs, dedup_key), name=spec.name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        async def wait(timeout: float):
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+
+        return TaskHandle(task.get_name() + ":" + uuid.uuid4().hex, spec, wait)
+
+    async def _execute(self, spec: TaskSpec, args: tuple, kwargs: dict, dedup_key: str | None):
+        queue = spec.queue
+        counters = _counters(queue.name)
+        semaphore = self._semaphores.get(queue.name)
+        if semaphore is None:
+            semaphore = self._semaphores[queue.name] = asyncio.Semaphore(queue.concurrency)
+        self._pending[queue.name] = self._pending.get(queue.name, 0) + 1
+        try:
+            async with semaphore:
+                result = await asyncio.wait_for(spec.fn(*args, **kwargs), queue.time_limit)
+        except asyncio.TimeoutError:
+            counters.timed_out.inc()
+            logger.warning("Task %s exceeded its %ss time limit", spec.name, queue.time_limit)
+            raise
+        except Exception:
+            counters.failed.inc()
+            logger.exception("Task %s failed", spec.name)
+            raise
+        else:
+            counters.succeeded.inc()
+            return result
+        finally:
+            self._pending[queue.name] -= 1
+            if dedup_key:
+                self._dedup.discard(dedup_key)
+
+    async def drain(self, timeout: float) -> None:
+        """Give running tasks ``timeout`` seconds to finish, then cancel the rest."""
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+class CeleryBackend:
+    async def claim(self, dedup_key: str, ttl: int) -> bool:
+        from app.services.redis_client import get_redis
+        from app.worker.celery_app import DEDUP_PREFIX
+
+        return bool(await get_redis().set(DEDUP_PREFIX + dedup_key, "1", nx=True, ex=ttl))
+
+    async def submit(self, spec: TaskSpec, args: tuple, kwargs: dict, dedup_key: str | None) -> TaskHandle:
+        from app.worker.celery_app import get_celery_app
+
+        queue = spec.queue
+        # Publishing is blocking socket I/O in kombu; keep it off the event loop.
+        result = await asyncio.to_thread(
+            get_celery_app().send_task,
+            spec.name,
+            args=list(args),
+            kwargs={**kwargs, "_dedup_key": dedup_key},
+            queue=queue.name,
+            expires=queue.expires,
+        )
+
+        async def wait(timeout: float):
+            from celery.exceptions import TimeoutError as CeleryTimeoutError
+
+            try:
+                return await asyncio.to_thread(result.get, timeout=timeout)
+            except CeleryTimeoutError:
+                raise TimeoutError(f"Task {spec.name} ({result.id}) did not finish within {timeout}s") from None
+
+        return TaskHandle(result.id, spec, wait)
+
+    async def drain(self, timeout: float) -> None:
+        pass
+
+
+class Dispatcher:
+    def __init__(self, backend: EagerBackend | CeleryBackend):
+        self.backend = backend
+
+    async def enqueue(self, name: str, *args, dedup_key: str | None = None, **kwargs) -> TaskHandle | None:
+        """Queue task ``name``; returns None if ``dedup_key`` is already pending or running."""
+        spec = get_task(name)
+        counters = _counters(spec.queue.name)
+        if dedup_key is not None:
+            dedup_key = f"{name}:{dedup_key}"
+            if not await self.backend.claim(dedup_key, _dedup_ttl(spec.queue)):
+                counters.deduplicated.inc()
+                return None
+        handle = await self.backend.submit(spec, args, kwargs, dedup_key)
+        counters.enqueued.inc()
+        return handle
+
+
+_dispatcher: Dispatcher | None = None
+
+
+def get_dispatcher() -> Dispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        backend = CeleryBackend() if settings.worker_mode == "celery" else EagerBackend()
+        _dispatcher = Dispatcher(backend)
+    return _dispatcher
+
+
+async def enqueue(name: str, *args, dedup_key: str | None = None, **kwargs) -> TaskHandle | None:
+    return await get_dispatcher().enqueue(name, *args, dedup_key=dedup_key, **kwargs)
+
+
+async def close_dispatcher(timeout: float = 5.0) -> None:
+    global _dispatcher
+    if _dispatcher is not None:
+        await _dispatcher.backend.drain(timeout)
+    _dispatcher = None
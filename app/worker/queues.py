@@ -0,0 +1,28 @@
+"""
+Task queues. Each queue gets its own worker processes in production, so a flood
+of vision work cannot delay alerts:
+
+    celery -A app.worker worker -Q alerts -c 8
+    celery -A app.worker worker -Q vision,snapshots -c 2
+    celery -A app.worker worker -Q maintenance -c 1
+
+In eager mode the same ``concurrency`` bounds the in-process tasks per queue.
+"""
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class QueueSpec:
+    name: str
+    concurrency: int  # Tasks running at once (per worker process group in Celery)
+    time_limit: float  # Seconds a task may run before it is killed
+    result_timeout: float  # Default wait in TaskHandle.result()
+    expires: float | None = None  # Queued tasks older than this are discarded unrun
+
+
+ALERTS = QueueSpec("alerts", concurrency=8, time_limit=10, result_timeout=15, expires=300)
+VISION = QueueSpec("vision", concurrency=2, time_limit=60, result_timeout=90, expires=120)
+SNAPSHOTS = QueueSpec("snapshots", concurrency=4, time_limit=30, result_timeout=45, expires=600)
+MAINTENANCE = QueueSpec("maintenance", concurrency=1, time_limit=600, result_timeout=900)
+
+QUEUES: dict[str, QueueSpec] = {q.name: q for q in (ALERTS, VISION, SNAPSHOTS, MAINTENANCE)}
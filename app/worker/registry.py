@@ -0,0 +1,41 @@
+"""Task registry shared by the Celery app and the eager backend."""
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from app.worker.queues import QUEUES, QueueSpec
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str
+    queue: QueueSpec
+    fn: Callable[..., Awaitable]
+
+
+TASKS: dict[str, TaskSpec] = {}
+
+
+def task(queue: str, name: str | None = None):
+    """Register an async function as a background task on ``queue``."""
+    def decorator(fn):
+        task_name = name or f"{queue}.{fn.__name__}"
+        if task_name in TASKS:
+            raise ValueError(f"Task {task_name} registered twice")
+        TASKS[task_name] = TaskSpec(task_name, QUEUES[queue], fn)
+        return fn
+    return decorator
+
+
+def load_tasks() -> dict[str, TaskSpec]:
+    # Registration happens as a side effect of importing the task module.
+    import app.worker.tasks  # noqa: F401
+
+    return TASKS
+
+
+def get_task(name: str) -> TaskSpec:
+    load_tasks()
+    try:
+        return TASKS[name]
+    except KeyError:
+        raise ValueError(f"Unknown task: {name}") from None
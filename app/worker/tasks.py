@@ -0,0 +1,55 @@
+"""Background tasks. Arguments and results must be JSON-serialisable."""
+import asyncio
+import base64
+from datetime import datetime, timedelta
+
+from app.worker.registry import task
+
+
+@task("alerts")
+async def deliver(telegram_id: int, text: str) -> bool:
+    """Send an alert message to a user through the configured transport."""
+    from app.agents.communication import get_transport
+    from app.models.message import OutgoingMessage
+
+    return await get_transport().send(str(telegram_id), OutgoingMessage(type="text", text=text))
+
+
+@task("vision")
+async def enhance_frames(frames: list[str], detections: list[list[dict]]) -> list[dict]:
+    """Describe a batch of base64 JPEG frames with one vision model request."""
+    from app.services.gemini import describe_frames
+    from app.services.images import get_image_processor
+
+    async def shrink(frame: bytes) -> bytes:
+        try:
+            return (await get_image_processor().render(frame, ("vision",)))["vision"]
+        except Exception:
+            # The model copes with the full frame; it just costs more tokens.
+            return frame
+
+    decoded = [base64.b64decode(frame) for frame in frames]
+    return await describe_frames(list(await asyncio.gather(*map(shrink, decoded))), detections)
+
+
+@task("snapshots")
+async def render_variants(digest: str) -> bool:
+    """Render the thumbnail, vision and Telegram variants of a stored snapshot."""
+    from app.services.images import get_image_processor
+
+    return await get_image_processor().ensure_variants(digest)
+
+
+@task("maintenance")
+async def purge_scenes(older_than_days: int = 30) -> int:
+    """Delete scene rows older than the retention window; returns the number removed."""
+    from sqlalchemy import delete
+
+    from app.models.user import Scene
+    from app.services.storage import get_session_factory
+
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    async with get_session_factory()() as session:
+        result = await session.execute(delete(Scene).where(Scene.received_at < cutoff))
+        await session.commit()
+    return result.rowcount
@@ -0,0 +1,57 @@
+"""
+Benchmark collection and regression report.
+
+    BENCH_SAVE=1       overwrite tests/benchmarks/baselines.json with this run
+    BENCH_THRESHOLD    allowed slowdown vs baseline before flagging (default 0.5 = +50%)
+    BENCH_STRICT=1     fail the session when a regression is flagged, and enforce wall-clock ratio asserts
+"""
+import os
+
+import pytest
+
+from tests.benchmarks import harness
+
+_results: list[harness.Result] = []
+
+
+class Bench:
+    def __call__(self, name: str, fn) -> harness.Result:
+        result = harness.measure(name, fn)
+        _results.append(result)
+        return result
+
+    def run_async(self, name: str, fn) -> harness.Result:
+        result = harness.measure_async(name, fn)
+        _results.append(result)
+        return result
+
+
+@pytest.fixture
+def bench() -> Bench:
+    return Bench()
+
+
+def _threshold() -> float:
+    return float(os.environ.get("BENCH_THRESHOLD", "0.5"))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    if os.environ.get("BENCH_SAVE") == "1":
+        harness.save_baselines(_results)
+        return
+    _, regressions = harness.compare(_results, harness.load_baselines(), _threshold())
+    if regressions and os.environ.get("BENCH_STRICT") == "1":
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    lines, regressions = harness.compare(_results, harness.load_baselines(), _threshold())
+    terminalreporter.section("benchmarks")
+    for line in lines:
+        terminalreporter.write_line(line)
+    if regressions:
+        terminalreporter.write_line(f"{len(regressions)} benchmark(s) regressed beyond +{_threshold():.0%}")
@@ -0,0 +1,95 @@
+"""
+Tiny microbenchmark harness.
+
+Each benchmark is auto-calibrated so one timed batch takes at least
+``MIN_BATCH_SECONDS``; the fastest of ``REPEATS`` batches is reported as ns/op,
+which is the most stable statistic for CPU-bound code on a noisy machine.
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+MIN_BATCH_SECONDS = 0.02
+REPEATS = 5
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+
+
+@dataclass
+class Result:
+    name: str
+    ns_per_op: float
+    ops: int
+
+
+def _calibrate(run_batch) -> int:
+    number = 1
+    while True:
+        elapsed = run_batch(number)
+        if elapsed >= MIN_BATCH_SECONDS or number >= 1_000_000:
+            return number
+        number *= 10 if elapsed < MIN_BATCH_SECONDS / 10 else 2
+
+
+def _measure(name: str, run_batch) -> Result:
+    number = _calibrate(run_batch)
+    best = min(run_batch(number) for _ in range(REPEATS))
+    return Result(name=name, ns_per_op=best / number * 1e9, ops=number)
+
+
+def measure(name: str, fn) -> Result:
+    def run_batch(number: int) -> float:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - started
+
+    return _measure(name, run_batch)
+
+
+def measure_async(name: str, fn) -> Result:
+    """Benchmark a coroutine function; the loop is entered once per batch, not per op."""
+    loop = asyncio.new_event_loop()
+
+    async def batch(number: int) -> float:
+        started = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        return time.perf_counter() - started
+
+    try:
+        return _measure(name, lambda number: loop.run_until_complete(batch(number)))
+    finally:
+        loop.close()
+
+
+def load_baselines(path: Path = BASELINES_PATH) -> dict[str, float]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baselines(results: list[Result], path: Path = BASELINES_PATH) -> None:
+    baselines = load_baselines(path)
+    baselines.update({r.name: round(r.ns_per_op, 1) for r in results})
+    path.write_text(json.dumps(dict(sorted(baselines.items())), indent=2) + "\n")
+
+
+def compare(results: list[Result], baselines: dict[str, float], threshold: float) -> tuple[list[str], list[str]]:
+    """Return (report lines, names of benchmarks slower than baseline by more than ``threshold``)."""
+    lines = [f"{'benchmark':<48} {'ns/op':>12} {'baseline':>12} {'change':>8}"]
+    regressions = []
+    for r in sorted(results, key=lambda r: r.name):
+        baseline = baselines.get(r.name)
+        if baseline is None:
+            lines.append(f"{r.name:<48} {r.ns_per_op:>12.0f} {'-':>12} {'new':>8}")
+            continue
+        change = r.ns_per_op / baseline - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(r.name)
+            flag = "  REGRESSION"
+        lines.append(f"{r.name:<48} {r.ns_per_op:>12.0f} {baseline:>12.0f} {change:>+8.0%}{flag}")
+    return lines, regressions
@@ -0,0 +1,124 @@
+import json
+from datetime import datetime, timedelta
+
+from app.agents.communication import MockTransport, TelegramTransport
+from app.agents.event import EventAgentImpl
+from app.agents.gatekeeper import GatekeeperAgentImpl
+from app.config import settings
+from app.models.message import OutgoingMessage
+from app.models.scene import CompactScene, Detection
+from app.services.timeline import ActivityTimeline
+
+SCENE = CompactScene(
+    camera_id="cam-1",
+    timestamp=datetime(2024, 1, 1, 12, 0),
+    objects=[Detection(type="cat", confidence=0.9), Detection(type="person", confidence=0.4)],
+    motion=True,
+    motion_score=0.6,
+)
+
+REPLY = (
+    "A person is visible near the door and the cat is on the sofa. Motion was detected at 2:14 PM, "
+    "there is nothing unusual in the living room right now."
+)
+
+TELEGRAM_TEXT_UPDATE = {
+    "update_id": 1001,
+    "message": {
+        "message_id": 55,
+        "date": 1704110400,
+        "chat": {"id": 42, "type": "private"},
+        "from": {"id": 42, "is_bot": False, "first_name": "Ada", "username": "ada"},
+        "text": "is my cat there?",
+    },
+}
+
+
+def test_event_evaluate(bench):
+    agent = EventAgentImpl()
+    context = {"user_status": "home"}
+
+    async def evaluate():
+        agent.cooldowns.clear()
+        await agent.evaluate(SCENE, context)
+
+    bench.run_async("event.evaluate", evaluate)
+
+
+def test_gatekeeper_redact(bench):
+    gatekeeper = GatekeeperAgentImpl()
+    bench("gatekeeper.redact_response", lambda: gatekeeper._redact_response(REPLY))
+
+
+def test_mock_transport_receive(bench):
+    transport = MockTransport()
+    payload = {"telegram_id": 42, "username": "ada", "content": "how are things?"}
+    bench.run_async("mock_transport.receive", lambda: transport.receive(payload))
+
+
+def test_mock_transport_send(bench, monkeypatch):
+    import app.agents.communication as communication
+    from app.services.outbox import MessageOutbox
+
+    monkeypatch.setattr(communication, "mock_outbox", MessageOutbox(capacity=1000))
+    transport = MockTransport()
+    message = OutgoingMessage(type="text", text=REPLY)
+
+    bench.run_async("mock_transport.send", lambda: transport.send("42", message))
+
+
+def test_telegram_transport_receive(bench, monkeypatch):
+    monkeypatch.setattr(settings, "telegram_bot_token", "123456:TEST")
+    transport = TelegramTransport()
+    bench.run_async("telegram_transport.receive", lambda: transport.receive(TELEGRAM_TEXT_UPDATE))
+
+
+def test_telegram_update_decoding(bench, monkeypatch):
+    monkeypatch.setattr(settings, "telegram_bot_token", "123456:TEST")
+    transport = TelegramTransport()
+    body = json.dumps(TELEGRAM_TEXT_UPDATE).encode()
+    # The webhook body through the typed decoder, and the Update.de_json path it replaces.
+    bench.run_async("telegram_transport.receive_body", lambda: transport.receive(body))
+    bench("telegram_transport.de_json", lambda: transport._from_update_object(body))
+
+
+def test_outbox_poll_tail(bench):
+    from app.services.outbox import MessageOutbox
+
+    outbox = MessageOutbox(capacity=10_000)
+    for i in range(10_000):
+        outbox.append({"telegram_id": str(i % 50), "text": REPLY})
+    cursor = outbox.last_seq - 5
+
+    bench("outbox.read_tail", lambda: outbox.read(after=cursor))
+    bench("outbox.read_tail_user", lambda: outbox.read(after=cursor, user_id="7"))
+
+
+def test_identity_cache_hit(bench):
+    import uuid
+
+    from app.services.identity import IdentityCache, UserIdentity
+
+    user = UserIdentity(uuid.uuid4(), 42, "ada", "home", "UTC")
+
+    async def load_user(telegram_id):
+        return user
+
+    cache = IdentityCache(load_user=load_user)
+    bench.run_async("identity.user_hit", lambda: cache.user(42))
+
+
+def test_timeline_activity(bench):
+    timeline = ActivityTimeline()
+    start = datetime(2024, 1, 1)
+    # A week of uploads every 30 s with motion in one of every 7 minutes and a cat in every 11th.
+    for step in range(7 * 24 * 120):
+        minute = step // 2
+        timeline.observe(CompactScene(
+            camera_id="cam-1",
+            timestamp=start + timedelta(seconds=30 * step),
+            motion=minute % 7 == 0,
+            objects=[Detection(type="cat", confidence=0.9)] if minute % 11 == 0 else [],
+        ))
+    until = start + timedelta(days=7)
+    bench("timeline.activity_24h", lambda: timeline.activity("cam-1", until - timedelta(days=1), until))
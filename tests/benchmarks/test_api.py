@@ -0,0 +1,23 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    yield client
+    # The harness closes its own event loop after measuring, so close on a fresh one.
+    asyncio.run(client.aclose())
+
+
+def test_mock_send_endpoint(bench, client):
+    body = {"phone_number": "+15550100", "content": "how are things?"}
+    bench.run_async("api.mock_send", lambda: client.post("/api/v1/mock/send", json=body))
+
+
+def test_mock_messages_endpoint(bench, client):
+    bench.run_async("api.mock_messages", lambda: client.get("/api/v1/mock/messages"))
@@ -0,0 +1,11 @@
+from tests.benchmarks.harness import Result, compare
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    results = [Result("fast", 100, 1), Result("slow", 200, 1), Result("fresh", 50, 1)]
+    baselines = {"fast": 120, "slow": 100}
+
+    lines, regressions = compare(results, baselines, threshold=0.5)
+
+    assert regressions == ["slow"]
+    assert any(line.startswith("fresh") and line.endswith("new") for line in lines)
@@ -0,0 +1,87 @@
+"""
+uuid4 vs UUIDv7 primary keys.
+
+The difference only shows once the primary key index no longer fits in cache.
+Random uuid4 keys then touch a different leaf page on almost every insert, while
+UUIDv7 keys append to the rightmost leaves.
+
+* Insert throughput is measured against SQLite's B-tree (a WITHOUT ROWID table is
+  clustered on its primary key, like a Postgres PK index), with a 64 KiB page
+  cache standing in for shared_buffers that are small next to the index.
+  SQLite rebalances siblings on split, so its page counts stay close and are not
+  compared.
+* Index size needs Postgres: nbtree splits a random insert's page 50/50, but
+  fills the rightmost page before splitting it. Set BENCH_POSTGRES_URL
+  (postgresql://...) to compare ``pg_relation_size`` of the two primary keys.
+"""
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+
+import pytest
+
+from app.utils.ids import uuid7
+
+ROWS = 40_000
+BATCH = 1_000
+CACHE_KIB = 64
+
+
+def _insert(path, make_id) -> int:
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=OFF")
+    db.execute(f"PRAGMA cache_size=-{CACHE_KIB}")
+    db.execute("CREATE TABLE scenes (id BLOB PRIMARY KEY, payload TEXT) WITHOUT ROWID")
+    # One transaction per batch, as the log writer commits
+    for _ in range(0, ROWS, BATCH):
+        db.executemany("INSERT INTO scenes VALUES (?, ?)", ((make_id().bytes, "x" * 64) for _ in range(BATCH)))
+        db.commit()
+    pages = db.execute("PRAGMA page_count").fetchone()[0]
+    db.close()
+    return pages
+
+
+def test_id_generation(bench):
+    bench("ids.uuid4", uuid.uuid4)
+    bench("ids.uuid7", uuid7)
+
+
+def test_uuid7_inserts_faster_once_the_index_outgrows_the_cache(bench, tmp_path):
+    runs = iter(range(1_000_000))
+
+    def insert(make_id):
+        return lambda: _insert(tmp_path / f"{next(runs)}.db", make_id)
+
+    random = bench("ids.insert_40k_uuid4", insert(uuid.uuid4))
+    ordered = bench("ids.insert_40k_uuid7", insert(uuid7))
+    # Wall-clock ratios are noisy on shared machines, so only BENCH_STRICT runs enforce it.
+    if os.environ.get("BENCH_STRICT") == "1":
+        assert ordered.ns_per_op < 0.8 * random.ns_per_op
+
+
+async def _postgres_index(url: str, make_id) -> tuple[int, float]:
+    import asyncpg
+
+    db = await asyncpg.connect(url)
+    try:
+        await db.execute("CREATE TEMP TABLE scenes (id uuid PRIMARY KEY, payload text)")
+        started = time.perf_counter()
+        for _ in range(0, ROWS, BATCH):
+            await db.executemany("INSERT INTO scenes VALUES ($1, $2)", [(make_id(), "x" * 64) for _ in range(BATCH)])
+        elapsed = time.perf_counter() - started
+        size = await db.fetchval("SELECT pg_relation_size('scenes_pkey')")
+        return size, ROWS / elapsed
+    finally:
+        await db.close()
+
+
+@pytest.mark.skipif(not os.environ.get("BENCH_POSTGRES_URL"), reason="BENCH_POSTGRES_URL is not set")
+def test_uuid7_primary_key_is_smaller_in_postgres():
+    url = os.environ["BENCH_POSTGRES_URL"]
+    size4, rate4 = asyncio.run(_postgres_index(url, uuid.uuid4))
+    size7, rate7 = asyncio.run(_postgres_index(url, uuid7))
+    print(f"\nscenes_pkey for {ROWS} rows: uuid4={size4} B ({rate4:.0f}/s) uuid7={size7} B ({rate7:.0f}/s)")
+    # Rightmost splits leave pages ~90% full, random splits ~70%.
+    assert size7 < 0.85 * size4
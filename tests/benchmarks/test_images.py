@@ -0,0 +1,41 @@
+"""
+Snapshot variant rendering: inline vs the process pool at several sizes.
+
+One op renders every variant of ``FRAMES`` camera frames at once. Throughput
+should improve up to about one worker per CPU core and then level off. The
+inline case shows how long that work would block the event loop.
+"""
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from app.services.images import ImageProcessor  # noqa: E402
+from app.services.snapshots import LocalSnapshotStore  # noqa: E402
+from app.utils.imaging import VARIANTS, render  # noqa: E402
+from tests.unit.test_images import _photo  # noqa: E402
+
+FRAMES = 4
+PHOTO = _photo(1280, 960)
+
+
+def test_render_inline(bench):
+    bench(f"images.render_{FRAMES}_inline", lambda: [render(PHOTO, tuple(VARIANTS)) for _ in range(FRAMES)])
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_render_pool_throughput(bench, tmp_path, workers):
+    processor = ImageProcessor(LocalSnapshotStore(tmp_path, "/s", 10_000_000), workers=workers, max_pending=FRAMES)
+    # Start the workers before timing; spawning is a one-off cost.
+    list(processor.executor.map(render, [PHOTO] * workers, [("thumb",)] * workers))
+
+    async def batch():
+        await asyncio.gather(*(processor.render(PHOTO) for _ in range(FRAMES)))
+
+    try:
+        result = bench.run_async(f"images.render_{FRAMES}_workers{workers}", batch)
+    finally:
+        asyncio.run(processor.close())
+    print(f"\n{workers} worker(s) on {os.cpu_count()} CPU(s): {FRAMES / (result.ns_per_op / 1e9):.1f} frames/s")
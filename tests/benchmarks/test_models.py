@@ -0,0 +1,86 @@
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app.models.scene import CompactScene, Detection, DetectedObject, SceneDescriptor, SceneUpload
+
+NOW = datetime(2024, 1, 1, 12, 0)
+OBJECTS = [
+    {"type": "person", "confidence": 0.81, "bbox": [10, 20, 200, 400]},
+    {"type": "cat", "confidence": 0.93, "bbox": [300, 310, 380, 400]},
+    {"type": "package", "confidence": 0.66},
+]
+
+
+def test_detected_object_construction(bench):
+    bench("models.detected_object", lambda: DetectedObject(**OBJECTS[0]))
+
+
+def test_scene_descriptor_construction(bench):
+    def build():
+        SceneDescriptor(
+            camera_id="cam-1",
+            timestamp=NOW,
+            objects=[DetectedObject(**o) for o in OBJECTS],
+            motion=True,
+            motion_score=0.4,
+        )
+
+    bench("models.scene_descriptor", build)
+
+
+def test_scene_descriptor_validate(bench):
+    payload = {"camera_id": "cam-1", "timestamp": NOW.isoformat(), "objects": OBJECTS, "motion": True}
+    bench("models.scene_descriptor_validate", lambda: SceneDescriptor.model_validate(payload))
+
+
+UPLOAD = SceneUpload(timestamp=NOW, objects=OBJECTS, motion=True, motion_score=0.4)
+
+
+def test_compact_scene_construction(bench):
+    def build():
+        CompactScene(
+            camera_id="cam-1",
+            timestamp=NOW,
+            objects=[Detection(**o) for o in OBJECTS],
+            motion=True,
+            motion_score=0.4,
+        )
+
+    bench("models.compact_scene", build)
+
+
+def test_scene_from_upload(bench):
+    # What the upload endpoint did before scenes were compact, and what it does now.
+    bench(
+        "models.scene_descriptor_from_upload",
+        lambda: SceneDescriptor(camera_id="cam-1", **UPLOAD.model_dump(exclude={"frame"})),
+    )
+    bench("models.compact_scene_from_upload", lambda: CompactScene.from_upload("cam-1", UPLOAD))
+
+
+def _bytes_per_scene(build, count: int = 2000) -> float:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        scenes = [build(i) for i in range(count)]
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(scenes) == count
+    return retained / count
+
+
+def test_memory_per_scene():
+    # Distinct timestamps and confidences, as in a real history; nothing shared but type names.
+    def descriptor(i: int) -> SceneDescriptor:
+        return SceneDescriptor(
+            camera_id="cam-1",
+            timestamp=NOW + timedelta(seconds=i),
+            objects=[DetectedObject(type=o["type"], confidence=o["confidence"] + i / 1e6, bbox=o.get("bbox")) for o in OBJECTS],
+            motion=True,
+            motion_score=i / 1e6,
+        )
+
+    pydantic_bytes = _bytes_per_scene(descriptor)
+    compact_bytes = _bytes_per_scene(lambda i: CompactScene.from_descriptor(descriptor(i)))
+    assert compact_bytes < pydantic_bytes / 3, f"SceneDescriptor {pydantic_bytes:.0f} B, CompactScene {compact_bytes:.0f} B"
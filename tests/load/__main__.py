@@ -0,0 +1,50 @@
+"""
+Replay Telegram updates and scene uploads against a local instance with fake upstreams.
+
+    python -m tests.load --rate 20 --scene-rate 50 --duration 30 \
+        --gemini-latency-ms 400 --gemini-jitter-ms 200 --gemini-error-rate 0.02
+"""
+import argparse
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+from tests.load.fakes import FaultProfile
+from tests.load.runner import LoadConfig, format_report, run_load
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=20.0, help="Telegram updates per second")
+    parser.add_argument("--scene-rate", type=float, default=0.0, help="scene uploads per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of offered load")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--cameras", type=int, default=5)
+    parser.add_argument("--replay", type=Path, help="JSONL file of recorded Telegram Update objects")
+    for upstream in ("bot", "gemini"):
+        parser.add_argument(f"--{upstream}-latency-ms", type=float, default=0.0)
+        parser.add_argument(f"--{upstream}-jitter-ms", type=float, default=0.0)
+        parser.add_argument(f"--{upstream}-error-rate", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    config = LoadConfig(
+        rate=args.rate,
+        scene_rate=args.scene_rate,
+        duration=args.duration,
+        users=args.users,
+        cameras=args.cameras,
+        replay=args.replay,
+        bot=FaultProfile(args.bot_latency_ms, args.bot_jitter_ms, args.bot_error_rate),
+        gemini=FaultProfile(args.gemini_latency_ms, args.gemini_jitter_ms, args.gemini_error_rate),
+    )
+    reports = run_load(config)
+
+    if args.json:
+        print(json.dumps([{**asdict(r), "error_rate": r.error_rate} for r in reports], indent=2))
+    else:
+        print(format_report(reports))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+In-process fake Telegram Bot API and Gemini servers.
+
+Both are real HTTP servers bound to 127.0.0.1 (uvicorn in a background thread), so
+the app's own clients - python-telegram-bot and the Gemini REST transport - are
+exercised unchanged, just pointed at localhost via TELEGRAM_API_BASE_URL and
+GEMINI_API_ENDPOINT.
+"""
+import asyncio
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class FaultProfile:
+    """Latency and error injection for a fake upstream."""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+
+    async def apply(self) -> bool:
+        """Sleep for the injected latency; return True if this call should fail."""
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        return random.random() < self.error_rate
+
+
+@dataclass
+class UpstreamStats:
+    requests: int = 0
+    errors: int = 0
+    by_method: dict[str, int] = field(default_factory=dict)
+
+    def record(self, method: str, failed: bool) -> None:
+        self.requests += 1
+        self.errors += failed
+        self.by_method[method] = self.by_method.get(method, 0) + 1
+
+
+class ServerThread:
+    """Serve an ASGI app on an ephemeral localhost port from a daemon thread."""
+
+    def __init__(self, app, name: str, lifespan: str = "off"):
+        self.app = app
+        self.name = name
+        self.port = _free_port()
+        self._server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning", lifespan=lifespan,
+        ))
+        self._thread = threading.Thread(target=self._server.run, name=name, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "ServerThread":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{self.name} did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+    def __enter__(self) -> "ServerThread":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _params(request: Request) -> dict:
+    if request.headers.get("content-type", "").startswith("application/json"):
+        return await request.json()
+    return dict(await request.form())
+
+
+def fake_bot_api(faults: FaultProfile, stats: UpstreamStats) -> FastAPI:
+    """Minimal Bot API: every method succeeds with a plausible Message result."""
+    app = FastAPI()
+    message_ids = iter(range(1, 1 << 62))
+
+    @app.post("/bot{token}/{method}")
+    async def call(token: str, method: str, request: Request):
+        params = await _params(request)
+        failed = await faults.apply()
+        stats.record(method, failed)
+        if failed:
+            return JSONResponse(
+                status_code=500,
+                content={"ok": False, "error_code": 500, "description": "Internal Server Error: injected"},
+            )
+
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Homey", "username": "homey_fake_bot"}
+        else:
+            chat_id = int(params.get("chat_id", 0))
+            result = {
+                "message_id": next(message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text") or params.get("caption") or "",
+            }
+        return {"ok": True, "result": result}
+
+    return app
+
+
+def fake_gemini(faults: FaultProfile, stats: UpstreamStats) -> FastAPI:
+    """Minimal generateContent endpoint; intent prompts get a fixed intent back."""
+    app = FastAPI()
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        body = await request.json()
+        prompt = " ".join(
+            part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])
+        )
+        failed = await faults.apply()
+        stats.record("generateContent", failed)
+        if failed:
+            return JSONResponse(
+                status_code=503,
+                content={"error": {"code": 503, "message": "injected", "status": "UNAVAILABLE"}},
+            )
+
+        text = "STATUS_CHECK" if "Classify the user's intent" in prompt else "All quiet at home right now."
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": text}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": len(prompt) // 4,
+                "candidatesTokenCount": len(text) // 4,
+                "totalTokenCount": (len(prompt) + len(text)) // 4,
+            },
+        }
+
+    return app
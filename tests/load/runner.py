@@ -0,0 +1,249 @@
+"""
+Open-loop load generator.
+
+Requests are fired on a fixed schedule regardless of how fast the app answers, and
+latency is measured from the *scheduled* send time, so a stalled server shows up
+as queueing delay instead of silently lowering the offered load (coordinated
+omission).
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from app.config import settings
+from app.services.metrics import LLM_LATENCY, LLM_REQUESTS, STAGE_ERRORS, STAGE_LATENCY
+from tests.load import workload
+from tests.load.fakes import FaultProfile, ServerThread, UpstreamStats, fake_bot_api, fake_gemini
+
+
+@dataclass
+class LoadConfig:
+    rate: float = 20.0  # Telegram updates per second
+    scene_rate: float = 0.0  # scene uploads per second
+    duration: float = 10.0
+    users: int = 20
+    cameras: int = 5
+    replay: Path | None = None
+    bot: FaultProfile = field(default_factory=FaultProfile)
+    gemini: FaultProfile = field(default_factory=FaultProfile)
+    timeout: float = 30.0
+    seed: int = 0
+    settings: dict = field(default_factory=dict)  # Extra settings for the run, e.g. {"llm_deadline_seconds": 0.5}
+
+
+@dataclass
+class StageReport:
+    stage: str
+    count: int
+    errors: int
+    throughput: float
+    p50_ms: float | None
+    p95_ms: float | None
+    p99_ms: float | None
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.count if self.count else 0.0
+
+
+@dataclass
+class Samples:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+def _percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index] * 1000
+
+
+def _histogram_percentile(bounds: tuple[float, ...], counts: list[int], q: float) -> float | None:
+    """Estimate a quantile from bucket counts by linear interpolation inside the bucket."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    lower = 0.0
+    for upper, bucket in zip(bounds + (bounds[-1] * 2,), counts):
+        if bucket and seen + bucket >= rank:
+            return (lower + (upper - lower) * (rank - seen) / bucket) * 1000
+        seen += bucket
+        lower = upper
+    return lower * 1000
+
+
+def _snapshot(histogram, errors=None, outcome_counter=None) -> dict:
+    snap = {}
+    for labels, child in histogram.children().items():
+        counts, _, _ = child.snapshot()
+        snap[labels] = {"counts": counts, "errors": 0}
+    if errors is not None:
+        for labels, child in errors.children().items():
+            snap.setdefault(labels, {"counts": [0] * (len(histogram.buckets) + 1), "errors": 0})
+            snap[labels]["errors"] = child.get()
+    if outcome_counter is not None:
+        for (operation, outcome), child in outcome_counter.children().items():
+            if outcome == "error" and (operation,) in snap:
+                snap[(operation,)]["errors"] = child.get()
+    return snap
+
+
+def _diff_reports(prefix: str, histogram, before: dict, after: dict, duration: float) -> list[StageReport]:
+    reports = []
+    for labels, end in after.items():
+        start = before.get(labels, {"counts": [0] * len(end["counts"]), "errors": 0})
+        counts = [b - a for a, b in zip(start["counts"], end["counts"])]
+        total = sum(counts)
+        if not total:
+            continue
+        reports.append(StageReport(
+            stage=f"{prefix}{labels[0]}",
+            count=total,
+            errors=end["errors"] - start["errors"],
+            throughput=total / duration,
+            p50_ms=_histogram_percentile(histogram.buckets, counts, 0.50),
+            p95_ms=_histogram_percentile(histogram.buckets, counts, 0.95),
+            p99_ms=_histogram_percentile(histogram.buckets, counts, 0.99),
+        ))
+    return reports
+
+
+def _sample_report(stage: str, samples: Samples, duration: float) -> StageReport:
+    ordered = sorted(samples.latencies)
+    return StageReport(
+        stage=stage,
+        count=len(ordered),
+        errors=samples.errors,
+        throughput=len(ordered) / duration,
+        p50_ms=_percentile(ordered, 0.50),
+        p95_ms=_percentile(ordered, 0.95),
+        p99_ms=_percentile(ordered, 0.99),
+    )
+
+
+async def _open_loop(rate: float, duration: float, fire) -> None:
+    if rate <= 0:
+        return
+    loop = asyncio.get_running_loop()
+    interval = 1 / rate
+    start = loop.time()
+    tasks = []
+    for i in range(int(rate * duration)):
+        scheduled = start + i * interval
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(scheduled)))
+    await asyncio.gather(*tasks)
+
+
+async def _fire(client: httpx.AsyncClient, samples: Samples, scheduled: float, method: str, url: str, body: dict,
+                ok=lambda response: response.is_success) -> None:
+    loop = asyncio.get_running_loop()
+    try:
+        response = await client.request(method, url, json=body)
+        failed = not ok(response)
+    except httpx.HTTPError:
+        failed = True
+    samples.latencies.append(loop.time() - scheduled)
+    samples.errors += failed
+
+
+async def _generate(base_url: str, config: LoadConfig) -> tuple[dict[str, Samples], float]:
+    updates = workload.replay_updates(config.replay) if config.replay else workload.synthesize_updates(
+        config.users, config.seed
+    )
+    scenes = workload.synthesize_scenes(config.cameras, config.seed)
+    webhook, ingest = Samples(), Samples()
+
+    def webhook_ok(response: httpx.Response) -> bool:
+        return response.is_success and response.json().get("status") == "received"
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=base_url, timeout=config.timeout, limits=limits) as client:
+        async def fire_update(scheduled):
+            await _fire(client, webhook, scheduled, "POST", "/webhooks/telegram", next(updates), webhook_ok)
+
+        async def fire_scene(scheduled):
+            camera_id, body = next(scenes)
+            await _fire(client, ingest, scheduled, "POST", f"/api/v1/cameras/{camera_id}/scenes", body)
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            _open_loop(config.rate, config.duration, fire_update),
+            _open_loop(config.scene_rate, config.duration, fire_scene),
+        )
+        elapsed = time.perf_counter() - started
+
+    return {"webhook": webhook, "scene_upload": ingest}, elapsed
+
+
+def run_load(config: LoadConfig) -> list[StageReport]:
+    """Start fakes and the app on localhost, drive load, and report per-stage statistics."""
+    from app.agents import pipeline
+    from app.main import app
+    from app.services import gemini, llm_guard
+
+    bot_stats, gemini_stats = UpstreamStats(), UpstreamStats()
+    overrides = {
+        "transport": "telegram",
+        "telegram_bot_token": "123456:LOADTEST",
+        "telegram_webhook_secret": None,
+        "gemini_api_key": "fake-key",
+        "tracing_enabled": False,
+        **config.settings,
+    }
+    saved = {name: getattr(settings, name) for name in [*overrides, "telegram_api_base_url", "gemini_api_endpoint"]}
+
+    with ServerThread(fake_bot_api(config.bot, bot_stats), "fake-bot-api") as bot_server, \
+            ServerThread(fake_gemini(config.gemini, gemini_stats), "fake-gemini") as gemini_server:
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+        settings.telegram_api_base_url = f"{bot_server.url}/bot"
+        settings.gemini_api_endpoint = gemini_server.url
+        pipeline.reset()
+        gemini._model = None
+        gemini.reset_llm_cache()
+        llm_guard.reset_guards()
+
+        try:
+            stages_before = _snapshot(STAGE_LATENCY, STAGE_ERRORS)
+            llm_before = _snapshot(LLM_LATENCY, outcome_counter=LLM_REQUESTS)
+            with ServerThread(app, "app", lifespan="on") as app_server:
+                client_samples, elapsed = asyncio.run(_generate(app_server.url, config))
+            stages_after = _snapshot(STAGE_LATENCY, STAGE_ERRORS)
+            llm_after = _snapshot(LLM_LATENCY, outcome_counter=LLM_REQUESTS)
+        finally:
+            for name, value in saved.items():
+                setattr(settings, name, value)
+            pipeline.reset()
+            gemini._model = None
+            gemini.reset_llm_cache()
+            llm_guard.reset_guards()
+
+    reports = [_sample_report(stage, samples, elapsed) for stage, samples in client_samples.items() if samples.latencies]
+    reports += _diff_reports("", STAGE_LATENCY, stages_before, stages_after, elapsed)
+    reports += _diff_reports("llm.", LLM_LATENCY, llm_before, llm_after, elapsed)
+    for name, stats in (("upstream.bot_api", bot_stats), ("upstream.gemini", gemini_stats)):
+        if stats.requests:
+            reports.append(StageReport(name, stats.requests, stats.errors, stats.requests / elapsed, None, None, None))
+    return reports
+
+
+def format_report(reports: list[StageReport]) -> str:
+    def ms(value):
+        return f"{value:>9.1f}" if value is not None else f"{'-':>9}"
+
+    lines = [f"{'stage':<32} {'count':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"]
+    for r in reports:
+        lines.append(
+            f"{r.stage:<32} {r.count:>7} {r.throughput:>8.1f} {ms(r.p50_ms)} {ms(r.p95_ms)} {ms(r.p99_ms)} "
+            f"{r.error_rate:>7.1%}"
+        )
+    return "\n".join(lines)
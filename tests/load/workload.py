@@ -0,0 +1,82 @@
+"""Synthesized and recorded request streams for the load harness."""
+import json
+import random
+import time
+from datetime import datetime, timezone
+from itertools import count, cycle
+from pathlib import Path
+from typing import Iterator
+
+PHRASES = [
+    "how are things at home?",
+    "is my cat there?",
+    "anyone home?",
+    "send a picture",
+    "what's happening?",
+    "help",
+    "hi",
+    "set status to away",
+]
+
+OBJECT_TYPES = ["person", "cat", "dog", "package"]
+
+
+def synthesize_updates(users: int = 20, seed: int = 0) -> Iterator[dict]:
+    """Endless stream of Telegram Update JSON: mostly text, some callbacks, photos and locations."""
+    rng = random.Random(seed)
+    update_ids = count(1)
+    message_ids = count(1)
+
+    while True:
+        user = {"id": 10_000 + rng.randrange(users), "is_bot": False, "first_name": "Load", "username": "loadtest"}
+        chat = {"id": user["id"], "type": "private"}
+        message = {"message_id": next(message_ids), "date": int(time.time()), "chat": chat, "from": user}
+        kind = rng.random()
+
+        if kind < 0.8:
+            update = {"message": {**message, "text": rng.choice(PHRASES)}}
+        elif kind < 0.9:
+            update = {"callback_query": {
+                "id": str(next(update_ids)),
+                "from": user,
+                "chat_instance": "1",
+                "data": rng.choice(["VIEW", "IGNORE", "OK"]),
+                "message": {**message, "text": "Motion detected"},
+            }}
+        elif kind < 0.95:
+            update = {"message": {**message, "photo": [
+                {"file_id": "small", "file_unique_id": "s", "width": 90, "height": 90},
+                {"file_id": "large", "file_unique_id": "l", "width": 1280, "height": 960},
+            ]}}
+        else:
+            update = {"message": {**message, "location": {"latitude": 52.52, "longitude": 13.405}}}
+
+        yield {"update_id": next(update_ids), **update}
+
+
+def replay_updates(path: Path) -> Iterator[dict]:
+    """Loop over recorded Update JSON, one object per line."""
+    with open(path) as f:
+        updates = [json.loads(line) for line in f if line.strip()]
+    if not updates:
+        raise ValueError(f"No updates recorded in {path}")
+    return cycle(updates)
+
+
+def synthesize_scenes(cameras: int = 5, seed: int = 0) -> Iterator[tuple[str, dict]]:
+    """Endless stream of (camera_id, scene upload body)."""
+    rng = random.Random(seed)
+
+    while True:
+        camera_id = f"cam-{rng.randrange(cameras)}"
+        objects = [
+            {"type": rng.choice(OBJECT_TYPES), "confidence": round(rng.uniform(0.3, 0.99), 2)}
+            for _ in range(rng.choice([0, 0, 1, 1, 2, 3]))
+        ]
+        motion = bool(objects) or rng.random() < 0.1
+        yield camera_id, {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "objects": objects,
+            "motion": motion,
+            "motion_score": round(rng.random(), 3) if motion else None,
+        }
@@ -0,0 +1,213 @@
+import json
+import uuid
+
+from app.agents import communication
+from app.agents.communication import MockTransport
+from app.agents.gatekeeper import GatekeeperAgentImpl
+from app.agents.perception import MockPerceptionAgent
+from app.agents.pipeline import MessagePipeline
+from app.models.message import OutgoingMessage
+from app.services.conversations import ConversationStore, Loaded
+from app.services.identity import IdentityCache, UserIdentity
+from app.services.log_writer import LogWriter
+from app.services.outbox import MessageOutbox
+
+_ROLES = {"inbound": "user", "outbound": "model"}
+
+
+class FakeDatabase:
+    """``conversations.context`` and ``messages`` in memory, with the same load semantics as the SQL."""
+
+    def __init__(self):
+        self.contexts: dict[str, dict] = {}
+        self.messages: list[dict] = []
+        self.loads = 0
+        self.checkpoints: list[dict] = []
+        self.fail_checkpoints = False
+
+    async def sink(self, table: str, rows: list[dict]) -> None:
+        assert table == "messages"
+        self.messages.extend(rows)
+
+    async def log_message(self, **row) -> bool:
+        """Stands in for the log writer where each turn has to land at once."""
+        await self.sink("messages", [row])
+        return True
+
+    async def load(self, user_id: str, tail_limit: int = 10):
+        self.loads += 1
+        conversation_id = str(uuid.uuid5(uuid.NAMESPACE_OID, user_id))
+        snapshot = self.contexts.setdefault(conversation_id, {})
+        after = snapshot.get("last_message_id")
+        rows = [
+            m for m in self.messages
+            if str(m["conversation_id"]) == conversation_id and (after is None or str(m["id"]) > after)
+        ]
+        rows.sort(key=lambda m: m["id"])
+        tail = [{"role": _ROLES[m["direction"]], "parts": [m["content"]]} for m in rows[-tail_limit:]]
+        return Loaded(
+            conversation_id, dict(snapshot), tail,
+            turns_after=len(rows), newest_id=str(rows[-1]["id"]) if rows else after,
+        )
+
+    async def checkpoint(self, conversation_id: str, patch: dict, based_on=None, seen=None, appended=()) -> bool:
+        if self.fail_checkpoints:
+            raise ConnectionError("database down")
+        if self.contexts[conversation_id].get("last_message_id") != based_on:
+            return False
+        if any(
+            str(m["conversation_id"]) == conversation_id and (seen is None or str(m["id"]) > seen)
+            and str(m["id"]) not in appended
+            for m in self.messages
+        ):
+            return False
+        self.checkpoints.append(patch)
+        self.contexts[conversation_id].update(json.loads(json.dumps(patch)))
+        return True
+
+
+def _store(db: FakeDatabase, writer: LogWriter, **kwargs) -> ConversationStore:
+    return ConversationStore(writer, load=db.load, checkpoint=db.checkpoint, **kwargs)
+
+
+async def test_each_turn_writes_a_constant_amount():
+    db = FakeDatabase()
+    writer = LogWriter(db.sink, flush_interval=0.0)
+    store = _store(db, writer, keep_turns=4, checkpoint_every=5)
+
+    for i in range(100):
+        await store.append("ada", "user" if i % 2 == 0 else "model", f"turn {i:03d}")
+    await writer.close()
+
+    assert db.loads == 1
+    assert len(db.messages) == 100
+    assert len(db.checkpoints) == 20
+    # Every snapshot holds the same number of turns, however long the chat gets.
+    assert {len(patch["history"]) for patch in db.checkpoints} == {4}
+    assert len(json.dumps(db.checkpoints[0])) == len(json.dumps(db.checkpoints[-1]))
+    assert await store.history("ada") == [
+        {"role": "user", "parts": ["turn 096"]},
+        {"role": "model", "parts": ["turn 097"]},
+        {"role": "user", "parts": ["turn 098"]},
+        {"role": "model", "parts": ["turn 099"]},
+    ]
+
+
+async def test_load_reads_snapshot_and_tail():
+    db = FakeDatabase()
+    writer = LogWriter(db.sink, flush_interval=0.0)
+    store = _store(db, writer, keep_turns=6, checkpoint_every=4)
+    for i in range(7):
+        await store.append("ada", "user", f"turn {i}")
+    await writer.close()
+
+    # Turns 0-3 are in the snapshot, turns 4-6 only in the log.
+    assert [t["parts"][0] for t in db.contexts[next(iter(db.contexts))]["history"]] == [f"turn {i}" for i in range(4)]
+
+    fresh = _store(db, writer, keep_turns=6, checkpoint_every=4)
+    assert [t["parts"][0] for t in await fresh.history("ada")] == [f"turn {i}" for i in range(1, 7)]
+
+    # The tail counts towards the next checkpoint.
+    await fresh.append("ada", "model", "turn 7")
+    assert len(db.checkpoints) == 2
+
+
+async def test_turns_beyond_the_loaded_tail_count_towards_the_next_checkpoint():
+    db = FakeDatabase()
+    writer = LogWriter(db.sink, flush_interval=0.0)
+    store = _store(db, writer, keep_turns=2, checkpoint_every=100)
+    for i in range(4):
+        await store.append("ada", "user", f"turn {i}")
+    await writer.close()
+
+    fresh = _store(db, db, keep_turns=2, checkpoint_every=5)
+    assert [t["parts"][0] for t in await fresh.history("ada")] == ["turn 2", "turn 3"]
+    await fresh.append("ada", "model", "turn 4")
+    assert [t["parts"][0] for t in db.checkpoints[0]["history"]] == ["turn 3", "turn 4"]
+
+
+async def test_stale_worker_does_not_overwrite_newer_turns():
+    db = FakeDatabase()
+    first = _store(db, db, keep_turns=10, checkpoint_every=3)
+    second = _store(db, db, keep_turns=10, checkpoint_every=3)
+
+    # The second worker logs a turn the first one never loaded ...
+    await first.append("ada", "user", "a0")
+    await second.append("ada", "model", "b0")
+    await first.append("ada", "user", "a1")
+    await first.append("ada", "model", "a2")
+    # ... so the first worker's checkpoint would skip it.
+    assert db.checkpoints == []
+    assert [t["parts"][0] for t in await first.history("ada")] == ["a0", "b0", "a1", "a2"]
+
+    # The second worker checkpoints while the first still has the old snapshot cached.
+    await second.append("ada", "user", "b1")
+    await second.append("ada", "model", "b2")
+    await first.append("ada", "user", "a3")
+    await first.append("ada", "model", "a4")
+    await first.append("ada", "user", "a5")
+    history = ["a0", "b0", "a1", "a2", "b1", "b2", "a3", "a4", "a5"]
+    # Each snapshot written holds every turn logged before it, from both workers.
+    assert [[t["parts"][0] for t in patch["history"]] for patch in db.checkpoints] == [history[:6], history]
+    assert [t["parts"][0] for t in await first.history("ada")] == history
+
+
+async def test_failed_checkpoint_is_retried_on_the_next_turn():
+    db = FakeDatabase()
+    writer = LogWriter(db.sink, flush_interval=0.0)
+    store = _store(db, writer, keep_turns=4, checkpoint_every=2)
+
+    db.fail_checkpoints = True
+    for i in range(2):
+        await store.append("ada", "user", f"turn {i}")
+    assert db.checkpoints == []
+
+    db.fail_checkpoints = False
+    await store.append("ada", "user", "turn 2")
+    assert [t["parts"][0] for t in db.checkpoints[0]["history"]] == ["turn 0", "turn 1", "turn 2"]
+    await writer.close()
+
+
+class RecordingConversation:
+    def __init__(self):
+        self.histories: list[list] = []
+
+    async def process(self, message, context):
+        history = context.get("conversation_history")
+        if history is not None:
+            self.histories.append(list(history))
+            history.append({"role": "user", "parts": ["mutated by the agent"]})
+        return OutgoingMessage(type="text", text=f"echo: {message.content}")
+
+
+async def test_pipeline_loads_and_appends_history(monkeypatch):
+    monkeypatch.setattr(communication, "mock_outbox", MessageOutbox(capacity=10))
+    user = UserIdentity(uuid.uuid4(), 1, "ada", "home", "UTC")
+
+    async def load_user(telegram_id: int):
+        return user if telegram_id == 1 else None
+
+    db = FakeDatabase()
+    writer = LogWriter(db.sink, flush_interval=0.0)
+    conversation = RecordingConversation()
+    pipeline = MessagePipeline(
+        MockTransport(), MockPerceptionAgent(), conversation, GatekeeperAgentImpl(),
+        identities=IdentityCache(load_user=load_user),
+        conversations=_store(db, writer),
+    )
+
+    await pipeline.handle({"telegram_id": 1, "content": "hello"})
+    await pipeline.handle({"telegram_id": 1, "content": "again"})
+    await pipeline.handle({"telegram_id": 2, "content": "stranger"})
+    await writer.close()
+
+    assert conversation.histories[0] == []
+    assert conversation.histories[1] == [
+        {"role": "user", "parts": ["hello"]},
+        {"role": "model", "parts": ["echo: hello"]},
+    ]
+    assert len(conversation.histories) == 2  # Unregistered senders have no history
+    assert [(m["direction"], m["content"]) for m in db.messages] == [
+        ("inbound", "hello"), ("outbound", "echo: hello"), ("inbound", "again"), ("outbound", "echo: again"),
+    ]
+
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import storage, redis_client
+from app.services.metrics import DB_POOL_WAIT
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _pool(exhausted=False):
+    return {"initialized": True, "size": 5, "checked_out": 5 if exhausted else 1, "capacity": 5, "exhausted": exhausted}
+
+
+def test_db_check_reports_latency_and_pool_without_dsn(client, monkeypatch):
+    async def probe():
+        return {"acquire_ms": 0.1, "query_ms": 0.4, "latency_ms": 0.5}
+
+    monkeypatch.setattr(storage, "probe_database", probe)
+    monkeypatch.setattr(storage, "pool_stats", _pool)
+
+    response = client.get("/health/db")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["latency_ms"] == 0.5
+    assert body["pool"]["checked_out"] == 1
+    assert "postgresql" not in response.text
+
+
+def test_redis_check_times_out(client, monkeypatch):
+    async def probe():
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(redis_client, "probe_redis", probe)
+    monkeypatch.setattr(redis_client, "pool_stats", _pool)
+    monkeypatch.setattr("app.api.health.settings.health_probe_timeout_seconds", 0.01)
+
+    response = client.get("/health/redis")
+
+    assert response.status_code == 503
+    assert response.json()["error"] == "timeout"
+
+
+def test_ready_fails_fast_when_pool_exhausted(client, monkeypatch):
+    async def probe():
+        raise AssertionError("probe must not run when the pool is exhausted")
+
+    monkeypatch.setattr(storage, "probe_database", probe)
+    monkeypatch.setattr(storage, "pool_stats", lambda: _pool(exhausted=True))
+    monkeypatch.setattr(redis_client, "pool_stats", _pool)
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 503
+    assert response.json() == {"status": "unavailable", "reason": "pool_exhausted", "pools": ["database"]}
+
+
+def test_pool_checkout_wait_is_observed():
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import QueuePool
+
+    waits = DB_POOL_WAIT.children()[()]
+    _, total_before, before = waits.snapshot()
+    engine = create_engine("sqlite://", poolclass=storage.timed_pool(QueuePool), pool_size=1, max_overflow=0)
+    try:
+        held = engine.connect()
+        releaser = threading.Timer(0.1, held.close)
+        releaser.start()
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            waited = time.perf_counter() - started
+            conn.execute(text("SELECT 1"))
+        releaser.join()
+    finally:
+        engine.dispose()
+
+    _, total, count = waits.snapshot()
+    assert count - before == 2
+    # The second checkout waited for the first connection to come back.
+    assert total - total_before >= 0.09
+    assert waited >= 0.09
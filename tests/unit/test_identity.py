@@ -0,0 +1,96 @@
+import asyncio
+import uuid
+
+from app.services.identity import IdentityCache, UserIdentity
+from app.services.metrics import CACHE_LOOKUPS
+from app.utils.cache import MISSING, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+
+    cache.set("short", None, ttl=1)
+    assert cache.get("short") is None
+    clock.now = 5
+    assert cache.get("short") is MISSING
+    clock.now = 11
+    assert cache.get("a") is MISSING
+
+
+def _user(telegram_id: int) -> UserIdentity:
+    return UserIdentity(uuid.uuid4(), telegram_id, "ada", "home", "UTC")
+
+
+class CountingLoader:
+    def __init__(self, known: set[int], delay: float = 0.0):
+        self.known = known
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, telegram_id: int):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return _user(telegram_id) if telegram_id in self.known else None
+
+
+async def test_hits_negative_hits_and_coalesced_misses():
+    loader = CountingLoader({42}, delay=0.01)
+    cache = IdentityCache(load_user=loader)
+    hits, misses = CACHE_LOOKUPS.labels("identity_user", "hit"), CACHE_LOOKUPS.labels("identity_user", "miss")
+    hits_before, misses_before = hits.get(), misses.get()
+
+    first = await asyncio.gather(*(cache.user(42) for _ in range(10)))
+    assert loader.calls == 1
+    assert len({u.id for u in first}) == 1
+
+    assert await cache.user(7) is None
+    assert await cache.user(7) is None
+    assert loader.calls == 2
+
+    assert misses.get() - misses_before == 11
+    assert hits.get() - hits_before == 1
+
+
+async def test_invalidation_during_a_load_is_not_overwritten_by_the_stale_result():
+    loader = CountingLoader({42}, delay=0.02)
+    cache = IdentityCache(load_user=loader)
+
+    stale = asyncio.create_task(cache.user(42))
+    await asyncio.sleep(0.005)
+    cache.invalidate_local("user:42")
+    await stale
+
+    await cache.user(42)
+    assert loader.calls == 2
+
+
+async def test_invalidation_messages():
+    loader = CountingLoader({42})
+    cache = IdentityCache(load_user=loader)
+    await cache.user(42)
+
+    cache.invalidate_local("camera:unknown-device")
+    cache.invalidate_local("garbage")
+    cache.invalidate_local("user:not-a-number")
+    await cache.user(42)
+    assert loader.calls == 1
+
+    cache.invalidate_local("user:42")
+    await cache.user(42)
+    assert loader.calls == 2
@@ -0,0 +1,26 @@
+import time
+import uuid
+
+from app.utils.ids import time_ordered_int, uuid7, uuid7_time
+
+
+def test_uuid7_layout():
+    value = uuid7()
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert abs(uuid7_time(value) - time.time()) < 1
+
+
+def test_uuid7_is_strictly_increasing_within_a_millisecond_burst():
+    values = [uuid7() for _ in range(20_000)]
+
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_time_ordered_int_is_monotonic_and_fits_53_bits():
+    values = [time_ordered_int() for _ in range(20_000)]
+
+    assert all(a < b for a, b in zip(values, values[1:]))
+    assert values[-1] < 2 ** 53
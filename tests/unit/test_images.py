@@ -0,0 +1,106 @@
+import asyncio
+import io
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+from app.agents.conversation import ConversationAgentImpl  # noqa: E402
+from app.agents.perception import MockPerceptionAgent  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import images, snapshots  # noqa: E402
+from app.services.images import ImagePoolBusy, ImageProcessor, variant_url  # noqa: E402
+from app.services.metrics import IMAGE_RENDERS  # noqa: E402
+from app.services.snapshots import LocalSnapshotStore  # noqa: E402
+from app.utils.imaging import VARIANTS, render  # noqa: E402
+
+
+def _photo(width: int = 2400, height: int = 1600) -> bytes:
+    # Blocks of colour plus noise: compresses like a camera frame, not like a flat fill.
+    rng = random.Random(7)
+    image = Image.new("RGB", (width // 16, height // 16))
+    image.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(image.width * image.height)])
+    image = image.resize((width, height), Image.Resampling.BICUBIC)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=95)
+    return buffer.getvalue()
+
+
+PHOTO = _photo()
+
+
+def test_variants_fit_their_bounds_and_shrink():
+    rendered = render(PHOTO, tuple(VARIANTS))
+
+    for name, (side, _) in VARIANTS.items():
+        with Image.open(io.BytesIO(rendered[name])) as image:
+            assert max(image.size) == side
+            assert image.size[0] / image.size[1] == pytest.approx(1.5, rel=0.01)
+        assert len(rendered[name]) < len(PHOTO)
+    assert len(rendered["thumb"]) < len(rendered["vision"]) < len(rendered["telegram"])
+
+
+def test_small_jpeg_is_not_re_encoded_larger():
+    small = _photo(200, 150)
+    assert len(render(small, ("telegram",))["telegram"]) <= len(small)
+
+
+@pytest.fixture
+async def processor(tmp_path):
+    processor = ImageProcessor(LocalSnapshotStore(tmp_path, "/api/v1/snapshots", 10_000_000), workers=1, max_pending=4)
+    yield processor
+    await processor.close()
+
+
+async def test_variants_are_rendered_once_per_frame(processor):
+    stored = await processor.store.put(PHOTO)
+    rendered = IMAGE_RENDERS.labels("rendered")
+    before = rendered.get()
+
+    results = await asyncio.gather(*(processor.ensure_variants(stored.hash) for _ in range(5)))
+    assert results == [True] * 5
+    assert await processor.ensure_variants(stored.hash)
+
+    assert rendered.get() == before + 1
+    for name in VARIANTS:
+        assert await processor.store.exists(stored.hash, name)
+    assert not await processor.ensure_variants("0" * 64)
+
+
+async def test_full_queue_is_refused_not_queued(processor):
+    processor.max_pending = 1
+    first = asyncio.ensure_future(processor.render(PHOTO))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ImagePoolBusy):
+        await processor.render(PHOTO)
+    assert set(await first) == set(VARIANTS)
+
+
+def test_snapshot_variant_is_served_and_sent_to_telegram(tmp_path, monkeypatch):
+    store = LocalSnapshotStore(tmp_path, "/api/v1/snapshots", 10_000_000)
+    monkeypatch.setattr(snapshots, "_store", store)
+    monkeypatch.setattr(images, "_processor", ImageProcessor(store, workers=1))
+
+    with TestClient(app) as client:
+        uploaded = client.post("/api/v1/cameras/hall/snapshots", content=PHOTO, headers={"content-type": "image/jpeg"}).json()
+        perception = MockPerceptionAgent()
+        asyncio.run(perception.record_snapshot("hall", uploaded["url"]))
+        reply = asyncio.run(ConversationAgentImpl(perception)._handle_snapshot_request({"camera_id": "hall"}))
+
+        assert reply.type == "photo"
+        assert reply.photo_url == variant_url(uploaded["url"], "telegram") == uploaded["url"] + "?variant=telegram"
+        response = client.get(reply.photo_url)
+        assert response.status_code == 200
+        assert "immutable" in response.headers["cache-control"]
+        with Image.open(io.BytesIO(response.content)) as image:
+            assert max(image.size) == VARIANTS["telegram"][0]
+        assert len(response.content) < len(PHOTO)
+        assert client.get(uploaded["url"] + "?variant=huge").status_code == 404
+
+
+def test_variant_url_leaves_foreign_urls_alone():
+    assert variant_url("https://cdn.example.com/a.jpg", "telegram") == "https://cdn.example.com/a.jpg"
@@ -0,0 +1,57 @@
+"""Cold-start guard: importing the app must stay cheap and must not pull in heavy clients."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Cumulative import budget for the entrypoint, in milliseconds. Generous enough for
+# slow CI machines, tight enough to catch an eager SDK import (google.generativeai
+# alone costs well over a second).
+IMPORT_BUDGET_MS = int(os.environ.get("IMPORT_TIME_BUDGET_MS", "1500"))
+
+HEAVY_MODULES = (
+    "google.generativeai",
+    "telegram",
+    "asyncpg",
+    "psycopg2",
+    "celery",
+)
+
+
+def _importtime(module: str) -> dict[str, int]:
+    """Import ``module`` in a fresh interpreter and return cumulative microseconds per module."""
+    env = {**os.environ, "TRANSPORT": "mock", "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        # "import time:  self [us] | cumulative | imported package"
+        _, _, cumulative, name = (part.strip() for part in line.replace(":", "|", 1).split("|"))
+        if cumulative.isdigit():
+            timings[name] = int(cumulative)
+    return timings
+
+
+@pytest.mark.parametrize("module", ["app.main", "app.agents", "app.models"])
+def test_no_heavy_imports(module):
+    timings = _importtime(module)
+    loaded = [name for name in timings if name.startswith(HEAVY_MODULES)]
+    assert not loaded, f"importing {module} eagerly loads {loaded}"
+
+
+def test_app_import_within_budget():
+    # Best of three to keep filesystem cache noise out of the measurement.
+    best_ms = min(_importtime("app.main")["app.main"] for _ in range(3)) / 1000
+    assert best_ms < IMPORT_BUDGET_MS, f"app.main imported in {best_ms:.0f}ms (budget {IMPORT_BUDGET_MS}ms)"
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.models.scene import UserIntent
+from app.services import gemini, llm_guard
+from app.services.metrics import LLM_REQUESTS
+
+
+class SlowModel:
+    """Blocking stand-in for the Gemini SDK model."""
+
+    def __init__(self, delay: float = 0.05, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.threads: set[int] = set()
+        self.thread_names: set[str] = set()
+        self.timeouts: set[float] = set()
+
+    def generate_content(self, prompt, request_options=None):
+        self.calls += 1
+        self.threads.add(threading.get_ident())
+        self.thread_names.add(threading.current_thread().name)
+        self.timeouts.add(request_options["timeout"])
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("upstream down")
+        reply = "STATUS_CHECK" if "Classify" in prompt else f"reply {self.calls}"
+        return SimpleNamespace(text=reply, usage_metadata=None)
+
+    def start_chat(self, history):
+        return SimpleNamespace(send_message=self.generate_content)
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = SlowModel()
+    monkeypatch.setattr(gemini, "get_model", lambda: model)
+    gemini.reset_llm_cache()
+    llm_guard.reset_guards()
+    yield model
+    gemini.reset_llm_cache()
+    llm_guard.reset_guards()
+    gemini.close_llm()
+
+
+async def test_concurrent_identical_requests_share_one_call(model):
+    joined = LLM_REQUESTS.labels("generate_response", "joined")
+    before = joined.get()
+    history = [{"role": "user", "parts": ["what's happening?"]}]
+
+    replies = await asyncio.gather(*(gemini.generate_response("prompt", history) for _ in range(10)))
+    assert replies == ["reply 1"] * 10
+    assert model.calls == 1
+    assert joined.get() - before == 9
+
+    # A different prompt or history is a different request.
+    await gemini.generate_response("other prompt", history)
+    await gemini.generate_response("prompt", history + [{"role": "model", "parts": ["ok"]}])
+    assert model.calls == 3
+
+
+async def test_results_are_cached_briefly(model, monkeypatch):
+    assert await gemini.classify_intent("how are things?") == UserIntent.STATUS_CHECK
+    assert await gemini.classify_intent("how are things?") == UserIntent.STATUS_CHECK
+    assert model.calls == 1
+
+    monkeypatch.setattr(settings, "llm_result_cache_ttl_seconds", 0)
+    gemini.reset_llm_cache()
+    await gemini.generate_response("prompt")
+    await gemini.generate_response("prompt")
+    assert model.calls == 3
+
+
+async def test_failures_are_shared_but_not_cached(model):
+    model.fail = True
+    results = await asyncio.gather(*(gemini.generate_response("prompt") for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert model.calls == 1
+
+    model.fail = False
+    assert await gemini.generate_response("prompt") == "reply 2"
+
+
+async def test_calls_run_off_the_event_loop(model):
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    await gemini.generate_response("prompt")
+    ticker.cancel()
+    assert ticks >= 3
+    assert threading.get_ident() not in model.threads
+
+
+async def test_coalescing_can_be_disabled(model, monkeypatch):
+    monkeypatch.setattr(settings, "llm_coalescing_enabled", False)
+    await asyncio.gather(*(gemini.generate_response("prompt") for _ in range(3)))
+    assert model.calls == 3
+
+
+async def test_abandoned_attempts_do_not_starve_the_default_executor(model, monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_threads", 2)
+    monkeypatch.setattr(settings, "llm_deadline_seconds", 0.05)
+    gemini.close_llm()
+    model.delay = 0.3
+
+    # Every call times out, leaving its attempts blocked in SDK threads.
+    results = await asyncio.gather(*(gemini.generate_response(f"prompt {i}") for i in range(6)), return_exceptions=True)
+    assert all(isinstance(r, llm_guard.LLMUnavailable) for r in results)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(asyncio.to_thread(lambda: None) for _ in range(10)))
+    assert time.perf_counter() - started < 0.1
+
+    assert all(name.startswith("llm") for name in model.thread_names)
+    assert len(model.threads) <= 2
+    assert model.timeouts == {0.05}
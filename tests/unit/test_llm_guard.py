@@ -0,0 +1,140 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from app.agents import conversation
+from app.agents.conversation import ConversationAgentImpl
+from app.agents.perception import MockPerceptionAgent
+from app.models.message import IncomingMessage
+from app.models.scene import CompactScene, Detection, UserIntent
+from app.services.llm_guard import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LLMGuard, LLMUnavailable
+from app.services.metrics import LLM_GUARD
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _reply(text: str, delay: float = 0.0):
+    async def call():
+        await asyncio.sleep(delay)
+        return text
+    return call
+
+
+async def _fail():
+    raise ConnectionError("upstream down")
+
+
+async def test_deadline_bounds_a_slow_call():
+    guard = LLMGuard("test_deadline", deadline=0.1, min_hedge_delay=0.05)
+    started = time.perf_counter()
+    with pytest.raises(LLMUnavailable):
+        await guard.call(_reply("late", delay=5))
+    assert time.perf_counter() - started < 0.5
+
+
+async def test_slow_first_attempt_is_hedged_after_p95():
+    guard = LLMGuard("test_hedge", deadline=2, min_hedge_delay=0.02)
+    for _ in range(20):
+        await guard.call(_reply("fast"))
+    assert guard.hedge_delay() == 0.02
+
+    delays = iter([1.0, 0.0])
+    won = LLM_GUARD.labels("test_hedge", "hedge_won")
+
+    async def sometimes_slow():
+        await asyncio.sleep(next(delays))
+        return "reply"
+
+    started = time.perf_counter()
+    assert await guard.call(sometimes_slow) == "reply"
+    assert time.perf_counter() - started < 0.5
+    assert won.get() == 1
+
+
+async def test_first_error_is_raised_when_every_attempt_fails():
+    guard = LLMGuard("test_errors", deadline=1)
+    with pytest.raises(ConnectionError):
+        await guard.call(_fail)
+
+
+def test_breaker_opens_on_failures_and_probes_with_one_call():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_ratio=0.5, min_calls=4, open_seconds=30, clock=clock)
+    for ok in (True, False, True):
+        assert breaker.allow()
+        assert not breaker.record(ok)
+    assert breaker.record(False)  # 2 of 4 failed
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Only one trial at a time
+    assert breaker.record(False)
+    assert breaker.state == OPEN
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+async def test_open_circuit_rejects_without_calling():
+    guard = LLMGuard("test_open", deadline=1, breaker=CircuitBreaker(min_calls=2))
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await guard.call(_fail)
+    calls = 0
+
+    async def counted():
+        nonlocal calls
+        calls += 1
+        return "reply"
+
+    with pytest.raises(LLMUnavailable):
+        await guard.call(counted)
+    assert calls == 0
+
+
+def test_slow_successes_count_as_failures():
+    guard = LLMGuard("test_slow", deadline=1, slow_call=0.01, breaker=CircuitBreaker(min_calls=2))
+    for _ in range(2):
+        asyncio.run(guard.call(_reply("slow", delay=0.02)))
+    assert guard.breaker.state == OPEN
+
+
+def _message(text: str) -> IncomingMessage:
+    return IncomingMessage(sender_telegram_id=1, message_id=1, type="text", content=text, timestamp=datetime.utcnow())
+
+
+async def test_conversation_falls_back_to_templates(monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise LLMUnavailable("circuit open")
+
+    monkeypatch.setattr(conversation, "classify_intent", unavailable)
+    agent = ConversationAgentImpl(MockPerceptionAgent())
+    scene = CompactScene(
+        camera_id="door",
+        timestamp=datetime.utcnow(),
+        objects=[Detection(type="kitty", confidence=0.9), Detection(type="person", confidence=0.8)],
+        motion=True,
+    )
+    reply = await agent.process(_message("how's it going?"), {"camera_id": "door", "latest_scene": scene})
+    assert reply.text == "I can't give a full answer right now. A cat and a person are currently visible. Motion detected."
+
+    async def unknown(text):
+        return UserIntent.UNKNOWN
+
+    monkeypatch.setattr(conversation, "classify_intent", unknown)
+    monkeypatch.setattr(conversation, "generate_response", unavailable)
+    context = {"camera_id": "door", "latest_scene": None, "conversation_history": []}
+    reply = await agent.process(_message("anything new?"), context)
+    assert reply.text == "I can't give a full answer right now. All quiet at home. No motion detected in the last 24 hours."
+    assert context["conversation_history"] == []
@@ -0,0 +1,93 @@
+import asyncio
+
+from app.services.log_writer import LogWriter
+from app.services.metrics import LOG_RECORDS
+
+
+class RecordingSink:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches: list[tuple[str, list[dict]]] = []
+
+    async def __call__(self, table: str, rows: list[dict]) -> None:
+        await asyncio.sleep(self.delay)
+        self.batches.append((table, rows))
+
+
+async def test_rows_are_batched_per_table():
+    sink = RecordingSink()
+    writer = LogWriter(sink, batch_size=100, flush_interval=0.05)
+
+    for i in range(5):
+        await writer.audit("message.handled", details={"n": i})
+    await writer.log_message(direction="inbound", content="hi")
+    await writer.close()
+
+    tables = {table: rows for table, rows in sink.batches}
+    assert len(sink.batches) == 2
+    assert [row["details"]["n"] for row in tables["audit_log"]] == [0, 1, 2, 3, 4]
+    assert tables["messages"] == [{"direction": "inbound", "content": "hi"}]
+
+
+async def test_write_does_not_wait_for_a_slow_sink():
+    sink = RecordingSink(delay=0.2)
+    writer = LogWriter(sink, batch_size=25, flush_interval=0.0)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for i in range(50):
+        await writer.audit("x", details={"n": i})
+    assert loop.time() - started < 0.1
+
+    await writer.close()
+    assert sum(len(rows) for _, rows in sink.batches) == 50
+
+
+async def test_drop_policy_counts_overflow():
+    dropped = LOG_RECORDS.labels("audit_log", "dropped")
+    before = dropped.get()
+    writer = LogWriter(RecordingSink(delay=0.05), capacity=2, overflow="drop")
+
+    results = [await writer.audit("x") for _ in range(5)]
+
+    assert results.count(False) == 3
+    assert dropped.get() - before == 3
+    await writer.close()
+
+
+async def test_block_policy_waits_for_space():
+    sink = RecordingSink(delay=0.01)
+    writer = LogWriter(sink, capacity=2, batch_size=2, flush_interval=0.0, overflow="block")
+
+    assert all([await writer.audit("x", details={"n": i}) for i in range(10)])
+    await writer.close()
+    assert sum(len(rows) for _, rows in sink.batches) == 10
+
+
+async def test_sink_failure_is_counted_and_writer_keeps_going():
+    failed = LOG_RECORDS.labels("messages", "failed")
+    before = failed.get()
+    calls = 0
+
+    async def flaky(table, rows):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ConnectionError("db down")
+
+    writer = LogWriter(flaky, flush_interval=0.0)
+    await writer.log_message(content="lost")
+    await asyncio.sleep(0.01)
+    await writer.log_message(content="kept")
+    await writer.close()
+
+    assert failed.get() - before == 1
+    assert calls == 2
+
+
+async def test_writes_after_close_are_dropped():
+    writer = LogWriter(RecordingSink())
+    await writer.audit("x")
+    await writer.close()
+
+    assert await writer.audit("late") is False
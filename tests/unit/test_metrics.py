@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+
+from app.agents.gatekeeper import GatekeeperAgentImpl
+from app.main import app
+from app.models.message import OutgoingMessage
+from app.services.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = Histogram("test_latency_seconds", "Test.", ("stage",), buckets=(0.1, 1.0), registry=registry)
+    child = histogram.labels("a")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    text = registry.render()
+
+    assert 'test_latency_seconds_bucket{stage="a",le="0.1"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="a",le="1.0"} 3' in text
+    assert 'test_latency_seconds_bucket{stage="a",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_count{stage="a"} 4' in text
+
+
+def test_children_are_reused_per_label_set():
+    registry = Registry()
+    counter = Counter("test_total", "Test.", ("outcome",), registry=registry)
+    assert counter.labels("ok") is counter.labels("ok")
+
+    gauge = Gauge("test_depth", "Test.", registry=registry)
+    gauge.set_function(lambda: 7)
+    assert "test_depth 7" in registry.render()
+
+
+async def test_metrics_endpoint_exposes_stage_latency():
+    await GatekeeperAgentImpl().validate_response(OutgoingMessage(type="text", text="hi"), {})
+
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'homey_stage_latency_seconds_count{stage="gatekeeper"}' in response.text
+    assert 'homey_queue_depth{queue="mock_outbox"} 0' in response.text
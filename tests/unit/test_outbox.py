@@ -0,0 +1,67 @@
+import asyncio
+
+from app.services.outbox import MessageOutbox
+
+
+def _message(user: str, text: str) -> dict:
+    return {"telegram_id": user, "text": text}
+
+
+def test_ring_buffer_evicts_oldest_and_keeps_sequence():
+    outbox = MessageOutbox(capacity=3)
+    for i in range(5):
+        outbox.append(_message("a" if i % 2 else "b", str(i)))
+
+    assert len(outbox) == 3
+    assert [m["seq"] for m in outbox.read()] == [3, 4, 5]
+    assert [m["seq"] for m in outbox.read(after=3, limit=1)] == [4]
+    assert outbox.read(after=5) == []
+
+
+def test_per_user_index_follows_eviction():
+    outbox = MessageOutbox(capacity=3)
+    for i in range(5):
+        outbox.append(_message("a" if i % 2 else "b", str(i)))
+
+    assert [m["text"] for m in outbox.read(user_id="a")] == ["3"]
+    assert [m["text"] for m in outbox.read(user_id="b")] == ["2", "4"]
+    assert [m["text"] for m in outbox.read(after=3, user_id="b")] == ["4"]
+    assert outbox.read(user_id="nobody") == []
+
+
+async def test_wait_returns_when_a_message_arrives():
+    outbox = MessageOutbox(capacity=10)
+    waiter = asyncio.create_task(outbox.wait(after=0, user_id="a", timeout=5))
+    await asyncio.sleep(0)
+
+    outbox.append(_message("b", "not for a"))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    outbox.append(_message("a", "hello"))
+    messages = await asyncio.wait_for(waiter, 1)
+    assert [m["text"] for m in messages] == ["hello"]
+
+
+async def test_wait_times_out_empty():
+    assert await MessageOutbox(capacity=10).wait(timeout=0.01) == []
+
+
+def test_messages_endpoint_paginates_with_cursor(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import app.api.mock as mock
+    from app.main import app
+
+    outbox = MessageOutbox(capacity=10)
+    monkeypatch.setattr(mock, "mock_outbox", outbox)
+    for i in range(3):
+        outbox.append(_message("42", str(i)))
+    client = TestClient(app)
+
+    first = client.get("/api/v1/mock/messages?limit=2").json()
+    second = client.get(f"/api/v1/mock/messages?after={first['next_cursor']}").json()
+
+    assert [m["text"] for m in first["messages"]] == ["0", "1"]
+    assert [m["text"] for m in second["messages"]] == ["2"]
+    assert second["next_cursor"] == second["latest_seq"] == 3
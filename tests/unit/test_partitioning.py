@@ -0,0 +1,162 @@
+from collections import Counter
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.agents.event import EventAgentImpl
+from app.agents.perception import MockPerceptionAgent
+from app.agents.pipeline import SceneIngestPipeline
+from app.config import settings
+from app.models.scene import CompactScene, Detection
+from app.services import partitioning, snapshots
+from app.services.partitioning import FORWARDED_HEADER, HashRing, Partitioner
+from app.services.snapshots import LocalSnapshotStore
+
+CAMERAS = [f"cam-{i}" for i in range(2000)]
+
+
+def test_ring_spreads_keys_and_moves_few_on_join():
+    before = HashRing(["a", "b", "c", "d"])
+    after = HashRing(["a", "b", "c", "d", "e"])
+
+    counts = Counter(before.owner(c) for c in CAMERAS)
+    assert min(counts.values()) > len(CAMERAS) / 4 * 0.7
+
+    moved = [c for c in CAMERAS if before.owner(c) != after.owner(c)]
+    assert len(moved) < len(CAMERAS) * 0.3
+    assert all(after.owner(c) == "e" for c in moved)
+
+
+class InMemoryMembership:
+    def __init__(self):
+        self.urls: dict[str, str] = {}
+        self.handoffs: dict[str, dict] = {}
+
+    async def heartbeat(self, worker_id, url, ttl):
+        self.urls[worker_id] = url
+        return dict(self.urls)
+
+    async def leave(self, worker_id):
+        self.urls.pop(worker_id, None)
+
+    async def put_handoff(self, camera_id, state, ttl):
+        self.handoffs[camera_id] = state
+
+    async def take_handoff(self, camera_id):
+        return self.handoffs.pop(camera_id, None)
+
+
+def _worker(name: str, membership: InMemoryMembership) -> tuple[Partitioner, SceneIngestPipeline]:
+    ingest = SceneIngestPipeline(MockPerceptionAgent(), EventAgentImpl())
+    partitioner = Partitioner(
+        ingest.export_camera, ingest.import_camera,
+        membership=membership, worker_id=name, advertise_url=f"http://{name}",
+    )
+    return partitioner, ingest
+
+
+def _scene(camera_id: str) -> CompactScene:
+    return CompactScene(
+        camera_id=camera_id,
+        timestamp=datetime.utcnow(),
+        objects=[Detection(type="package", confidence=0.9)],
+        motion=True,
+    )
+
+
+async def test_state_follows_the_camera_when_a_worker_joins():
+    membership = InMemoryMembership()
+    a, ingest_a = _worker("a", membership)
+    await a._refresh()
+    cameras = CAMERAS[:50]
+    for camera_id in cameras:
+        await a.claim(camera_id)
+        assert await ingest_a.handle(_scene(camera_id), {"camera_id": camera_id}) is not None
+
+    b, ingest_b = _worker("b", membership)
+    await b._refresh()
+    await a._refresh()
+
+    moved = [c for c in cameras if a.owner_url(c) == "http://b"]
+    assert moved and len(moved) < len(cameras)
+    assert set(membership.handoffs) == set(moved)
+    for camera_id in moved:
+        assert camera_id not in ingest_a.perception.scene_history
+
+        await b.claim(camera_id)
+        assert len(ingest_b.perception.scene_history[camera_id]) == 1
+        # The package rule's cooldown came along, so the next scene does not re-alert.
+        assert await ingest_b.handle(_scene(camera_id), {"camera_id": camera_id}) is None
+
+
+@pytest.fixture
+def partitioned(monkeypatch):
+    membership = InMemoryMembership()
+    membership.urls["peer"] = "http://peer"
+    local, _ = _worker("local", membership)
+    forwarded = []
+
+    def peer(request: httpx.Request) -> httpx.Response:
+        forwarded.append(request)
+        if request.url.host == "broken-peer":
+            return httpx.Response(502, text="<html>Bad Gateway</html>")
+        return httpx.Response(200, json={"status": "accepted", "handled_by": "peer"})
+
+    local._client = httpx.AsyncClient(transport=httpx.MockTransport(peer))
+    monkeypatch.setattr(settings, "partitioning_enabled", True)
+    monkeypatch.setattr(partitioning, "_partitioner", local)
+    return local, forwarded
+
+
+async def test_upload_is_forwarded_to_the_owner_once(partitioned):
+    local, forwarded = partitioned
+    await local._refresh()
+    remote_camera = next(c for c in CAMERAS if local.owner_url(c))
+    body = {"timestamp": "2024-01-01T12:00:00", "objects": [], "motion": False}
+
+    from app.main import app
+
+    client = TestClient(app)
+    response = client.post(f"/api/v1/cameras/{remote_camera}/scenes", json=body)
+    assert response.json()["handled_by"] == "peer"
+    assert forwarded[0].headers[FORWARDED_HEADER] == "local"
+
+    # Already forwarded once: handled here even though the ring says otherwise.
+    response = client.post(
+        f"/api/v1/cameras/{remote_camera}/scenes", json=body, headers={FORWARDED_HEADER: "peer"},
+    )
+    assert response.json()["status"] == "accepted"
+    assert len(forwarded) == 1
+
+
+async def test_snapshot_is_forwarded_whole_when_storage_is_local(partitioned, tmp_path, monkeypatch):
+    local, forwarded = partitioned
+    store = LocalSnapshotStore(tmp_path, "/api/v1/snapshots", 10_000_000)
+    monkeypatch.setattr(snapshots, "_store", store)
+    await local._refresh()
+    remote_camera = next(c for c in CAMERAS if local.owner_url(c))
+
+    from app.main import app
+
+    response = TestClient(app).post(
+        f"/api/v1/cameras/{remote_camera}/snapshots", content=b"jpeg bytes", headers={"content-type": "image/jpeg"},
+    )
+    assert response.json()["handled_by"] == "peer"
+    assert forwarded[0].content == b"jpeg bytes"
+    assert forwarded[0].headers["content-type"] == "image/jpeg"
+    # The owner stores it; nothing is left on this worker's disk.
+    assert not any(path.is_file() for path in tmp_path.rglob("*"))
+
+
+async def test_non_json_reply_counts_as_a_failed_forward(partitioned):
+    local, _ = partitioned
+    assert await local.forward("http://broken-peer", "/api/v1/cameras/cam/scenes", {}) is None
+
+
+async def test_start_requires_an_advertise_url():
+    partitioner, _ = _worker("a", InMemoryMembership())
+    partitioner.advertise_url = ""
+    with pytest.raises(RuntimeError, match="WORKER_ADVERTISE_URL"):
+        await partitioner.start()
@@ -0,0 +1,221 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.agents.event import EventAgentImpl
+from app.agents.perception import MockPerceptionAgent
+from app.agents.pipeline import SceneIngestPipeline
+from app.main import app
+from app.models.scene import CompactScene, Detection
+from app.models.user import Camera, User
+from app.services.heartbeats import HeartbeatRecorder, heartbeat_update
+from app.services.metrics import UPLOAD_INTERVAL
+from app.services.rate_control import UploadRateController
+from app.services.storage import Base
+
+RULES = [
+    {
+        "id": "person",
+        "name": "Person detected",
+        "trigger": {"type": "object_detected", "object_type": "person"},
+        "conditions": [],
+        "severity": "high",
+    },
+    {
+        "id": "motion_when_away",
+        "name": "Motion while away",
+        "trigger": {"type": "motion"},
+        "conditions": [{"type": "user_status", "value": {"status": "away"}}],
+        "severity": "medium",
+    },
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _scene(camera_id: str = "door", objects=(), motion_score: float | None = None) -> CompactScene:
+    return CompactScene(
+        camera_id=camera_id,
+        timestamp=datetime(2024, 1, 1),
+        objects=[Detection(type=kind, confidence=confidence) for kind, confidence in objects],
+        motion=bool(motion_score),
+        motion_score=motion_score,
+    )
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def rate(clock):
+    return UploadRateController(min_interval=1, max_interval=30, overload_interval=120, half_life=60, capacity=10, clock=clock)
+
+
+def test_quiet_cameras_slow_down_and_busy_ones_speed_up(rate):
+    assert rate.interval("unknown") == 30
+    assert rate.observe(_scene("quiet"), interest=0.5, alerted=False) == 30
+    busy = rate.observe(_scene("busy", [("person", 0.95)], 0.9), interest=1.0, alerted=False)
+    assert busy < 2
+    # The same activity that no armed rule cares about is paced much more slowly.
+    assert rate.observe(_scene("yard", [("cat", 0.95)], 0.9), interest=0.0, alerted=False) > 10
+
+
+def test_activity_decays_with_half_life(rate, clock):
+    rate.observe(_scene(objects=[("person", 1.0)]), interest=1.0, alerted=False)
+    intervals = []
+    for _ in range(4):
+        clock.now += 60
+        intervals.append(rate.observe(_scene(), interest=1.0, alerted=False))
+    assert intervals == sorted(intervals)
+    assert intervals[0] < 10 and intervals[-1] > 20
+
+
+def test_alert_holds_fastest_pace(rate, clock):
+    rate.observe(_scene(objects=[("person", 0.6)]), interest=1.0, alerted=True)
+    clock.now += 100
+    assert rate.observe(_scene(), interest=0.0, alerted=False) == 1
+    clock.now += 30
+    assert rate.interval("door") > 1
+
+
+def test_load_stretches_low_urgency_cameras_first(rate):
+    rate.observe(_scene("quiet"), interest=0.5, alerted=False)
+    rate.observe(_scene("alerting", [("person", 1.0)]), interest=1.0, alerted=True)
+    assert rate.interval("quiet", depth=5) == 75
+    assert rate.interval("quiet", depth=50) == 120
+    assert rate.interval("alerting", depth=50) == 1
+
+
+def test_event_interest_follows_armed_rules():
+    events = EventAgentImpl(rules=RULES)
+    home, away = {"user_status": "home"}, {"user_status": "away"}
+    assert events.interest(_scene(objects=[("person", 0.8)]), home) == 1.0
+    assert events.interest(_scene(motion_score=0.5), home) == 0.5
+    assert events.interest(_scene(motion_score=0.5), away) == 1.0
+    assert EventAgentImpl(rules=RULES[1:]).interest(_scene(motion_score=0.5), home) == 0.0
+
+
+def test_adaptive_pacing_uploads_less_and_reacts_faster(clock):
+    """
+    One hour of a camera that sees a person for two minutes. A fixed 5 s cadence
+    is compared with a phone that uploads on detector changes and otherwise
+    waits for the recommended interval.
+    """
+    rate = UploadRateController(clock=clock)
+    events = EventAgentImpl(rules=RULES)
+    start, person = clock.now, (clock.now + 1800, clock.now + 1920)
+
+    def scene_at(t: float) -> CompactScene:
+        if person[0] <= t < person[1]:
+            return _scene(objects=[("person", 0.9)], motion_score=0.8)
+        return _scene()
+
+    uploads, gaps_during_event = 0, []
+    t, last, interval = start, None, 0.0
+    while t < start + 3600:
+        changed = last is not None and scene_at(t).objects != scene_at(last).objects
+        if last is None or changed or t - last >= interval:
+            clock.now = t
+            scene = scene_at(t)
+            interval = rate.observe(scene, events.interest(scene, {}), alerted=False)
+            if last is not None and person[0] < t < person[1]:
+                gaps_during_event.append(t - last)
+            uploads += 1
+            last = t
+        t += 0.5
+
+    fixed_uploads = 3600 / 5
+    assert uploads < fixed_uploads / 3
+    # While the person is in view, the server hears about them more often than every 5 s.
+    assert max(gaps_during_event) < 5
+
+
+async def test_heartbeats_are_written_in_batches():
+    written = []
+
+    async def write(beats):
+        written.append(dict(beats))
+
+    recorder = HeartbeatRecorder(write, flush_interval=0.01)
+    first = datetime(2024, 1, 1)
+    recorder.beat("a", first)
+    recorder.beat("a", first + timedelta(seconds=5))
+    recorder.beat("b", first)
+    await asyncio.sleep(0.05)
+    await recorder.close()
+    assert written == [{"a": first + timedelta(seconds=5), "b": first}]
+
+
+async def test_failed_heartbeat_write_is_retried():
+    calls = []
+
+    async def write(beats):
+        calls.append(dict(beats))
+        if len(calls) == 1:
+            raise ConnectionError("database down")
+
+    recorder = HeartbeatRecorder(write, flush_interval=3600)
+    recorder.beat("a", datetime(2024, 1, 1))
+    await recorder.flush()
+    await recorder.close()
+    assert calls == [{"a": datetime(2024, 1, 1)}] * 2
+
+
+def test_heartbeat_update_runs_as_one_executemany():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    user = User(id=uuid.uuid4(), telegram_id=42)
+    cameras = [Camera(id=uuid.uuid4(), user_id=user.id, device_id=f"cam-{i}") for i in range(3)]
+    with Session(engine) as session:
+        session.add_all([user, *cameras])
+        session.commit()
+        beats = {str(cameras[0].id): datetime(2024, 1, 1, 12), str(cameras[1].id): datetime(2024, 1, 1, 13)}
+        session.execute(*heartbeat_update(beats))
+        session.commit()
+        written = {camera.device_id: camera.last_heartbeat for camera in session.query(Camera)}
+    engine.dispose()
+    # SQLite drops the timezone on the way back
+    assert written == {"cam-0": datetime(2024, 1, 1, 12), "cam-1": datetime(2024, 1, 1, 13), "cam-2": None}
+
+
+async def test_ingest_reports_the_upload_interval():
+    reported = UPLOAD_INTERVAL.children()[()]
+    _, _, before = reported.snapshot()
+    ingest = SceneIngestPipeline(MockPerceptionAgent(), EventAgentImpl(rules=RULES), rate=UploadRateController())
+    assert ingest.upload_interval("porch") == 30
+    await ingest.handle(_scene("porch", [("person", 0.9)], 0.9))
+    assert ingest.upload_interval("porch") == 1
+    # One observation per interval handed to the phone, none for the ingest itself
+    assert reported.snapshot()[2] - before == 2
+    assert ingest.in_flight == 0
+    assert SceneIngestPipeline(MockPerceptionAgent(), EventAgentImpl()).upload_interval("porch") is None
+
+
+def test_heartbeat_and_upload_responses_carry_the_interval():
+    with TestClient(app) as client:
+        response = client.post("/api/v1/cameras/rate-test/heartbeat")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok", "camera_id": "rate-test", "upload_interval_seconds": 30}
+
+        response = client.post("/api/v1/cameras/rate-test/scenes", json={
+            "timestamp": "2024-01-01T12:00:00",
+            "objects": [{"type": "package", "confidence": 0.9}],
+            "motion": True,
+            "motion_score": 0.9,
+        })
+        interval = response.json()["upload_interval_seconds"]
+        assert interval < 30
+        assert client.post("/api/v1/cameras/rate-test/heartbeat").json()["upload_interval_seconds"] == interval
@@ -0,0 +1,170 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.agents.event import EventAgentImpl
+from app.models.event import AlertRule as AlertRuleModel
+from app.models.scene import CompactScene, Detection
+from app.models.user import AlertRule, User
+from app.services.rule_store import RuleStore, StoredRule, last_triggered_update
+from app.services.storage import Base
+
+ALICE, BOB = "user-alice", "user-bob"
+FRONT_DOOR = "camera-front"
+
+SCENE = CompactScene(
+    camera_id="device-1",
+    timestamp=datetime(2024, 1, 1, 12, 0),
+    objects=[Detection(type="cat", confidence=0.9)],
+    motion=True,
+)
+
+
+def _stored(rule_id: str, user_id: str, camera_id: str | None = None, object_type: str = "cat",
+            last_triggered_at: datetime | None = None) -> StoredRule:
+    rule = AlertRuleModel(
+        id=rule_id,
+        name=rule_id,
+        trigger={"type": "object_detected", "object_type": object_type},
+        cooldown_seconds=60,
+    )
+    return StoredRule(user_id, camera_id, rule, last_triggered_at)
+
+
+class FakeDatabase:
+    def __init__(self, rules: list[StoredRule]):
+        self.rules = rules
+        self.loads: list[str | None] = []
+        self.writes: list[dict] = []
+
+    async def load(self, user_id):
+        self.loads.append(user_id)
+        return [r for r in self.rules if user_id is None or r.user_id == user_id]
+
+    async def write(self, triggered):
+        self.writes.append(dict(triggered))
+
+
+async def test_rules_are_resolved_per_user_and_camera_from_memory():
+    db = FakeDatabase([
+        _stored("alice-any", ALICE),
+        _stored("alice-door", ALICE, FRONT_DOOR),
+        _stored("bob-any", BOB),
+    ])
+    store = RuleStore(db.load, db.write)
+    await store.reload()
+
+    assert [r.id for r in store.rules_for(ALICE, FRONT_DOOR)] == ["alice-any", "alice-door"]
+    assert [r.id for r in store.rules_for(ALICE, "camera-garden")] == ["alice-any"]
+    assert store.rules_for("user-unknown") is None
+    assert db.loads == [None]
+
+
+async def test_notification_reloads_only_that_user():
+    db = FakeDatabase([_stored("alice-any", ALICE), _stored("bob-any", BOB)])
+    store = RuleStore(db.load, db.write)
+    await store.reload()
+    store.rules_for(ALICE)
+
+    db.rules = [_stored("alice-new", ALICE), _stored("bob-changed-but-not-announced", BOB)]
+    await store.reload(ALICE)
+
+    assert db.loads == [None, ALICE]
+    assert [r.id for r in store.rules_for(ALICE)] == ["alice-new"]
+    assert [r.id for r in store.rules_for(BOB)] == ["bob-any"]
+
+
+async def test_matches_update_last_triggered_in_batches():
+    db = FakeDatabase([_stored("alice-any", ALICE)])
+    store = RuleStore(db.load, db.write)
+    await store.reload()
+
+    first = datetime(2024, 1, 1, 12, 0)
+    store.record_trigger("alice-any", first)
+    store.record_trigger("alice-any", first + timedelta(seconds=5))
+    await store.flush()
+    await store.flush()
+
+    assert db.writes == [{"alice-any": first + timedelta(seconds=5)}]
+
+
+async def test_event_agent_uses_stored_rules_with_per_camera_cooldowns():
+    recently = datetime.utcnow() - timedelta(seconds=10)
+    db = FakeDatabase([
+        _stored("alice-cat", ALICE),
+        _stored("bob-cat", BOB, last_triggered_at=recently),
+    ])
+    store = RuleStore(db.load, db.write)
+    await store.reload()
+    agent = EventAgentImpl(rule_store=store)
+
+    alert = await agent.evaluate(SCENE, {"user_id": ALICE})
+    assert alert["rule_id"] == "alice-cat"
+    assert "alice-cat" in store._pending
+    assert await agent.evaluate(SCENE, {"user_id": ALICE}) is None
+
+    # Another camera is not silenced by the first one's cooldown.
+    garden = CompactScene(camera_id="device-2", timestamp=SCENE.timestamp, objects=SCENE.objects, motion=True)
+    assert (await agent.evaluate(garden, {"user_id": ALICE}))["rule_id"] == "alice-cat"
+
+    # last_triggered_at is a record of the last match, not a cooldown.
+    assert (await agent.evaluate(SCENE, {"user_id": BOB}))["rule_id"] == "bob-cat"
+
+    # Unresolved uploads keep the built-in defaults.
+    assert (await agent.evaluate(SCENE, {"user_status": "away"}))["rule_id"] == "motion_when_away"
+
+
+async def test_only_stored_rules_are_written_back():
+    db = FakeDatabase([_stored("alice-cat", ALICE)])
+    store = RuleStore(db.load, db.write)
+    await store.reload()
+    agent = EventAgentImpl(rule_store=store)
+
+    assert (await agent.evaluate(SCENE, {"user_status": "away"}))["rule_id"] == "motion_when_away"
+    assert (await agent.evaluate(SCENE, {"user_id": ALICE}))["rule_id"] == "alice-cat"
+    await store.flush()
+
+    assert [list(w) for w in db.writes] == [["alice-cat"]]
+
+
+async def test_unwritable_batches_are_dropped_not_retried():
+    calls = []
+
+    async def write(triggered):
+        calls.append(dict(triggered))
+        raise ValueError("badly formed hexadecimal UUID string")
+
+    store = RuleStore(FakeDatabase([]).load, write)
+    store.record_trigger("not-a-uuid", datetime(2024, 1, 1, 12, 0))
+    await store.flush()
+    await store.flush()
+
+    assert len(calls) == 1
+    assert store._pending == {}
+
+
+def test_last_triggered_update_runs_as_one_executemany():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    user = User(id=uuid.uuid4(), telegram_id=42)
+    rules = [
+        AlertRule(id=uuid.uuid4(), user_id=user.id, name=f"rule-{i}", trigger_type="motion", trigger_config={})
+        for i in range(3)
+    ]
+    with Session(engine) as session:
+        session.add_all([user, *rules])
+        session.commit()
+        triggered = {
+            str(rules[0].id): datetime(2024, 1, 1, 12),
+            str(rules[1].id): datetime(2024, 1, 1, 13),
+            "motion_when_away": datetime(2024, 1, 1, 14),
+        }
+        statement, params = last_triggered_update(triggered)
+        assert len(params) == 2
+        session.execute(statement, params)
+        session.commit()
+        written = {rule.name: rule.last_triggered_at for rule in session.query(AlertRule)}
+    engine.dispose()
+    assert written == {"rule-0": datetime(2024, 1, 1, 12), "rule-1": datetime(2024, 1, 1, 13), "rule-2": None}
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from app.agents.event import EventAgentImpl
+from app.models.scene import CompactScene, Detection, DetectedObject, SceneDescriptor, SceneUpload, object_type_id
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+
+def test_descriptor_round_trip():
+    descriptor = SceneDescriptor(
+        camera_id="door",
+        timestamp=NOW,
+        objects=[DetectedObject(type="cat", confidence=0.9, bbox=[1, 2, 3, 4]), DetectedObject(type="person", confidence=0.5)],
+        motion=True,
+        motion_score=0.3,
+        snapshot_url="/snapshots/abc",
+        frame_hash="abc",
+    )
+    scene = CompactScene.from_descriptor(descriptor)
+    assert [o.type for o in scene.objects] == ["cat", "person"]
+    assert scene.to_descriptor() == descriptor
+    assert CompactScene.from_descriptor(scene.to_descriptor()) == scene
+
+
+def test_object_types_are_interned():
+    upload = SceneUpload.model_validate({"timestamp": NOW.isoformat(), "objects": [{"type": "raccoon", "confidence": 0.8}]})
+    scene = CompactScene.from_upload("yard", upload)
+    assert scene.objects[0].type_id == Detection("raccoon", 0.1).type_id == object_type_id("raccoon")
+    assert object_type_id("never-detected") is None
+
+
+async def test_rules_match_on_type_ids():
+    agent = EventAgentImpl(rules=[
+        {
+            "id": "unicorn",
+            "name": "Unicorn",
+            "trigger": {"type": "object_detected", "object_type": "unicorn-never-seen"},
+        },
+        {
+            "id": "no_cat",
+            "name": "Cat left",
+            "trigger": {"type": "object_absent", "object_type": "cat"},
+        },
+        {
+            "id": "dog",
+            "name": "Dog",
+            "trigger": {"type": "object_detected", "object_type": "dog", "confidence_threshold": 0.6},
+        },
+    ])
+    with_cat = CompactScene("door", NOW, [Detection("cat", 0.9)])
+    assert await agent.evaluate(with_cat, {}) is None
+    assert agent.interest(with_cat, {}) == 0.5
+
+    with_dog = CompactScene("door", NOW, [Detection("dog", 0.7)])
+    assert agent.interest(with_dog, {}) == 1.0
+    assert (await agent.evaluate(with_dog, {}))["rule_id"] == "no_cat"
+    assert (await agent.evaluate(with_dog, {}))["rule_id"] == "dog"
+
+
+def test_intern_table_is_capped(monkeypatch):
+    from app.models import scene
+
+    monkeypatch.setattr(scene, "_TYPE_IDS", dict(scene._TYPE_IDS))
+    monkeypatch.setattr(scene, "_TYPE_NAMES", list(scene._TYPE_NAMES))
+    monkeypatch.setattr(scene, "MAX_OBJECT_TYPES", len(scene._TYPE_NAMES) + 2)
+
+    assert Detection("x" * 1000, 0.5).type == "unknown"
+    names = [f"junk-{i}" for i in range(100)]
+    assert [Detection(name, 0.5).type for name in names[:3]] == ["junk-0", "junk-1", "unknown"]
+    assert len(scene._TYPE_NAMES) == scene.MAX_OBJECT_TYPES
+    assert object_type_id("junk-2") is None
+    # Known types keep their ids once the table is full.
+    assert Detection("junk-1", 0.5).type == "junk-1"
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents import conversation
+from app.agents.conversation import ConversationAgentImpl, object_query_target
+from app.agents.perception import MockPerceptionAgent
+from app.models.message import IncomingMessage
+from app.models.scene import CompactScene, Detection, UserIntent
+from app.services import gemini
+from app.services.sightings import SightingIndex, SightingRecorder, mentioned_object_types, normalize_object_type
+
+NOW = datetime.utcnow()
+
+
+def _scene(camera_id: str, at: datetime, *objects: tuple[str, float]) -> CompactScene:
+    return CompactScene(
+        camera_id=camera_id,
+        timestamp=at,
+        objects=[Detection(type=kind, confidence=confidence) for kind, confidence in objects],
+    )
+
+
+def _message(text: str) -> IncomingMessage:
+    return IncomingMessage(sender_telegram_id=1, message_id=1, type="text", content=text, timestamp=NOW)
+
+
+def test_object_words_are_normalized():
+    assert normalize_object_type("Kitty") == "cat"
+    assert normalize_object_type("puppies") == "dog"
+    assert normalize_object_type("parcels") == "package"
+    assert normalize_object_type("anyone") == "person"
+    assert normalize_object_type("things") is None
+    assert mentioned_object_types("Are the kittens and the cat with the dog?") == ["cat", "dog"]
+
+
+def test_index_keeps_latest_time_best_confidence_and_count():
+    index = SightingIndex(min_confidence=0.4)
+    index.observe(_scene("door", NOW, ("cat", 0.7), ("kitten", 0.9), ("dog", 0.2)))
+    index.observe(_scene("door", NOW - timedelta(minutes=5), ("Cat", 0.8)))
+
+    cat = index.get("door", "cat")
+    assert cat.count == 2 and cat.confidence == 0.9
+    assert cat.last_seen_at == NOW.replace(tzinfo=timezone.utc)
+    assert index.get("door", "dog") is None  # Below the noise floor
+    assert index.get("yard", "cat") is None
+
+
+def test_index_moves_with_camera_in_compact_form():
+    index = SightingIndex()
+    index.observe(_scene("door", NOW, ("cat", 0.9)))
+    state = index.export_camera("door")
+    assert state == {"cat": [NOW.replace(tzinfo=timezone.utc).timestamp(), 0.9, 1]}
+    assert index.get("door", "cat") is None
+
+    other = SightingIndex()
+    other.observe(_scene("door", NOW - timedelta(hours=1), ("cat", 0.5)))
+    other.import_camera("door", state)
+    assert other.get("door", "cat").count == 2
+    assert other.get("door", "cat").confidence == 0.9
+
+
+class FakeRedisHashes:
+    def __init__(self):
+        self.hashes: dict[str, dict[str, list]] = {}
+        self.writes = 0
+
+    async def load(self, camera_id):
+        return {t: list(v) for t, v in self.hashes.get(camera_id, {}).items()}
+
+    async def write(self, changed):
+        self.writes += 1
+        for camera_id, sightings in changed.items():
+            self.hashes.setdefault(camera_id, {}).update(sightings)
+
+
+async def test_sightings_survive_a_restart():
+    redis = FakeRedisHashes()
+    recorder = SightingRecorder(redis.load, redis.write, flush_interval=60)
+    perception = MockPerceptionAgent(sighting_recorder=recorder)
+    for minutes in (30, 20, 10):
+        await perception.record_scene(_scene("door", NOW - timedelta(minutes=minutes), ("cat", 0.8)))
+    await recorder.close()
+    assert redis.writes == 1
+
+    restarted = MockPerceptionAgent(sighting_recorder=SightingRecorder(redis.load, redis.write))
+    cat = await restarted.last_seen("door", "cat")
+    assert cat.count == 3
+    assert cat.last_seen_at == (NOW - timedelta(minutes=10)).replace(tzinfo=timezone.utc)
+
+    # New sightings add to the restored ones.
+    await restarted.record_scene(_scene("door", NOW, ("cat", 0.9)))
+    await restarted.sightings.recorder.close()
+    assert redis.hashes["door"]["cat"][2] == 4
+
+
+async def test_unreachable_store_does_not_block_sightings():
+    async def down(*args):
+        raise ConnectionError("redis down")
+
+    recorder = SightingRecorder(down, down)
+    perception = MockPerceptionAgent(sighting_recorder=recorder)
+    await perception.record_scene(_scene("door", NOW, ("cat", 0.8)))
+    assert (await perception.last_seen("door", "cat")).count == 1
+    await recorder.close()
+    # Kept for the next flush
+    assert "door" in recorder._pending
+
+
+def test_object_questions_are_recognized_without_the_llm():
+    assert object_query_target("Is my cat there?") == "cat"
+    assert object_query_target("anyone home?") == "person"
+    assert object_query_target("Any parcels today?") == "package"
+    assert object_query_target("How are things?") is None
+    assert object_query_target("Is the cat with the dog?") is None
+    assert object_query_target("Turn off alerts for the cat") is None
+
+
+@pytest.fixture
+def no_llm(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise AssertionError("the LLM should not be called")
+
+    monkeypatch.setattr(conversation, "classify_intent", fail)
+    monkeypatch.setattr(conversation, "generate_response", fail)
+
+
+async def test_object_query_answers_from_the_index(no_llm):
+    perception = MockPerceptionAgent()
+    agent = ConversationAgentImpl(perception)
+    await perception.record_scene(_scene("door", NOW - timedelta(minutes=12), ("cat", 0.9)))
+    await perception.record_scene(_scene("door", NOW - timedelta(minutes=1)))
+    context = {"camera_id": "door", "latest_scene": await perception.get_latest_scene("door")}
+
+    reply = await agent.process(_message("Is my kitty there?"), context)
+    assert reply.text == "I don't see a cat right now. Last seen: 12 minutes ago."
+
+    reply = await agent.process(_message("Any packages?"), context)
+    assert reply.text == "I haven't detected a package in recent history."
+
+    await perception.record_scene(_scene("door", NOW, ("cat", 0.88)))
+    context["latest_scene"] = await perception.get_latest_scene("door")
+    reply = await agent.process(_message("is the cat home"), context)
+    assert reply.text == "Yes, a cat is visible. Confidence: 88%."
+
+
+async def test_classified_intents_match_user_intent(monkeypatch):
+    class Model:
+        reply = "OBJECT_QUERY"
+
+        def generate_content(self, prompt, request_options=None):
+            return SimpleNamespace(text=f"{self.reply}\n", usage_metadata=None)
+
+    model = Model()
+    monkeypatch.setattr(gemini, "get_model", lambda: model)
+    assert await gemini.classify_intent("where did the cat go?") == UserIntent.OBJECT_QUERY
+    model.reply = "SNAPSHOT_REQUEST"
+    assert await gemini.classify_intent("show me") == UserIntent.SNAPSHOT_REQUEST
+    model.reply = "something else"
+    assert await gemini.classify_intent("hm") == UserIntent.UNKNOWN
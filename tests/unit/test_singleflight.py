@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(flight.do("k", load) for _ in range(20)))
+
+    assert results == ["value"] * 20
+    assert calls == 1
+    assert "k" not in flight
+
+
+async def test_errors_reach_every_waiter_and_are_not_remembered():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("down")
+
+    results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, ConnectionError) for r in results)
+
+    async def ok():
+        return 1
+
+    assert await flight.do("k", ok) == 1
+
+
+async def test_cancelled_caller_does_not_cancel_the_shared_load():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def load():
+        started.set()
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.create_task(flight.do("k", load))
+    await started.wait()
+    second = asyncio.create_task(flight.do("k", load))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == "done"
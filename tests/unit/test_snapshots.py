@@ -0,0 +1,159 @@
+import asyncio
+import base64
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.agents.pipeline import get_perception
+from app.main import app
+from app.services import snapshots
+from app.services.snapshots import LocalSnapshotStore, S3SnapshotStore, SnapshotTooLarge, snapshot_key
+
+JPEG = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 2000 + b"\xff\xd9"
+DIGEST = hashlib.sha256(JPEG).hexdigest()
+
+
+class FakeS3Error(Exception):
+    def __init__(self, code: str):
+        self.response = {"Error": {"Code": code}}
+
+
+class FakeS3:
+    """Local stand-in for the parts of the boto3 S3 client the store uses."""
+
+    def __init__(self):
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.uploads = 0
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        if (Bucket, Key) not in self.objects:
+            raise FakeS3Error("404")
+        return {"ContentLength": len(self.objects[Bucket, Key])}
+
+    def upload_fileobj(self, file, bucket: str, key: str, ExtraArgs: dict | None = None) -> None:
+        self.uploads += 1
+        parts = iter(lambda: file.read(8192), b"")
+        self.objects[bucket, key] = b"".join(parts)
+
+    def generate_presigned_url(self, operation: str, Params: dict, ExpiresIn: int) -> str:
+        return f"https://s3.test/{Params['Bucket']}/{Params['Key']}?expires={ExpiresIn}"
+
+
+async def _stream(data: bytes, size: int = 1000):
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+
+async def test_local_store_writes_each_frame_once(tmp_path):
+    store = LocalSnapshotStore(tmp_path, "/snap", max_bytes=10_000_000)
+
+    first = await store.put_stream(_stream(JPEG))
+    again = await store.put(JPEG)
+
+    assert (first.hash, first.size, first.created) == (DIGEST, len(JPEG), True)
+    assert again.created is False
+    assert (tmp_path / snapshot_key(DIGEST)).read_bytes() == JPEG
+    assert list((tmp_path / "tmp").iterdir()) == []
+    assert store.url(DIGEST) == f"/snap/{DIGEST}"
+
+
+async def test_oversized_upload_is_rejected_without_leftovers(tmp_path):
+    store = LocalSnapshotStore(tmp_path, "/snap", max_bytes=len(JPEG) - 1)
+
+    with pytest.raises(SnapshotTooLarge):
+        await store.put_stream(_stream(JPEG))
+
+    assert list((tmp_path / "tmp").iterdir()) == []
+    assert await store.locate(DIGEST) is None
+
+
+async def test_local_store_does_no_file_io_on_the_event_loop(tmp_path, monkeypatch):
+    loop_thread = threading.get_ident()
+    on_loop = []
+
+    def watch(owner, name):
+        original = getattr(owner, name)
+
+        def wrapper(*args, **kwargs):
+            if threading.get_ident() == loop_thread:
+                on_loop.append(name)
+            return original(*args, **kwargs)
+        monkeypatch.setattr(owner, name, wrapper)
+
+    for owner, name in [(os, "replace"), (tempfile, "mkstemp"), (Path, "exists"), (Path, "mkdir")]:
+        watch(owner, name)
+
+    store = LocalSnapshotStore(tmp_path, "/snap", max_bytes=10_000_000)
+
+    await store.put_stream(_stream(JPEG))
+    await store.put(JPEG)
+    await store.put_variant(DIGEST, "thumb", b"thumb")
+    assert await store.exists(DIGEST, "thumb")
+    assert await store.locate(DIGEST) is not None
+    assert on_loop == []
+async def test_s3_store_skips_existing_objects(tmp_path):
+    client = FakeS3()
+    store = S3SnapshotStore("media", "/snap", 10_000_000, spool_dir=tmp_path, client=client)
+
+    assert (await store.put_stream(_stream(JPEG))).created
+    assert not (await store.put(JPEG)).created
+
+    assert client.uploads == 1
+    assert client.objects["media", "snapshots/" + snapshot_key(DIGEST)] == JPEG
+    assert await store.locate(DIGEST) == f"https://s3.test/media/snapshots/{snapshot_key(DIGEST)}?expires=3600"
+    assert await store.locate("0" * 64) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "_store", LocalSnapshotStore(tmp_path, "/api/v1/snapshots", 10_000_000))
+    # Entered, so background tasks started by uploads run and are drained on one loop.
+    with TestClient(app) as client:
+        yield client
+
+
+def test_snapshot_upload_and_download(client):
+    response = client.post("/api/v1/cameras/door/snapshots", content=JPEG, headers={"content-type": "image/jpeg"})
+    uploaded = response.json()
+    assert uploaded["hash"] == DIGEST and uploaded["size"] == len(JPEG) and uploaded["created"]
+    assert uploaded["url"] == f"/api/v1/snapshots/{DIGEST}"
+    assert asyncio.run(get_perception().request_snapshot("door")) == uploaded["url"]
+
+    response = client.get(uploaded["url"])
+    assert response.status_code == 200
+    assert response.content == JPEG
+    assert response.headers["content-length"] == str(len(JPEG))
+    assert response.headers["content-type"] == "image/jpeg"
+    assert "immutable" in response.headers["cache-control"]
+
+    cached = client.get(uploaded["url"], headers={"if-none-match": response.headers["etag"]})
+    assert cached.status_code == 304 and cached.content == b""
+
+
+def test_snapshot_reference_must_already_be_stored(client):
+    client.post("/api/v1/cameras/door/snapshots", content=JPEG, headers={"content-type": "image/jpeg"})
+
+    assert client.post("/api/v1/cameras/yard/snapshots", json={"hash": DIGEST}).json()["url"].endswith(DIGEST)
+    assert client.post("/api/v1/cameras/yard/snapshots", json={"hash": "0" * 64}).status_code == 404
+
+
+def test_unknown_or_malformed_snapshot_is_404(client):
+    assert client.get(f"/api/v1/snapshots/{'0' * 64}").status_code == 404
+    assert client.get("/api/v1/snapshots/..%2F..%2Fetc%2Fpasswd").status_code == 404
+    assert client.post("/api/v1/cameras/door/snapshots", content=b"").status_code == 400
+
+
+def test_scene_frame_becomes_the_cameras_snapshot(client):
+    frame = base64.b64encode(JPEG).decode()
+    body = {"timestamp": "2026-01-01T12:00:00", "objects": [], "frame": frame}
+    assert client.post("/api/v1/cameras/porch/scenes", json=body).status_code == 200
+
+    url = asyncio.run(get_perception().request_snapshot("porch"))
+    assert url == f"/api/v1/snapshots/{DIGEST}"
+    assert client.get(url).content == JPEG
@@ -0,0 +1,87 @@
+import json
+from itertools import islice
+
+import pytest
+
+from app.agents.communication import TelegramTransport
+from app.config import settings
+from app.services.telegram_updates import decode_update
+from tests.load.workload import synthesize_updates
+
+USER = {"id": 42, "is_bot": False, "first_name": "Ada", "username": "ada"}
+CHAT = {"id": 42, "type": "private"}
+MESSAGE = {"message_id": 55, "date": 1704110400, "chat": CHAT, "from": USER}
+
+SUPPORTED = [
+    {"update_id": 1, "message": {**MESSAGE, "text": "is my cat there? 🐈", "entities": [{"type": "bold", "offset": 0, "length": 2}]}},
+    {"update_id": 2, "message": {**MESSAGE, "from": {"id": 7, "is_bot": False, "first_name": "NoUsername"}, "text": "hi"}},
+    {"update_id": 3, "message": {**MESSAGE, "from": {**USER, "id": 2**40}, "text": "big id"}},
+    {"update_id": 4, "message": {**MESSAGE, "caption": "the door", "photo": [
+        {"file_id": "small", "file_unique_id": "s", "width": 90, "height": 90},
+        {"file_id": "large", "file_unique_id": "l", "width": 1280, "height": 960, "file_size": 1234},
+    ]}},
+    {"update_id": 5, "message": {**MESSAGE, "location": {"latitude": 52, "longitude": 13.405, "horizontal_accuracy": 5}}},
+    {"update_id": 6, "message": {**MESSAGE, "text": "", "location": {"latitude": -33.8688, "longitude": 151.2093}}},
+    {"update_id": 7, "callback_query": {
+        "id": "9", "from": USER, "chat_instance": "1", "data": "VIEW", "message": {**MESSAGE, "text": "Motion detected"},
+    }},
+    # Inaccessible message (date 0)
+    {"update_id": 8, "callback_query": {
+        "id": "10", "from": USER, "chat_instance": "1", "data": "OK", "message": {"message_id": 3, "date": 0, "chat": CHAT},
+    }},
+    {"update_id": 9, "callback_query": {"id": "11", "from": USER, "chat_instance": "1", "message": {**MESSAGE, "text": "x"}}},
+]
+
+UNSUPPORTED = [
+    {"update_id": 20, "edited_message": {**MESSAGE, "edit_date": 1704110500, "text": "edited"}},
+    {"update_id": 21, "message": {**MESSAGE, "sticker": {
+        "file_id": "st", "file_unique_id": "st", "width": 512, "height": 512, "is_animated": False, "is_video": False,
+        "type": "regular",
+    }}},
+    {"update_id": 22, "channel_post": {"message_id": 1, "date": 1704110400, "chat": {"id": -100, "type": "channel"}, "text": "post"}},
+    {"update_id": 23, "message": {"message_id": 1, "date": 1704110400, "chat": CHAT, "text": "no sender"}},
+    {"update_id": 24, "callback_query": {"id": "12", "from": USER, "chat_instance": "1", "inline_message_id": "abc", "data": "X"}},
+    {"update_id": 25, "message": {**MESSAGE, "text": 12345}},
+]
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    monkeypatch.setattr(settings, "telegram_bot_token", "123456:TEST")
+    return TelegramTransport()
+
+
+def _outcome(fn):
+    try:
+        return fn()
+    except Exception as e:
+        return type(e)
+
+
+def test_typed_decoder_matches_update_de_json(transport):
+    for update in SUPPORTED + list(islice(synthesize_updates(seed=1), 200)):
+        decoded = decode_update(json.dumps(update).encode())
+        assert decoded.update_id == update["update_id"]
+        assert decoded.message is not None, update
+        assert decoded.message == transport._from_update_object(update), update
+        assert decode_update(update).message == decoded.message
+
+
+@pytest.mark.parametrize("update", UNSUPPORTED)
+async def test_unsupported_updates_fall_back_to_update_de_json(transport, update):
+    decoded = decode_update(json.dumps(update).encode())
+    assert decoded.message is None
+    assert decoded.update_id == update["update_id"]
+
+    expected = _outcome(lambda: transport._from_update_object(update))
+    try:
+        actual = await transport.receive(decoded)
+    except Exception as e:
+        actual = type(e)
+    assert actual == expected
+
+
+@pytest.mark.parametrize("body", [b"not json", b"[1, 2]", b'"text"'])
+def test_malformed_bodies_raise_value_error(body):
+    with pytest.raises(ValueError):
+        decode_update(body)
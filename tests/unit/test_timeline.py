@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone
+
+from app.agents import conversation
+from app.agents.conversation import ConversationAgentImpl, activity_query_target
+from app.agents.perception import MockPerceptionAgent
+from app.models.message import IncomingMessage
+from app.models.scene import CompactScene, Detection
+from app.services.timeline import MOTION, ActivityTimeline, format_intervals, summarize_activity
+
+DAY = datetime(2024, 3, 1)
+
+
+def _scene(at: datetime, motion: bool = False, *objects: str, camera_id: str = "door") -> CompactScene:
+    return CompactScene(
+        camera_id=camera_id,
+        timestamp=at,
+        motion=motion,
+        objects=[Detection(type=kind, confidence=0.9) for kind in objects],
+    )
+
+
+def _minutes(timeline: ActivityTimeline, *minutes: int, motion: bool = True, objects=()) -> None:
+    for minute in minutes:
+        timeline.observe(_scene(DAY + timedelta(minutes=minute, seconds=20), motion, *objects))
+
+
+def test_minutes_merge_into_intervals():
+    timeline = ActivityTimeline()
+    _minutes(timeline, 480, 481, 483, 600)  # 08:00, 08:01, 08:03 (one quiet minute) and 10:00
+    _minutes(timeline, 481, motion=False, objects=["kitty"])
+
+    assert timeline.intervals("door", MOTION, DAY, DAY + timedelta(days=1)) == [
+        (DAY + timedelta(minutes=480), DAY + timedelta(minutes=484)),
+        (DAY + timedelta(minutes=600), DAY + timedelta(minutes=601)),
+    ]
+    assert timeline.intervals("door", MOTION, DAY, DAY + timedelta(days=1), gap_minutes=0)[0][1] == DAY + timedelta(minutes=482)
+    # Ranges clip to the minute.
+    assert timeline.intervals("door", MOTION, DAY + timedelta(minutes=483), DAY + timedelta(minutes=599)) == [
+        (DAY + timedelta(minutes=483), DAY + timedelta(minutes=484)),
+    ]
+    assert list(timeline.activity("door", DAY, DAY + timedelta(hours=9))) == [MOTION, "cat"]
+    assert timeline.activity("yard", DAY, DAY + timedelta(days=1)) == {}
+
+
+def test_intervals_span_midnight_and_old_days_expire():
+    timeline = ActivityTimeline(retention_days=2)
+    _minutes(timeline, 24 * 60 - 1, 24 * 60)
+    assert timeline.intervals("door", MOTION, DAY, DAY + timedelta(days=2)) == [
+        (DAY + timedelta(minutes=24 * 60 - 1), DAY + timedelta(minutes=24 * 60 + 1)),
+    ]
+    _minutes(timeline, 2 * 24 * 60)
+    assert timeline.intervals("door", MOTION, DAY, DAY + timedelta(days=1, hours=1)) == [
+        (DAY + timedelta(days=1), DAY + timedelta(days=1, minutes=1)),
+    ]
+
+
+def test_timeline_moves_with_camera():
+    timeline = ActivityTimeline()
+    _minutes(timeline, 5, objects=["cat"])
+    state = timeline.export_camera("door")
+    assert state[MOTION] == {str((DAY - datetime(1970, 1, 1)).days): format(1 << 5, "x")}
+    assert timeline.activity("door", DAY, DAY + timedelta(days=1)) == {}
+
+    other = ActivityTimeline()
+    _minutes(other, 7)
+    other.import_camera("door", state)
+    assert len(other.intervals("door", MOTION, DAY, DAY + timedelta(days=1), gap_minutes=0)) == 2
+
+
+def test_summary_for_the_prompt():
+    hour = timedelta(hours=1)
+    activity = {
+        "cat": [(DAY + 9 * hour, DAY + 9 * hour + timedelta(minutes=45))],
+        MOTION: [(DAY + 8 * hour + timedelta(minutes=m), DAY + 8 * hour + timedelta(minutes=m + 1)) for m in range(0, 70, 10)],
+    }
+    assert summarize_activity(activity) == (
+        "- Motion: …, 08:20, 08:30, 08:40, 08:50, 09:00 (UTC)\n"
+        "- Cat: 09:00–09:44 (UTC)"
+    )
+    assert summarize_activity({}) == "None"
+    assert format_intervals(activity["cat"]) == "09:00–09:44"
+
+
+def test_activity_questions_are_recognized():
+    assert activity_query_target("When was there motion today?") == (MOTION, "today")
+    assert activity_query_target("when did the cat come by yesterday?") == ("cat", "yesterday")
+    assert activity_query_target("When was someone here?") == ("person", "day")
+    assert activity_query_target("When is the next alert?") is None
+
+
+async def test_activity_questions_are_answered_from_the_timeline(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise AssertionError("the LLM should not be called")
+
+    monkeypatch.setattr(conversation, "classify_intent", fail)
+    perception = MockPerceptionAgent()
+    agent = ConversationAgentImpl(perception)
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0, tzinfo=None)
+    await perception.record_scene(_scene(now - timedelta(minutes=3), True, "person"))
+    await perception.record_scene(_scene(now - timedelta(minutes=2), True))
+
+    def ask(text: str):
+        message = IncomingMessage(sender_telegram_id=1, message_id=1, type="text", content=text, timestamp=now)
+        return agent.process(message, {"camera_id": "door"})
+
+    start, end = now - timedelta(minutes=3), now - timedelta(minutes=2)
+    assert (await ask("When was there motion?")).text == f"Motion in the last 24 hours: {start:%H:%M}–{end:%H:%M} (UTC)."
+    assert (await ask("when was anyone here")).text == f"A person was seen in the last 24 hours: {start:%H:%M} (UTC)."
+    assert (await ask("When did the dog come by?")).text == "I haven't seen a dog in the last 24 hours."
+
+
+async def test_prompt_gets_summary_from_the_timeline(monkeypatch):
+    prompts = []
+
+    async def classify(text):
+        return "unknown"
+
+    async def generate(prompt, history):
+        prompts.append(prompt)
+        return "ok"
+
+    monkeypatch.setattr(conversation, "classify_intent", classify)
+    monkeypatch.setattr(conversation, "generate_response", generate)
+    perception = MockPerceptionAgent()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    await perception.record_scene(_scene(now, True, "cat"))
+
+    message = IncomingMessage(sender_telegram_id=1, message_id=1, type="text", content="what's new?", timestamp=now)
+    await ConversationAgentImpl(perception).process(message, {"camera_id": "door"})
+    assert f"- Motion: {now:%H:%M} (UTC)\n- Cat: {now:%H:%M} (UTC)" in prompts[0]
@@ -0,0 +1,92 @@
+import json
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.agents.communication import MockTransport
+from app.agents.gatekeeper import GatekeeperAgentImpl
+from app.agents.perception import MockPerceptionAgent
+from app.agents.pipeline import MessagePipeline
+from app.config import settings
+from app.main import app
+from app.models.message import OutgoingMessage
+from app.services import tracing
+
+
+class EchoConversation:
+    @tracing.traced("conversation.process")
+    async def process(self, message, context):
+        return OutgoingMessage(type="text", text=message.content)
+
+
+@pytest.fixture
+def export_path(tmp_path, monkeypatch):
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(settings, "tracing_enabled", True)
+    monkeypatch.setattr(settings, "tracing_export_path", str(path))
+    return path
+
+
+async def test_update_exports_one_otlp_trace(export_path):
+    pipeline = MessagePipeline(MockTransport(), MockPerceptionAgent(), EchoConversation(), GatekeeperAgentImpl())
+
+    with tracing.span("telegram.update", update_id=42):
+        await pipeline.handle({"telegram_id": 1, "content": "hello"})
+
+    await tracing.flush_traces()
+    [line] = export_path.read_text().splitlines()
+    spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_name = {s["name"]: s for s in spans}
+    root = by_name["telegram.update"]
+
+    assert set(by_name) == {
+        "telegram.update", "mock.receive", "conversation.process", "gatekeeper.validate_response", "mock.send",
+    }
+    assert {s["traceId"] for s in spans} == {root["traceId"]}
+    assert "parentSpanId" not in root
+    assert all(s["parentSpanId"] == root["spanId"] for s in spans if s is not root)
+    assert root["attributes"] == [{"key": "update_id", "value": {"intValue": "42"}}]
+
+
+async def test_export_does_not_write_on_the_event_loop(export_path, monkeypatch):
+    writers = set()
+    write_pending = tracing._exporter._write_pending
+
+    def record_thread():
+        writers.add(threading.get_ident())
+        write_pending()
+
+    monkeypatch.setattr(tracing._exporter, "_write_pending", record_thread)
+    for i in range(20):
+        with tracing.span("telegram.update", update_id=i):
+            pass
+    assert threading.get_ident() not in writers
+
+    await tracing.flush_traces()
+    assert len(export_path.read_text().splitlines()) == 20
+
+
+def test_disabled_tracing_is_a_noop(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "tracing_enabled", False)
+    monkeypatch.setattr(settings, "tracing_export_path", str(tmp_path / "spans.jsonl"))
+
+    with tracing.span("anything"):
+        pass
+
+    assert not (tmp_path / "spans.jsonl").exists()
+
+
+def test_profile_endpoint_requires_token(monkeypatch):
+    client = TestClient(app)
+
+    monkeypatch.setattr(settings, "debug_token", None)
+    assert client.get("/debug/profile").status_code == 404
+
+    monkeypatch.setattr(settings, "debug_token", "s3cret")
+    assert client.get("/debug/profile", headers={"X-Debug-Token": "wrong"}).status_code == 403
+
+    response = client.get("/debug/profile?seconds=0.05&interval_ms=1", headers={"X-Debug-Token": "s3cret"})
+    assert response.status_code == 200
+    stack, count = response.text.splitlines()[0].rsplit(" ", 1)
+    assert ";" in stack and int(count) > 0
@@ -0,0 +1,165 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.agents.event import EventAgentImpl
+from app.agents.perception import MockPerceptionAgent
+from app.agents.pipeline import SceneIngestPipeline
+from app.models.scene import CompactScene, Detection
+from app.services.vision import SceneEnhancer, frame_hash
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+class LocalVisionModel:
+    """Stand-in for the vision model: a frame's bytes name the object in it."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.batches: list[list[bytes]] = []
+
+    async def __call__(self, frames: list[bytes], detections: list[list[dict]]) -> list[dict]:
+        self.batches.append(frames)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("vision model unavailable")
+        return [
+            {"description": f"A {frame.decode()} near the door.", "objects": [{"type": frame.decode(), "confidence": 0.97}]}
+            for frame in frames
+        ]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _scene(*objects: tuple[str, float], seconds: float = 0, camera_id: str = "cam") -> CompactScene:
+    return CompactScene(
+        camera_id=camera_id,
+        timestamp=T0 + timedelta(seconds=seconds),
+        objects=[Detection(type=t, confidence=c) for t, c in objects],
+        motion=bool(objects),
+    )
+
+
+def test_only_new_or_ambiguous_detections_escalate():
+    enhancer = SceneEnhancer(LocalVisionModel(), settle_seconds=60)
+
+    assert enhancer.escalation_reason(_scene()) is None
+    assert enhancer.escalation_reason(_scene(("person", 0.9))) == "new_object"
+    # Still in view, and flickering confidence on a settled object: nothing new.
+    assert enhancer.escalation_reason(_scene(("person", 0.91), seconds=5)) is None
+    assert enhancer.escalation_reason(_scene(("person", 0.5), seconds=10)) is None
+    assert enhancer.escalation_reason(_scene(("cat", 0.55), seconds=15)) == "ambiguous"
+    assert enhancer.escalation_reason(_scene(("dog", 0.2), seconds=20)) is None
+    # Out of view for longer than the settle window counts as new again.
+    assert enhancer.escalation_reason(_scene(("person", 0.9), seconds=200)) == "new_object"
+    assert enhancer.escalation_reason(_scene(("person", 0.9), camera_id="other")) == "new_object"
+
+
+async def test_escalated_frames_share_one_batched_request():
+    model = LocalVisionModel()
+    enhancer = SceneEnhancer(model, batch_size=3, batch_wait=5.0)
+    scenes = [_scene((kind, 0.9), camera_id=f"cam-{kind}") for kind in ("person", "cat", "dog")]
+
+    outcomes = [enhancer.submit(scene, scene.objects[0].type.encode()) for scene in scenes]
+    await enhancer.close()
+
+    assert outcomes == ["queued"] * 3
+    assert model.batches == [[b"person", b"cat", b"dog"]]
+    assert all(scene.enhanced for scene in scenes)
+    assert scenes[1].enhancement.objects[0].type == "cat"
+    assert scenes[1].frame_hash == frame_hash(b"cat")
+
+
+async def test_partial_batch_is_sent_after_the_wait():
+    model = LocalVisionModel()
+    enhancer = SceneEnhancer(model, batch_size=8, batch_wait=0.01)
+    scene = _scene(("person", 0.6))
+
+    enhancer.submit(scene, b"person")
+    await asyncio.sleep(0.05)
+
+    assert model.batches == [[b"person"]]
+    assert scene.enhancement.reason == "ambiguous"
+
+
+async def test_same_frame_is_described_once():
+    model = LocalVisionModel(delay=0.01)
+    enhancer = SceneEnhancer(model, batch_size=1, settle_seconds=0)
+    first, again, later = (_scene(("person", 0.9), seconds=s) for s in (0, 1, 2))
+
+    assert enhancer.submit(first, b"person") == "queued"
+    assert enhancer.submit(again, b"person") == "joined"
+    await enhancer.close()
+    assert enhancer.submit(later, b"person") == "cached"
+
+    assert len(model.batches) == 1
+    assert again.enhancement == first.enhancement == later.enhancement
+
+
+async def test_each_camera_has_its_own_budget():
+    clock = FakeClock()
+    model = LocalVisionModel()
+    enhancer = SceneEnhancer(model, batch_size=1, budget_per_hour=2, settle_seconds=0, clock=clock)
+
+    outcomes = [enhancer.submit(_scene(("person", 0.9), seconds=i), b"frame-%d" % i) for i in range(3)]
+    assert outcomes == ["queued", "queued", "over_budget"]
+    assert enhancer.submit(_scene(("person", 0.9), camera_id="other"), b"other") == "queued"
+
+    clock.now = 1800  # Half an hour refills one frame.
+    assert enhancer.submit(_scene(("person", 0.9), seconds=3), b"frame-3") == "queued"
+    await enhancer.close()
+
+
+async def test_failed_request_leaves_scene_unenhanced():
+    enhancer = SceneEnhancer(LocalVisionModel(fail=True), batch_size=1)
+    scene = _scene(("person", 0.9))
+
+    enhancer.submit(scene, b"person")
+    await enhancer.close()
+
+    assert not scene.enhanced
+    assert enhancer.submit(_scene(("cat", 0.9), seconds=1), b"person") == "queued"
+    await enhancer.close()
+
+
+async def test_short_reply_releases_every_frame_in_the_batch():
+    class ShortModel(LocalVisionModel):
+        async def __call__(self, frames, detections):
+            return (await super().__call__(frames, detections))[:-1]
+
+    enhancer = SceneEnhancer(ShortModel(), batch_size=2)
+    scenes = [_scene(("person", 0.9)), _scene(("cat", 0.9), seconds=1)]
+    enhancer.submit(scenes[0], b"person")
+    enhancer.submit(scenes[1], b"cat")
+    await enhancer.close()
+
+    assert not any(scene.enhanced for scene in scenes)
+    assert enhancer._waiting == {}
+
+
+async def test_cancelled_request_releases_its_frames():
+    enhancer = SceneEnhancer(LocalVisionModel(delay=5), batch_size=1)
+    enhancer.submit(_scene(("person", 0.9)), b"person")
+    await enhancer.close(timeout=0.01)
+
+    assert enhancer._waiting == {}
+
+async def test_ingest_answers_before_enhancement_finishes():
+    model = LocalVisionModel(delay=0.05)
+    enhancer = SceneEnhancer(model, batch_size=1)
+    perception = MockPerceptionAgent()
+    ingest = SceneIngestPipeline(perception, EventAgentImpl(), enhancer)
+    scene = _scene(("person", 0.9))
+
+    await ingest.handle(scene, frame=b"person")
+    assert not scene.enhanced
+    await enhancer.close()
+
+    latest = await perception.get_latest_scene("cam")
+    assert latest.enhanced and latest.enhancement.description == "A person near the door."
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from app.services.metrics import TASKS as TASK_METRIC
+from app.worker.dispatch import Dispatcher, EagerBackend
+from app.worker.queues import QueueSpec
+from app.worker.registry import TASKS, TaskSpec, get_task
+
+
+@pytest.fixture
+def register(monkeypatch):
+    def register(fn, **queue):
+        queue = {"concurrency": 2, "time_limit": 1.0, "result_timeout": 1.0, **queue}
+        spec = TaskSpec(f"test.{fn.__name__}", QueueSpec("test", **queue), fn)
+        monkeypatch.setitem(TASKS, spec.name, spec)
+        return spec.name
+    return register
+
+
+async def test_eager_task_returns_its_result(register):
+    async def add(a, b):
+        return a + b
+
+    name = register(add)
+    succeeded = TASK_METRIC.labels("test", "succeeded")
+    before = succeeded.get()
+    handle = await Dispatcher(EagerBackend()).enqueue(name, 2, b=3)
+
+    assert await handle.result() == 5
+    assert succeeded.get() == before + 1
+
+
+async def test_duplicate_is_dropped_until_the_first_finishes(register):
+    release = asyncio.Event()
+    runs = []
+
+    async def enhance(frame):
+        runs.append(frame)
+        await release.wait()
+
+    name = register(enhance)
+    dispatcher = Dispatcher(EagerBackend())
+    deduplicated = TASK_METRIC.labels("test", "deduplicated")
+    before = deduplicated.get()
+
+    first = await dispatcher.enqueue(name, "f1", dedup_key="f1")
+    assert await dispatcher.enqueue(name, "f1", dedup_key="f1") is None
+    assert await dispatcher.enqueue(name, "f2", dedup_key="f2") is not None
+    release.set()
+    await first.result()
+
+    assert await dispatcher.enqueue(name, "f1", dedup_key="f1") is not None
+    assert deduplicated.get() == before + 1
+
+
+async def test_concurrency_is_limited_per_queue(register):
+    running = peak = 0
+
+    async def work():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    name = register(work, concurrency=2)
+    dispatcher = Dispatcher(EagerBackend())
+    handles = [await dispatcher.enqueue(name) for _ in range(6)]
+    await asyncio.gather(*(h.result() for h in handles))
+
+    assert peak == 2
+
+
+async def test_time_limit_cancels_the_task(register):
+    async def hang():
+        await asyncio.sleep(10)
+
+    name = register(hang, time_limit=0.05)
+    handle = await Dispatcher(EagerBackend()).enqueue(name)
+
+    with pytest.raises(TimeoutError):
+        await handle.result()
+
+
+async def test_result_timeout_leaves_the_task_running(register):
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return "done"
+
+    name = register(slow, result_timeout=0.01)
+    handle = await Dispatcher(EagerBackend()).enqueue(name)
+
+    with pytest.raises(TimeoutError):
+        await handle.result()
+    release.set()
+    assert await handle.result(timeout=1.0) == "done"
+
+
+async def test_unknown_task_is_rejected():
+    with pytest.raises(ValueError, match="Unknown task"):
+        await Dispatcher(EagerBackend()).enqueue("alerts.nope")
+
+
+def test_builtin_tasks_are_routed_to_their_queues():
+    assert get_task("alerts.deliver").queue.name == "alerts"
+    assert get_task("maintenance.purge_scenes").queue.name == "maintenance"
+
+
+def test_celery_app_registers_every_task():
+    pytest.importorskip("celery")
+    from app.worker.celery_app import get_celery_app
+
+    celery = get_celery_app()
+    for name, spec in TASKS.items():
+        if name.startswith("test."):
+            continue
+        assert celery.tasks[name].queue == spec.queue.name
+        assert celery.tasks[name].time_limit == spec.queue.time_limit
+    assert celery.conf.worker_prefetch_multiplier == 1
+    assert celery.conf.task_acks_late